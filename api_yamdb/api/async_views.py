@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .connections import check_connections
+from .metrics import capture_queries
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor():
+    """Общий пул потоков для чтения с ограниченным числом потоков.
+
+    Число потоков (ASYNC_VIEW_THREADS) ограничивает число одновременных
+    запросов к базе данных от процесса; остальные запросы ждут в очереди,
+    не занимая цикл событий.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_VIEW_THREADS,
+        thread_name_prefix='api-view'
+    )
+
+
+def run_view(view, request, *args, **kwargs):
+    """Синхронное представление DRF в рабочем потоке.
+
+    Соединения с базой данных принадлежат потоку, поэтому устаревшие и
+    неработающие соединения закрываются до и после запроса, как это
+    делают сигналы начала и конца запроса для основного потока. Ответ
+    отрисовывается здесь же, чтобы не занимать общий поток синхронного
+    кода.
+    """
+    close_old_connections()
+    check_connections()
+    capture_queries()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(view, request, *args, **kwargs):
+    """Выполняет представление в пуле с контекстом текущей задачи, чтобы
+    contextvars (например, замеры запроса) были видны в потоке."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        functools.partial(
+            context.run, run_view, view, request, *args, **kwargs
+        )
+    )
+
+
+def async_view(view):
+    """Асинхронная обёртка синхронного представления DRF.
+
+    Чтение выполняется в пуле get_executor, изменения - в общем потоке
+    синхронного кода, как синхронные представления Django под ASGI.
+    """
+    write = sync_to_async(run_view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def handler(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_in_pool(view, request, *args, **kwargs)
+        return await write(view, request, *args, **kwargs)
+
+    return handler
+
+
+class AsyncReadMixin:
+    """Под ASGI (ASYNC_VIEWS) роутер получает асинхронные представления."""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+        return async_view(view)
@@ -0,0 +1,191 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .cache import get_cache, is_process_local
+
+CLAIMS = ('username', 'role', 'is_superuser')
+VERSION_CLAIM = 'ver'
+LOCAL_TTL = 30
+LOCAL_SIZE = 10000
+# Время жизни версии в общем кеше: ограничивает, сколько проживёт версия,
+# записанная не в том порядке при конкурентных изменениях пользователя.
+SHARED_TTL = 10 * 60
+
+
+class TTLCache:
+    """Кеш процесса с вытеснением давно не использованных записей
+    и ограниченным временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+versions = TTLCache(LOCAL_SIZE, LOCAL_TTL)
+users = TTLCache(LOCAL_SIZE, LOCAL_TTL)
+
+
+def version_key(user_id):
+    return f'user-version:{user_id}'
+
+
+def shared_versions():
+    """Общий для процессов кеш версий или None.
+
+    Кеш API в памяти процесса (LocMemCache) общим не считается: сброс
+    версии в одном процессе не дошёл бы до остальных, и они принимали бы
+    старые токены до истечения SHARED_TTL. Без общего кеша версия
+    читается из базы данных после LOCAL_TTL.
+    """
+    return None if is_process_local() else get_cache()
+
+
+def token_version(user_id):
+    """Текущая версия токенов пользователя или None, если его нет.
+
+    Сначала ищется в кеше процесса, затем в общем кеше, если он есть,
+    и только потом в базе данных. Общий кеш на чтении не заполняется:
+    строка, прочитанная до фиксации изменения, вернула бы в него старую
+    версию. Его заполняет store_version при сохранении пользователя.
+    """
+    version = versions.get(user_id)
+    if version is not None:
+        return version
+    shared = shared_versions()
+    if shared is not None:
+        version = shared.get(version_key(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is None:
+            return None
+    versions.set(user_id, version)
+    return version
+
+
+def store_version(user_id, version):
+    """Записывает сохранённую версию в кеши после фиксации транзакции."""
+    def store():
+        shared = shared_versions()
+        if shared is not None:
+            shared.set(version_key(user_id), version, SHARED_TTL)
+        versions.set(user_id, version)
+
+    transaction.on_commit(store)
+
+
+def forget_version(user_id):
+    """Удаляет версию из кешей после фиксации транзакции."""
+    def forget():
+        shared = shared_versions()
+        if shared is not None:
+            shared.delete(version_key(user_id))
+        versions.delete(user_id)
+
+    transaction.on_commit(forget)
+
+
+def access_token_for(user):
+    """Access-токен с ролью, именем и версией токенов пользователя."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return str(token)
+
+
+def token_user(user_id, token):
+    """Пользователь из данных токена, без запроса к базе данных.
+
+    В объекте заполнены только поля из токена, поэтому сохранять его
+    нельзя; полный объект нужно получить из базы по `pk`.
+    """
+    user = User(
+        pk=user_id,
+        token_version=token[VERSION_CLAIM],
+        **{claim: token[claim] for claim in CLAIMS}
+    )
+    user._state.adding = False
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к базе данных.
+
+    Если версия в токене совпадает с текущей версией токенов пользователя,
+    request.user строится из данных токена. Иначе (роль сменилась или
+    токен выпущен до появления этих данных) пользователь загружается из
+    базы и кешируется в процессе до следующей смены версии.
+
+    Версия проверяется по кешу процесса с коротким временем жизни
+    LOCAL_TTL, поэтому другие процессы замечают смену роли с задержкой
+    не больше LOCAL_TTL секунд.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя'
+            )
+        version = token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found'
+            )
+        claims = (VERSION_CLAIM,) + CLAIMS
+        if all(claim in validated_token for claim in claims) and (
+            validated_token[VERSION_CLAIM] == version
+        ):
+            return token_user(user_id, validated_token)
+        return self.load_user(user_id, version)
+
+    def load_user(self, user_id, version):
+        user = users.get((user_id, version))
+        if user is None:
+            user = super().get_user(
+                {api_settings.USER_ID_CLAIM: user_id}
+            )
+            users.set((user_id, version), user)
+        return copy.copy(user)
@@ -0,0 +1,208 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag, urlencode
+from rest_framework.renderers import JSONRenderer
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+# Тег, который входит в каждый ответ: его изменение сбрасывает весь кеш.
+GLOBAL_TAG = 'all'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_process_local():
+    """Хранит ли бэкенд кеша API данные отдельно в каждом процессе."""
+    return (
+        settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+        in PROCESS_LOCAL_BACKENDS
+    )
+
+
+def tag_key(tag):
+    return f'api-tag:{tag}'
+
+
+def changed_key(tag):
+    return f'api-tag-changed:{tag}'
+
+
+def recently_changed(tags):
+    """Менялись ли данные тегов за последние DATABASE_REPLICA_PIN_SECONDS,
+    то есть могут ли реплики ещё не содержать этих изменений."""
+    return bool(get_cache().get_many(
+        [changed_key(tag) for tag in (*tags, GLOBAL_TAG)]
+    ))
+
+
+def tag_versions(tags):
+    """Текущие версии тегов; отсутствующий тег получает новую версию.
+
+    Ключ ответа включает версии всех его тегов, поэтому изменение версии
+    делает недоступными все закешированные ответы с этим тегом.
+    """
+    cache = get_cache()
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    """Меняет версии тегов после фиксации текущей транзакции, чтобы
+    в кеш не попали данные, которые ещё не видны другим запросам.
+
+    С репликами теги ещё и помечаются изменёнными на время, за которое
+    реплики догоняют основную базу (см. ReplicaReadMixin).
+    """
+    def bump():
+        cache = get_cache()
+        for tag in tags:
+            try:
+                cache.incr(tag_key(tag))
+            except ValueError:
+                pass
+        if settings.DATABASE_REPLICAS:
+            cache.set_many(
+                {changed_key(tag): True for tag in tags},
+                settings.DATABASE_REPLICA_PIN_SECONDS
+            )
+
+    transaction.on_commit(bump)
+
+
+def invalidate_all():
+    """Сбрасывает все закешированные ответы и ETag после фиксации
+    транзакции: для изменений в обход сигналов моделей (загрузка данных,
+    пересчёт рейтингов и поискового индекса)."""
+    invalidate(GLOBAL_TAG)
+
+
+def response_digest(request, tags):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = '|'.join(
+        [request.path, query, request.accepted_media_type]
+        + [str(version) for version in tag_versions((*tags, GLOBAL_TAG))]
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class VersionedResponseMixin:
+    """Условные GET-запросы и кеширование отрисованных ответов.
+
+    Ответ зависит от данных, перечисленных тегами из get_cache_tags;
+    версии тегов меняют сигналы из api.signals. Из пути, параметров
+    запроса, выбранного по Accept медиатипа (с его параметрами, например
+    pagination=cursor) и версий тегов строятся ETag и ключ кеша, поэтому ни
+    совпадение ETag, ни кеш не требуют запросов к базе данных.
+
+    Кешируются только ответы JSON: страница browsable API зависит
+    от пользователя (имя, формы, CSRF-токен) и не входит в ключ.
+    С выключенным кешем ETag считается по содержимому ответа: ответ 304
+    экономит передачу, но не запросы к базе данных.
+    """
+    cache_tags = ()
+    cache_responses = True
+    use_etags = True
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def versioned(self, handler, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return handler(request, *args, **kwargs)
+        if not settings.API_CACHE_ENABLED:
+            response = handler(request, *args, **kwargs)
+            response.content_etag = (
+                self.use_etags and response.status_code == 200
+            )
+            return response
+        digest = response_digest(request, self.get_cache_tags())
+        etag = quote_etag(digest)
+        etags = request_etags(request) if self.use_etags else []
+        if etag in etags:
+            return not_modified(etag)
+        cached = None
+        if self.cache_responses:
+            cached = get_cache().get(f'api-response:{digest}')
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200 and self.cache_responses:
+                response.cache_key = f'api-response:{digest}'
+        if response.status_code == 200 and self.use_etags:
+            if '*' in etags:
+                return not_modified(etag)
+            response['ETag'] = etag
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(response, 'cache_key', None)
+        if key is not None:
+            response.render()
+            get_cache().set(
+                key,
+                (response.content, response['Content-Type']),
+                settings.API_CACHE_TIMEOUT
+            )
+            response['X-Cache'] = 'MISS'
+        if getattr(response, 'content_etag', False):
+            return self.check_content_etag(request, response)
+        return response
+
+    def check_content_etag(self, request, response):
+        """ETag по содержимому отрисованного ответа, когда кеш выключен:
+        без общего хранилища версии тегов в процессах расходятся."""
+        response.render()
+        etag = quote_etag(hashlib.sha1(response.content).hexdigest())
+        etags = request_etags(request)
+        if etag in etags or '*' in etags:
+            return not_modified(etag)
+        response['ETag'] = etag
+        return response
+
+
+def request_etags(request):
+    """ETag из If-None-Match без признака слабого ETag.
+
+    `*` совпадает с любым ETag, но только у существующего ресурса,
+    поэтому проверяется после получения ответа.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return []
+    return [
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(if_none_match)
+    ]
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+class VersionedListMixin(VersionedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.versioned(super().list, request, *args, **kwargs)
+
+
+class VersionedRetrieveMixin(VersionedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned(super().retrieve, request, *args, **kwargs)
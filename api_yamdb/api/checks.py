@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .cache import is_process_local
+
+
+@register()
+def api_cache_check(app_configs, **kwargs):
+    """Кеш ответов с отдельным для каждого процесса бэкендом отдаёт
+    устаревшие ответы, если процессов больше одного."""
+    if not settings.API_CACHE_ENABLED or not is_process_local():
+        return []
+    return [Warning(
+        'Кеш ответов API включён с бэкендом, который хранит данные в '
+        'памяти процесса.',
+        hint=(
+            'С несколькими процессами gunicorn изменения видит только '
+            'процесс, который их записал. Задайте общий бэкенд '
+            'API_CACHE_BACKEND (например, Redis) или API_CACHE_ENABLED=0.'
+        ),
+        id='api.W001',
+    )]
+
+
+@register()
+def replica_pin_check(app_configs, **kwargs):
+    """Отметки о недавних изменениях направляют чтение в основную базу
+    только в том процессе, который их записал, если кеш не общий."""
+    if not settings.DATABASE_REPLICAS or not is_process_local():
+        return []
+    return [Warning(
+        'Реплики базы данных заданы, а отметки о недавних изменениях '
+        'хранятся в памяти процесса.',
+        hint=(
+            'Запрос к другому процессу gunicorn после изменения прочитает '
+            'отстающую реплику и не увидит его. Задайте общий бэкенд '
+            'API_CACHE_BACKEND (например, Redis).'
+        ),
+        id='api.W002',
+    )]
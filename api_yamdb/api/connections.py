@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+def close_if_unusable(connection):
+    """Закрывает постоянное соединение, которое перестало работать.
+
+    С CONN_MAX_AGE соединение переживает запрос, и база данных или
+    пул соединений могут закрыть его между запросами. Закрытое здесь
+    соединение откроется заново, а не вызовет ошибку в середине запроса.
+    Соединение внутри транзакции не трогается.
+    """
+    connection.health_check_pending = False
+    if connection.connection is None or connection.in_atomic_block:
+        return
+    if not connection.is_usable():
+        connection.close()
+
+
+def checked_cursor(connection):
+    """Подменяет получение курсора соединения: перед первым курсором
+    после начала запроса соединение проверяется."""
+    create_cursor = connection._cursor
+
+    def _cursor(name=None):
+        if connection.health_check_pending and settings.DB_CONN_HEALTH_CHECKS:
+            close_if_unusable(connection)
+        return create_cursor(name)
+
+    connection._cursor = _cursor
+    connection.health_check_pending = False
+
+
+def check_connections():
+    """Откладывает проверку соединений до их первого использования
+    в запросе, как CONN_HEALTH_CHECKS в Django 4.1.
+
+    Проверка на PostgreSQL - это SELECT 1, поэтому запросы, которые
+    не обращаются к базе данных (например, ответы из кеша), и
+    неиспользованные в запросе соединения с репликами не проверяются;
+    использованное соединение проверяется один раз за запрос.
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if not hasattr(connection, 'health_check_pending'):
+            checked_cursor(connection)
+        connection.health_check_pending = connection.connection is not None
+
+
+@receiver(request_started)
+def check_connections_on_request(sender, **kwargs):
+    check_connections()
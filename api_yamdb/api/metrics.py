@@ -0,0 +1,366 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Показатели одного запроса; время в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = '-'
+        self.action = '-'
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.serializing = False
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - started
+        metrics.sql_count += 1
+
+
+def capture_queries():
+    """Подключает record_query к соединениям текущего потока.
+
+    Соединения принадлежат потоку, а запрос под ASGI выполняется в разных
+    потоках, поэтому обёртка остаётся подключённой и находит замеры
+    текущего запроса через contextvars.
+    """
+    if not settings.PERF_METRICS_ENABLED:
+        return
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if record_query not in wrappers:
+            wrappers.append(record_query)
+
+
+@contextmanager
+def serializing():
+    """Учитывает время блока как время сериализации текущего запроса.
+    Вложенные блоки не учитываются повторно."""
+    metrics = current.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        metrics.serializing = False
+
+
+def timed_data(prop):
+    """Свойство `data` сериализатора, которое учитывает время
+    сериализации."""
+    @functools.wraps(prop.fget)
+    def data(self):
+        with serializing():
+            return prop.fget(self)
+
+    return property(data)
+
+
+def instrument_serializers():
+    for serializer in (serializers.Serializer, serializers.ListSerializer):
+        if not hasattr(serializer.data.fget, '__wrapped__'):
+            serializer.data = timed_data(serializer.data)
+
+
+class Series:
+    """Накопленные показатели одного представления и действия."""
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = {}
+        self.buckets = [0] * len(BUCKETS)
+        self.sums = dict.fromkeys(
+            ('total', 'sql', 'sql_count', 'serializer', 'render', 'bytes',
+             'over_budget'), 0
+        )
+
+    def add(self, metrics, total, status, size, over_budget):
+        self.requests += 1
+        family = f'{status // 100}xx'
+        self.statuses[family] = self.statuses.get(family, 0) + 1
+        for index, bound in enumerate(BUCKETS):
+            if total <= bound:
+                self.buckets[index] += 1
+        self.sums['total'] += total
+        self.sums['sql'] += metrics.sql_time
+        self.sums['sql_count'] += metrics.sql_count
+        self.sums['serializer'] += metrics.serializer_time
+        self.sums['render'] += metrics.render_time
+        self.sums['bytes'] += size
+        self.sums['over_budget'] += over_budget
+
+
+def label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+def labels(**values):
+    return '{' + ','.join(
+        f'{name}="{label_value(value)}"' for name, value in values.items()
+    ) + '}'
+
+
+SUMS = (
+    ('db_queries_total', 'sql_count', 'Запросы к базе данных.'),
+    ('db_duration_seconds_total', 'sql', 'Время запросов к базе данных.'),
+    ('serializer_duration_seconds_total', 'serializer',
+     'Время сериализации.'),
+    ('render_duration_seconds_total', 'render', 'Время отрисовки ответа.'),
+    ('response_bytes_total', 'bytes', 'Размер ответов.'),
+    ('over_budget_total', 'over_budget',
+     'Запросы сверх бюджета запросов к базе данных или времени.'),
+)
+
+
+class Registry:
+    """Показатели запросов, накопленные процессом.
+
+    У каждого процесса gunicorn свой реестр; Prometheus суммирует
+    показатели процессов, если собирает их с каждого из них.
+    """
+
+    def __init__(self, prefix='yamdb'):
+        self.prefix = prefix
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def add(self, metrics, total, status, size, over_budget):
+        key = (metrics.view, metrics.action)
+        with self._lock:
+            series = self._series.setdefault(key, Series())
+            series.add(metrics, total, status, size, over_budget)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def header(self, name, kind, description):
+        name = f'{self.prefix}_{name}'
+        return [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+
+    def requests(self, series):
+        lines = self.header('requests_total', 'counter', 'Число запросов.')
+        for (view, action), each in series:
+            for status, count in sorted(each.statuses.items()):
+                lines.append(
+                    f'{self.prefix}_requests_total'
+                    f'{labels(view=view, action=action, status=status)} '
+                    f'{count}'
+                )
+        return lines
+
+    def durations(self, series):
+        name = f'{self.prefix}_request_duration_seconds'
+        lines = self.header(
+            'request_duration_seconds', 'histogram', 'Время ответа.'
+        )
+        for (view, action), each in series:
+            for bound, count in zip(BUCKETS, each.buckets):
+                lines.append(
+                    f'{name}_bucket'
+                    f'{labels(view=view, action=action, le=bound)} {count}'
+                )
+            lines += [
+                f'{name}_bucket'
+                f'{labels(view=view, action=action, le="+Inf")} '
+                f'{each.requests}',
+                f'{name}_sum{labels(view=view, action=action)} '
+                f'{each.sums["total"]}',
+                f'{name}_count{labels(view=view, action=action)} '
+                f'{each.requests}',
+            ]
+        return lines
+
+    def totals(self, series):
+        lines = []
+        for name, key, description in SUMS:
+            lines += self.header(name, 'counter', description)
+            lines += [
+                f'{self.prefix}_{name}{labels(view=view, action=action)} '
+                f'{each.sums[key]}'
+                for (view, action), each in series
+            ]
+        return lines
+
+    def render(self):
+        """Показатели в текстовом формате Prometheus."""
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            text = '\n'.join(
+                self.requests(series) + self.durations(series)
+                + self.totals(series)
+            )
+        return text + '\n'
+
+
+registry = Registry()
+
+
+def view_labels(view_func, method):
+    """Имя представления и действие: для ViewSet - действие роутера,
+    для остальных представлений - HTTP-метод."""
+    cls = getattr(view_func, 'cls', None)
+    view = cls.__name__ if cls is not None else view_func.__name__
+    actions = getattr(view_func, 'actions', None) or {}
+    return view, actions.get(method.lower(), method.lower())
+
+
+def server_timing(metrics, total):
+    parts = [
+        f'db;dur={metrics.sql_time * 1000:.1f};'
+        f'desc="{metrics.sql_count} queries"',
+        f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+        f'render;dur={metrics.render_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    return ', '.join(parts)
+
+
+def response_size(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+def over_budget(metrics, total):
+    queries = settings.PERF_QUERY_BUDGET
+    latency = settings.PERF_LATENCY_BUDGET_MS
+    return (
+        queries is not None and metrics.sql_count > queries
+        or latency is not None and total * 1000 > latency
+    )
+
+
+class PerformanceMiddleware:
+    """Замеры времени и запросов к базе данных для каждого запроса.
+
+    Включается настройкой PERF_METRICS_ENABLED. Для каждого запроса
+    считает запросы к базе данных и их время, время сериализации и
+    отрисовки, общее время и размер ответа, добавляет их в заголовок
+    Server-Timing и в реестр для metrics_view. Запросы сверх бюджетов
+    PERF_QUERY_BUDGET и PERF_LATENCY_BUDGET_MS пишутся в лог.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        instrument_serializers()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            capture_queries()
+            response = self.get_response(request)
+            self.finish(request, response, metrics)
+        finally:
+            current.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+            self.finish(request, response, metrics)
+        finally:
+            current.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        capture_queries()
+        metrics = current.get()
+        metrics.view, metrics.action = view_labels(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        metrics = current.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics):
+        total = metrics.total_time
+        exceeded = over_budget(metrics, total)
+        registry.add(
+            metrics, total, response.status_code, response_size(response),
+            exceeded
+        )
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics, total)
+        if exceeded:
+            logger.warning(
+                'Запрос %s %s (%s.%s) превысил бюджет: %d запросов к базе '
+                'данных за %.1f мс, всего %.1f мс',
+                request.method, request.get_full_path(), metrics.view,
+                metrics.action, metrics.sql_count, metrics.sql_time * 1000,
+                total * 1000
+            )
+
+
+def metrics_view(request):
+    """Показатели процесса для Prometheus.
+
+    Отдаются только с заголовком `Authorization: Bearer` и токеном
+    PERF_METRICS_TOKEN: задержки и нагрузка по представлениям не
+    публичны. Без токена в настройках показатели не отдаются никому.
+    """
+    if not settings.PERF_METRICS_ENABLED:
+        raise Http404
+    token = settings.PERF_METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
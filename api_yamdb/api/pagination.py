@@ -0,0 +1,173 @@
+import base64
+import datetime
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Сохраняет микросекунды: DjangoJSONEncoder обрезает их до
+    миллисекунд, и курсор пропускал бы записи внутри миллисекунды."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по курсору (keyset).
+
+    Курсор хранит значения полей сортировки `keyset_ordering` представления
+    для последней записи страницы; следующая страница выбирается условием
+    «после этих значений», поэтому время выборки не зависит от номера
+    страницы и не нужен COUNT(*). Последнее поле сортировки должно быть
+    уникальным, чтобы порядок был однозначным.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = view.keyset_ordering
+        self.reverse, position = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(after(ordering, position))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        position = [
+            field_value(obj, field.lstrip('-')) for field in self.ordering
+        ]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(position, reverse)
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(cursor['p']) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, cursor['p'])
+            ]
+            return bool(cursor['r']), position
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def field_value(row, name):
+    """Значение поля объекта модели или строки values()."""
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def encode_cursor(position, reverse=False):
+    """Курсор для значений полей сортировки `position`."""
+    cursor = json.dumps({'p': position, 'r': reverse}, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def after(ordering, position):
+    """Условие «строка идёт после position» для сортировки ordering.
+
+    Лексикографическое сравнение раскрывается в OR из AND; нестрогое
+    условие на первое поле позволяет базе начать просмотр индекса
+    прямо с позиции курсора.
+    """
+    lookups = [
+        (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt')
+        for field in ordering
+    ]
+    branches = []
+    for index, (name, lookup) in enumerate(lookups):
+        equal = {lookups[i][0]: position[i] for i in range(index)}
+        branches.append(Q(**equal, **{f'{name}__{lookup}': position[index]}))
+    first, lookup = lookups[0]
+    return Q(**{f'{first}__{lookup}e': position[0]}) & reduce(
+        lambda left, right: left | right, branches
+    )
+
+
+class PageNumberOrKeysetPagination(BasePagination):
+    """PageNumberPagination по умолчанию и KeysetPagination по запросу.
+
+    Курсорный режим включается параметром `cursor` (или `pagination=cursor`
+    для первой страницы) либо параметром медиатипа в заголовке Accept:
+    `application/json; pagination=cursor`. Существующие клиенты получают
+    прежний формат ответа.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.paginator = self.page_number
+
+    def use_keyset(self, request):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return True
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            return True
+        params = (request.accepted_media_type or '').split(';')[1:]
+        return 'pagination=cursor' in (param.strip() for param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if view is not None and self.use_keyset(request):
+            self.paginator = KeysetPagination(self.page_number.page_size)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
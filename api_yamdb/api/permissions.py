@@ -21,7 +21,7 @@ class IsAuthorStaffOrReadOnly(permissions.BasePermission):
             return True
         return (request.method in ('PATCH', 'DELETE')
                 and request.user.is_authenticated
-                and (request.user == obj.author
+                and (request.user.id == obj.author_id
                 or request.user.is_admin
                 or request.user.is_moderator
                 or request.user.is_superuser))
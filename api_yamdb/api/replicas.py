@@ -0,0 +1,99 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import get_cache, recently_changed
+
+read_database = ContextVar('read_database', default=None)
+
+
+def pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_primary(user):
+    """Направляет чтение пользователя в основную базу на время
+    DATABASE_REPLICA_PIN_SECONDS, пока реплики догоняют его изменения."""
+    get_cache().set(
+        pin_key(user.pk), True, settings.DATABASE_REPLICA_PIN_SECONDS
+    )
+
+
+def pinned(user):
+    return user.is_authenticated and bool(get_cache().get(pin_key(user.pk)))
+
+
+class ReplicaRouter:
+    """Чтение в реплику, выбранную для запроса ReplicaReadMixin, запись
+    и всё остальное - в основную базу данных.
+
+    Внутри транзакции основной базы чтение остаётся в ней, чтобы видеть
+    изменения этой транзакции.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_database.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """Чтение безопасных запросов из реплики.
+
+    После аутентификации и проверки прав запросы GET, HEAD и OPTIONS
+    читают из случайной реплики, одной на весь запрос. Пользователь,
+    который только что изменил данные, читает из основной базы, чтобы
+    видеть свои изменения. Кешируемые ответы, данные которых недавно
+    менялись, тоже читаются из основной базы: ответ отстающей реплики
+    попал бы в кеш и получил ETag под новыми версиями тегов.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and not pinned(request.user)
+            and not self.cached_data_changed()
+        ):
+            read_database.set(random.choice(settings.DATABASE_REPLICAS))
+
+    def cached_data_changed(self):
+        if not settings.API_CACHE_ENABLED or not hasattr(
+            self, 'get_cache_tags'
+        ):
+            return False
+        return recently_changed(self.get_cache_tags())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_primary(request.user)
+        return response
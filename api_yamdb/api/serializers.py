@@ -1,8 +1,18 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
-from reviews.models import (Category, Comment, Genre, Review, Title, User,
-                            UserRole)
+from reviews.bulk import (create_genres, create_reviews, create_titles,
+                          update_titles)
+from reviews.models import (Category, Comment, Genre, Review, SearchEntry,
+                            Title, User, UserRole)
+
+from .cache import invalidate
+from .sparse import SparseFieldsMixin
 
 
 class RegistrationSerializer(serializers.Serializer):
@@ -39,7 +49,7 @@ class MyTokenObtainSerializer(serializers.Serializer):
         fields = ('username', 'confirmation_code')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     username = serializers.SlugField(
         required=True,
         validators=[UniqueValidator(queryset=User.objects.all())]
@@ -91,14 +101,23 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     rating = serializers.FloatField()
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
+    collapsed_fields = {
+        'category': partial(
+            serializers.SlugRelatedField, slug_field='slug', read_only=True
+        ),
+        'genre': partial(
+            serializers.SlugRelatedField, slug_field='slug', read_only=True,
+            many=True
+        ),
+    }
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count')
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
@@ -114,10 +133,10 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating', 'rating_sum', 'rating_count')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         queryset=User.objects.all(),
         slug_field='username',
@@ -141,7 +160,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         return get_object_or_404(Title, pk=title_id)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         queryset=User.objects.all(),
         slug_field='username',
@@ -151,3 +170,228 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         exclude = ('review',)
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+    title = serializers.IntegerField(source='title_id')
+    review = serializers.IntegerField(source='review_id', allow_null=True)
+    text = serializers.SerializerMethodField()
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchEntry
+        fields = ('type', 'id', 'title', 'review', 'text', 'rank')
+
+    def get_text(self, obj):
+        return obj.head or obj.body
+
+
+def bulk_keys(items, name):
+    """Значения поля `name` всех элементов массового запроса строками."""
+    keys = set()
+    for item in items:
+        value = item.get(name) if isinstance(item, dict) else None
+        for key in value if isinstance(value, list) else [value]:
+            if isinstance(key, (str, int)) and not isinstance(key, bool):
+                keys.add(str(key))
+    return keys
+
+
+def load_by(queryset, field, keys):
+    """Объекты со значениями `field` из `keys`: {значение строкой: объект}."""
+    return {
+        str(getattr(obj, field)): obj
+        for obj in queryset.filter(**{f'{field}__in': keys})
+    }
+
+
+def load_titles(keys):
+    return load_by(
+        Title.objects.all(), 'id', {key for key in keys if key.isdigit()}
+    )
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который берёт объекты, загруженные
+    BulkListSerializer, вместо запроса на каждое значение."""
+
+    def to_internal_value(self, data):
+        loaded = self.context.get('related', {}).get(self.queryset.model)
+        if loaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail('invalid')
+        try:
+            return loaded[str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Элементы массового запроса.
+
+    Перед проверкой элементов дочерний сериализатор загружает нужные им
+    объекты (load_related) запросом на модель, а не на элемент. Ошибки
+    возвращаются списком, по словарю на элемент. Запись выполняют
+    bulk_create и bulk_update дочернего сериализатора.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > settings.API_BULK_MAX_ITEMS:
+                raise serializers.ValidationError(
+                    f'Не больше {settings.API_BULK_MAX_ITEMS} элементов '
+                    'в запросе.'
+                )
+            self.context.update(self.child.load_related(data))
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        if self.partial:
+            return self.child.bulk_update(validated_data)
+        return self.child.bulk_create(validated_data)
+
+
+def refetch_titles(titles):
+    """Произведения с категориями и жанрами в прежнем порядке."""
+    found = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).in_bulk([title.pk for title in titles])
+    return [found[title.pk] for title in titles]
+
+
+class TitleBulkSerializer(TitleWriteSerializer):
+    """Произведение массового запроса; при изменении (PATCH) элемент
+    содержит `id` и изменяемые поля."""
+    id = serializers.IntegerField(required=False)
+    category = BulkSlugRelatedField(
+        slug_field='slug',
+        queryset=Category.objects.all()
+    )
+    genre = BulkSlugRelatedField(
+        slug_field='slug',
+        queryset=Genre.objects.all(),
+        many=True
+    )
+
+    class Meta(TitleWriteSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+    def load_related(self, items):
+        context = {'related': {
+            Category: load_by(
+                Category.objects.all(), 'slug', bulk_keys(items, 'category')
+            ),
+            Genre: load_by(
+                Genre.objects.all(), 'slug', bulk_keys(items, 'genre')
+            ),
+        }}
+        if self.partial:
+            context['titles'] = load_titles(bulk_keys(items, 'id'))
+        return context
+
+    def validate_id(self, value):
+        if not self.partial:
+            return value
+        title = self.context['titles'].get(str(value))
+        if title is None:
+            raise serializers.ValidationError('Произведение не найдено.')
+        return title
+
+    def validate(self, attrs):
+        if not self.partial:
+            attrs.pop('id', None)
+        elif 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'Обязательное поле.'})
+        return attrs
+
+    def bulk_create(self, items):
+        titles = create_titles(items)
+        invalidate('titles')
+        return refetch_titles(titles)
+
+    def bulk_update(self, items):
+        titles = update_titles([(item.pop('id'), item) for item in items])
+        invalidate('titles', *(f'title:{title.pk}' for title in titles))
+        return refetch_titles(titles)
+
+
+class GenreBulkSerializer(GenreSerializer):
+
+    class Meta(GenreSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+        extra_kwargs = {'slug': {'validators': []}}
+
+    def load_related(self, items):
+        return {'taken': set(
+            Genre.objects.filter(
+                slug__in=bulk_keys(items, 'slug')
+            ).values_list('slug', flat=True)
+        )}
+
+    def validate_slug(self, value):
+        taken = self.context['taken']
+        if value in taken:
+            raise serializers.ValidationError(
+                'Жанр с таким slug уже существует.'
+            )
+        taken.add(value)
+        return value
+
+    @transaction.atomic
+    def bulk_create(self, items):
+        invalidate('genres')
+        return create_genres(items)
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    """Отзыв массового запроса: произведение по id, автор по username."""
+    title = BulkSlugRelatedField(
+        slug_field='id',
+        queryset=Title.objects.all()
+    )
+    author = BulkSlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.all()
+    )
+
+    class Meta:
+        model = Review
+        fields = ('id', 'title', 'author', 'text', 'score', 'pub_date')
+        list_serializer_class = BulkListSerializer
+
+    def load_related(self, items):
+        titles = load_titles(bulk_keys(items, 'title'))
+        authors = load_by(
+            User.objects.all(), 'username', bulk_keys(items, 'author')
+        )
+        reviewed = Review.objects.filter(
+            title__in=list(titles.values()), author__in=list(authors.values())
+        ).values_list('title_id', 'author_id')
+        return {
+            'related': {Title: titles, User: authors},
+            'reviewed': set(reviewed),
+        }
+
+    def validate(self, attrs):
+        key = (attrs['title'].pk, attrs['author'].pk)
+        if key in self.context['reviewed']:
+            raise serializers.ValidationError(
+                'Автор уже оставил отзыв на это произведение.'
+            )
+        self.context['reviewed'].add(key)
+        return attrs
+
+    def bulk_create(self, items):
+        reviews = create_reviews([Review(**item) for item in items])
+        title_ids = {review.title_id for review in reviews}
+        invalidate('titles', *(
+            tag for title_id in title_ids
+            for tag in (f'title:{title_id}', f'reviews:{title_id}')
+        ))
+        return reviews
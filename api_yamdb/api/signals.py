@@ -0,0 +1,74 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import data_reloaded
+
+from .authentication import forget_version, store_version
+from .cache import invalidate, invalidate_all
+
+
+@receiver(data_reloaded)
+def data_changed(sender, **kwargs):
+    invalidate_all()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate('categories')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    invalidate('genres')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate('titles', f'title:{instance.pk}', f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate('titles', f'title:{instance.pk}')
+    elif pk_set:
+        invalidate('titles', *(f'title:{pk}' for pk in pk_set))
+    else:
+        invalidate('titles', 'genres')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    invalidate(
+        'titles',
+        f'title:{instance.title_id}',
+        f'reviews:{instance.title_id}',
+        f'comments:{instance.pk}'
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if not created:
+        invalidate('users')
+    if update_fields is None or 'token_version' in update_fields:
+        store_version(instance.pk, instance.token_version)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate('users')
+    forget_version(instance.pk)
@@ -0,0 +1,114 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+class Fieldset:
+    """Поля ответа из параметров запроса `fields` и `expand`.
+
+    `fields=id,name` оставляет в ответе только перечисленные поля.
+    Если передан `expand`, связанные объекты выводятся целиком только
+    для перечисленных в нём полей, остальные - slug'ами. Без параметров
+    ответ не меняется. Параметры действуют только на чтение.
+    """
+
+    def __init__(self, request):
+        self.fields = self.parse(request, 'fields')
+        self.expand = self.parse(request, 'expand')
+
+    @staticmethod
+    def parse(request, param):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        value = request.query_params.get(param)
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    def keeps(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+    def prune(self, data):
+        if self.fields is None:
+            return data
+        return {
+            name: value for name, value in data.items() if name in self.fields
+        }
+
+
+class SparseFieldsMixin:
+    """Сериализатор с полями по Fieldset запроса из контекста.
+
+    `collapsed_fields` - фабрики полей, которые заменяют вложенные
+    сериализаторы, если связь не указана в `expand`.
+    """
+    collapsed_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = Fieldset(self.context.get('request'))
+        for name, collapsed in self.collapsed_fields.items():
+            if name in fields and not fieldset.expands(name):
+                fields[name] = collapsed()
+        for name in list(fields):
+            if not fieldset.keeps(name):
+                del fields[name]
+        return fields
+
+
+def prune_queryset(queryset, names):
+    """Оставляет в queryset столбцы и связи модели для полей `names`.
+
+    Остальные столбцы откладываются через only(), ненужные связи
+    убираются из select_related() и prefetch_related(). Внешние ключи
+    querysets связанных менеджеров (title.reviews) остаются: по ним
+    строкам присваивается известный объект.
+    """
+    opts = queryset.model._meta
+    columns = {opts.pk.name}
+    columns.update(field.name for field in queryset._known_related_objects)
+    relations = set()
+    for name in names:
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.is_relation:
+            relations.add(name)
+        if field.concrete and not field.many_to_many:
+            columns.add(name)
+    selected = queryset.query.select_related
+    prefetched = queryset._prefetch_related_lookups
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if isinstance(selected, dict):
+        related = [name for name in selected if name in relations]
+        if related:
+            queryset = queryset.select_related(*related)
+    return queryset.prefetch_related(
+        *(
+            lookup for lookup in prefetched
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0]
+            in relations
+        )
+    ).only(*columns)
+
+
+class SparseQuerysetMixin:
+    """Выборка только тех столбцов, которые нужны полям из `fields`.
+
+    Поля сортировки keyset_ordering выбираются всегда: по ним строится
+    курсор.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = Fieldset(self.request)
+        if fieldset.fields is None:
+            return queryset
+        ordering = [
+            field.lstrip('-')
+            for field in getattr(self, 'keyset_ordering', ())
+        ]
+        return prune_queryset(queryset, fieldset.fields | set(ordering))
@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    RegistrationAPIView, ReviewViewSet, TitleViewSet,
-                    TokenObtain, UserViewSet)
+from .views import (CategoryViewSet, CommentViewSet, ExportView, GenreViewSet,
+                    RegistrationAPIView, ReviewBulkView, ReviewViewSet,
+                    SearchView, TitleViewSet, TokenObtain, UserViewSet)
 
 router_v1 = routers.DefaultRouter()
 router_v1.register('categories', CategoryViewSet)
@@ -25,4 +25,8 @@ urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', RegistrationAPIView.as_view(), name='signup'),
     path('v1/auth/token/', TokenObtain.as_view(), name='token_obtain'),
+    path('v1/search/', SearchView.as_view(), name='search'),
+    path('v1/reviews/bulk/', ReviewBulkView.as_view(), name='review_bulk'),
+    path('v1/export/<slug:table>.<slug:fmt>', ExportView.as_view(),
+         name='export'),
 ]
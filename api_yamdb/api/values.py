@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework.response import Response
+
+from .metrics import serializing
+
+
+class ValuesListMixin:
+    """Список без сериализатора.
+
+    Строки выбираются через values(list_values) и приводятся к формату
+    ответа сериализатора методом shape_rows. На страницах списков
+    создание сериализатора для каждой строки (и вложенных для связанных
+    объектов) занимает больше времени, чем запросы к базе данных.
+    Отключается настройкой API_VALUES_LISTS.
+    """
+    list_values = ()
+
+    def get_list_values(self):
+        return self.list_values
+
+    def shape_rows(self, rows):
+        return rows
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_VALUES_LISTS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        ).values(*self.get_list_values())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        with serializing():
+            data = self.shape_rows(rows)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
@@ -1,26 +1,41 @@
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.db.utils import IntegrityError
+from django.http import FileResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import (filters, mixins, permissions, status, views,
-                            viewsets)
+from rest_framework import (filters, generics, mixins, permissions, status,
+                            views, viewsets)
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from reviews.models import Category, Genre, Review, Title, User, UserRole
+from reviews.outbox import enqueue
+from reviews.parsers.exporters import FORMATS, TABLES_BY_NAME, export_queryset
+from reviews.ratings import record_scores, score_histogram, top_titles
+from reviews.search import search
 
-from api_yamdb.settings import DEFAULT_FROM_EMAIL
-
+from .async_views import AsyncReadMixin
+from .authentication import access_token_for
+from .cache import VersionedListMixin, VersionedRetrieveMixin
 from .filters import TitleFilter
+from .pagination import PageNumberOrKeysetPagination
 from .permissions import (IsAdminOrReadOnly, IsAdminPermission,
                           IsAuthorStaffOrReadOnly)
+from .replicas import ReplicaReadMixin
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, MyTokenObtainSerializer,
-                          RegistrationSerializer, ReviewSerializer,
+                          GenreBulkSerializer, GenreSerializer,
+                          MyTokenObtainSerializer, RegistrationSerializer,
+                          ReviewBulkSerializer, ReviewSerializer,
+                          SearchResultSerializer, TitleBulkSerializer,
                           TitleReadSerializer, TitleWriteSerializer,
                           UserSerializer)
+from .sparse import Fieldset, SparseQuerysetMixin
+from .values import ValuesListMixin
 
 
 class CreateListDestroyViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
@@ -33,6 +48,29 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
     search_fields = ['name']
 
 
+class BulkWriteMixin:
+    """Массовое создание (POST) и изменение (PATCH) списком объектов.
+
+    Все элементы проверяются до записи. Если в каких-то из них есть
+    ошибки, ответ 400 содержит список ошибок по элементам (пустой словарь
+    для верных) и ничего не записывается.
+    """
+    bulk_serializer_class = None
+
+    def bulk_write(self, request):
+        serializer = self.bulk_serializer_class(
+            data=request.data,
+            many=True,
+            partial=request.method == 'PATCH',
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        if serializer.partial:
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class TokenObtain(views.APIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = MyTokenObtainSerializer
@@ -46,10 +84,9 @@ class TokenObtain(views.APIView):
         if default_token_generator.check_token(
                 user, confirmation_code) is False:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        refresh = RefreshToken.for_user(user)
         response = Response(status=status.HTTP_200_OK)
         response.data = {
-            'token': str(refresh.access_token)
+            'token': access_token_for(user)
         }
         return response
 
@@ -59,54 +96,52 @@ class RegistrationAPIView(views.APIView):
     serializer_class = RegistrationSerializer
 
     def post(self, request):
-        username = request.data.get('username')
-        if User.objects.filter(username=username).exists():
-            user = get_object_or_404(User, username=username)
-            conf_code = user.confirmation_code
-            email = user.email
-            send_mail(
+        """Регистрирует пользователя и ставит в очередь письмо с кодом.
+
+        Новый пользователь записывается одним INSERT и одним UPDATE с кодом
+        подтверждения в одной транзакции. Занятое имя определяется по
+        ошибке уникальности, а не предварительным запросом, поэтому
+        одновременные регистрации не создают дублей.
+        """
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            try:
+                return self.register(serializer)
+            except IntegrityError:
+                pass
+        user = User.objects.filter(
+            username=request.data.get('username')
+        ).only('email', 'confirmation_code').first()
+        if user is not None:
+            enqueue(
                 'Регистрация на YAMDB(повторно)',
-                f'Код для получения JWT-токена: {conf_code}',
-                f'{DEFAULT_FROM_EMAIL}',
-                [f'{email}']
+                f'Код для получения JWT-токена: {user.confirmation_code}',
+                user.email
             )
             response = Response(status=status.HTTP_400_BAD_REQUEST)
             response.data = {
                 'message': 'Письмо повторно направлено на почту'
             }
             return response
-        serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        email = request.data.get('email')
-        try:
-            User.objects.create(
-                username=username,
-                email=email
-            )
-        except IntegrityError:
-            response = Response(status=status.HTTP_400_BAD_REQUEST)
-            response.data = {'message': 'username и/или email уже заняты'}
-            return response
-        User.objects.get(
-            username=username,
-            email=email
-        ).delete()
-        serializer.save()
-        user = get_object_or_404(User, username=username)
-        conf_code = default_token_generator.make_token(user)
-        User.objects.filter(
-            username=username).update(confirmation_code=conf_code)
-        email = user.email
-        send_mail(
+        response = Response(status=status.HTTP_400_BAD_REQUEST)
+        response.data = {'message': 'username и/или email уже заняты'}
+        return response
+
+    @transaction.atomic
+    def register(self, serializer):
+        user = serializer.save()
+        user.confirmation_code = default_token_generator.make_token(user)
+        user.save(update_fields=('confirmation_code',))
+        enqueue(
             'Регистрация на YAMDB',
-            f'Код для получения JWT-токена: {conf_code}',
-            f'{DEFAULT_FROM_EMAIL}',
-            [f'{email}']
+            f'Код для получения JWT-токена: {user.confirmation_code}',
+            user.email
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdminPermission,)
@@ -122,7 +157,7 @@ class UserViewSet(viewsets.ModelViewSet):
         username = request.user.username
         user = get_object_or_404(User, username=username)
         if request.method != 'PATCH':
-            serializer = UserSerializer(user)
+            serializer = UserSerializer(user, context={'request': request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         data = request.data
         _mutable = data._mutable
@@ -139,43 +174,209 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(AsyncReadMixin, ReplicaReadMixin, VersionedListMixin,
+                      ValuesListMixin, CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    list_values = ('name', 'slug')
+    cache_tags = ('categories',)
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(AsyncReadMixin, ReplicaReadMixin, VersionedListMixin,
+                   ValuesListMixin, BulkWriteMixin, CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
+    list_values = ('name', 'slug')
+    cache_tags = ('genres',)
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='bulk',
+        permission_classes=(IsAdminPermission,)
+    )
+    def bulk(self, request):
+        return self.bulk_write(request)
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by('name')
+
+class TitleViewSet(AsyncReadMixin, ReplicaReadMixin, VersionedListMixin,
+                   VersionedRetrieveMixin, ValuesListMixin,
+                   SparseQuerysetMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('name', 'id')
     serializer_class = TitleReadSerializer
+    bulk_serializer_class = TitleBulkSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('name', 'id')
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    list_values = (
+        'id', 'rating', 'category__name', 'category__slug', 'name', 'year',
+        'description'
+    )
+    top_size = 10
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    def get_list_values(self):
+        fieldset = Fieldset(self.request)
+        return [
+            value for value in self.list_values
+            if value in self.keyset_ordering
+            or fieldset.keeps(value.split('__')[0])
+        ]
+
+    def shape_rows(self, rows):
+        """Строки values() в формате TitleReadSerializer с учётом fields
+        и expand; жанры выбираются одним запросом, как
+        prefetch_related('genre')."""
+        fieldset = Fieldset(self.request)
+        genres = {}
+        if rows and fieldset.keeps('genre'):
+            for title_id, name, slug in Title.genre.through.objects.filter(
+                title_id__in=[row['id'] for row in rows]
+            ).order_by('genre__name').values_list(
+                'title_id', 'genre__name', 'genre__slug'
+            ):
+                genres.setdefault(title_id, []).append(
+                    {'name': name, 'slug': slug}
+                    if fieldset.expands('genre') else slug
+                )
+        return [
+            fieldset.prune(self.shape_row(row, genres, fieldset))
+            for row in rows
+        ]
+
+    @staticmethod
+    def shape_row(row, genres, fieldset):
+        category = row.get('category__slug')
+        if category is not None and fieldset.expands('category'):
+            category = {'name': row['category__name'], 'slug': category}
+        return {
+            'id': row['id'],
+            'rating': row.get('rating'),
+            'category': category,
+            'genre': genres.get(row['id'], []),
+            'name': row['name'],
+            'year': row.get('year'),
+            'description': row.get('description'),
+        }
+
+    @action(
+        detail=False,
+        methods=['POST', 'PATCH'],
+        url_path='bulk',
+        permission_classes=(IsAdminPermission,)
+    )
+    def bulk(self, request):
+        return self.bulk_write(request)
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """Лучшие по рейтингу произведения: все, жанра (?genre=slug)
+        или категории (?category=slug); ?limit= - сколько."""
+        return self.versioned(self.top_list, request)
+
+    def top_list(self, request):
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        if genre is not None and category is not None:
+            raise ValidationError('Укажите либо жанр, либо категорию.')
+        titles = top_titles(
+            self.get_queryset(), self.top_limit(request),
+            genre=genre, category=category
+        )
+        return Response(TitleReadSerializer(
+            titles, many=True, context=self.get_serializer_context()
+        ).data)
+
+    def top_limit(self, request):
+        limit = request.query_params.get('limit', self.top_size)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 0 < limit <= settings.API_TOP_MAX_LIMIT:
+            raise ValidationError({'limit': (
+                f'Целое число от 1 до {settings.API_TOP_MAX_LIMIT}.'
+            )})
+        return limit
+
+    @action(detail=True)
+    def histogram(self, request, pk=None):
+        """Число оценок от 1 до 10 у произведения."""
+        return self.versioned(self.histogram_detail, request, pk=pk)
+
+    def histogram_detail(self, request, pk):
+        title = get_object_or_404(Title.objects.only('id'), pk=pk)
+        scores = score_histogram(title.pk)
+        return Response({'count': sum(scores.values()), 'scores': scores})
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_cache_tags(self):
+        if self.action == 'retrieve':
+            return (f'title:{self.kwargs["pk"]}', 'categories', 'genres')
+        if self.action == 'histogram':
+            return (f'title:{self.kwargs["pk"]}',)
+        return ('titles', 'categories', 'genres')
+
+
+class ReviewViewSet(AsyncReadMixin, ReplicaReadMixin, VersionedListMixin,
+                    VersionedRetrieveMixin, SparseQuerysetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorStaffOrReadOnly,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('-pub_date', '-id')
+    cache_responses = False
+
+    def get_cache_tags(self):
+        return (f'reviews:{self.kwargs["title_id"]}', 'users')
 
     def get_queryset(self):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return title.reviews.select_related('author').order_by(
+            *self.keyset_ordering
+        )
 
+    @transaction.atomic
+    def perform_create(self, serializer):
+        review = serializer.save()
+        record_scores(review.title_id, added=[review.score])
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = Review.objects.select_for_update().values_list(
+            'score', flat=True
+        ).get(pk=serializer.instance.pk)
+        review = serializer.save()
+        record_scores(
+            review.title_id, added=[review.score], removed=[old_score]
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        _, deleted = instance.delete()
+        if deleted.get(Review._meta.label):
+            record_scores(instance.title_id, removed=[instance.score])
+
+
+class CommentViewSet(ReplicaReadMixin, VersionedListMixin,
+                     VersionedRetrieveMixin, SparseQuerysetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorStaffOrReadOnly,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('-pub_date', '-id')
+    cache_responses = False
+
+    def get_cache_tags(self):
+        return (f'comments:{self.kwargs["review_id"]}', 'users')
 
     def get_queryset(self):
         review = get_object_or_404(
@@ -183,7 +384,9 @@ class CommentViewSet(viewsets.ModelViewSet):
             pk=self.kwargs.get('review_id'),
             title__id=self.kwargs.get('title_id')
         )
-        return review.comments.all()
+        return review.comments.select_related('author').order_by(
+            *self.keyset_ordering
+        )
 
     def perform_create(self, serializer):
         review = get_object_or_404(
@@ -192,3 +395,69 @@ class CommentViewSet(viewsets.ModelViewSet):
             title__id=self.kwargs.get('title_id')
         )
         serializer.save(review=review)
+
+
+class ReviewBulkView(BulkWriteMixin, generics.GenericAPIView):
+    """Массовое создание отзывов к разным произведениям."""
+    bulk_serializer_class = ReviewBulkSerializer
+    permission_classes = (IsAdminPermission,)
+
+    def post(self, request):
+        return self.bulk_write(request)
+
+
+def spool(chunks):
+    """Временный файл с содержимым chunks, открытый с начала."""
+    file = tempfile.TemporaryFile()
+    for chunk in chunks:
+        file.write(chunk)
+    file.seek(0)
+    return file
+
+
+class ExportView(ReplicaReadMixin, views.APIView):
+    """Выгрузка таблицы целиком в CSV (формат import_data) или NDJSON.
+
+    Строки читаются курсором на сервере и отдаются по мере чтения, память
+    не зависит от размера таблицы. Под ASGI Django 3.2 перебирает
+    потоковый ответ в цикле событий, где запросы к базе данных запрещены,
+    поэтому там выгрузка сначала пишется во временный файл.
+    """
+    permission_classes = (IsAdminPermission,)
+
+    def get(self, request, table, fmt):
+        if table not in TABLES_BY_NAME or fmt not in FORMATS:
+            raise NotFound()
+        table = TABLES_BY_NAME[table]
+        content_type, write = FORMATS[fmt]
+        queryset = export_queryset(table)
+        chunks = write(table, queryset.using(queryset.db))
+        if isinstance(request._request, ASGIRequest):
+            response = FileResponse(spool(chunks), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(
+                chunks, content_type=content_type
+            )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{table.name}.{fmt}"'
+        )
+        return response
+
+
+class SearchView(ReplicaReadMixin, generics.ListAPIView):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+    Параметр `q` - строка поиска, `type` - ограничение по типу документа.
+    """
+    serializer_class = SearchResultSerializer
+    permission_classes = (permissions.AllowAny,)
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'Укажите строку поиска.'})
+        queryset = search(text)
+        kind = self.request.query_params.get('type')
+        if kind:
+            return queryset.filter(kind=kind)
+        return queryset
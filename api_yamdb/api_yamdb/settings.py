@@ -39,6 +39,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +70,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
+ASGI_APPLICATION = 'api_yamdb.asgi.application'
+
+# Асинхронные представления чтения; api_yamdb/asgi.py включает их по умолчанию
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='0') == '1'
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', default=8))
 
 
 DATABASES = {
@@ -81,10 +87,35 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='strng_psswrd_321'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default='0'
+        ) == '1',
     }
 }
 
+# Реплики для чтения: JSON-список настроек, которые отличаются от default,
+# например '[{"HOST": "replica1"}, {"HOST": "replica2"}]'
+for index, replica in enumerate(
+    json.loads(os.getenv('DB_REPLICAS', default='[]')), start=1
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'}
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Сколько секунд пользователь читает из основной базы после изменений
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.getenv('DB_REPLICA_PIN_SECONDS', default=5)
+)
+
+# Проверять постоянное соединение перед запросом и переоткрывать его,
+# если база данных его закрыла
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', default='1') == '1'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,10 +158,14 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 
@@ -143,6 +178,42 @@ SIMPLE_JWT = {
 }
 
 
+API_CACHE_BACKEND = os.getenv('API_CACHE_BACKEND')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': (
+            API_CACHE_BACKEND
+            or 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default='api'),
+    },
+}
+
+API_CACHE_ALIAS = 'api'
+# LocMemCache у каждого процесса свой: сброс версий тегов после записи
+# не доходит до остальных процессов gunicorn. Поэтому по умолчанию кеш
+# ответов включён, только если задан общий бэкенд.
+API_CACHE_ENABLED = os.getenv(
+    'API_CACHE_ENABLED', default='1' if API_CACHE_BACKEND else '0'
+) == '1'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=24 * 60 * 60))
+API_VALUES_LISTS = os.getenv('API_VALUES_LISTS', default='1') == '1'
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', default=500))
+API_TOP_MAX_LIMIT = int(os.getenv('API_TOP_MAX_LIMIT', default=100))
+
+
+PERF_METRICS_ENABLED = os.getenv('PERF_METRICS_ENABLED', default='0') == '1'
+PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', default='1') == '1'
+# Токен Prometheus для /metrics/; без него показатели не отдаются
+PERF_METRICS_TOKEN = os.getenv('PERF_METRICS_TOKEN', default='')
+PERF_QUERY_BUDGET = int(os.getenv('PERF_QUERY_BUDGET', default=20))
+PERF_LATENCY_BUDGET_MS = int(os.getenv('PERF_LATENCY_BUDGET_MS', default=500))
+
+
 DEFAULT_FROM_EMAIL = 'default@gmail.com'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -0,0 +1,178 @@
+"""Нагрузочный прогон эндпоинтов API на синтетических данных.
+
+Заполняет временную базу данных каталогом заданного размера и выполняет
+запросы к каждому эндпоинту в несколько потоков: через тестовый клиент
+Django в этом же процессе или по HTTP к gunicorn. Печатает RPS,
+перцентили времени ответа и число запросов к базе данных, с `--output`
+сохраняет результаты в JSON для сравнения командой benchmarks.compare:
+
+    cd api_yamdb && python -m benchmarks.api --titles 1000 --output new.json
+"""
+import argparse
+import datetime
+import itertools
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+
+from .drivers import HttpDriver, InProcessDriver, gunicorn_server
+from .environment import setup_django, test_database
+from .stats import save, summarize, table
+
+ENDPOINTS = (
+    ('categories', '/api/v1/categories/', False),
+    ('genres', '/api/v1/genres/', False),
+    ('titles', '/api/v1/titles/', False),
+    ('titles_genre', '/api/v1/titles/?genre={genre}', False),
+    ('titles_sparse', '/api/v1/titles/?fields=id,name,year,rating', False),
+    ('titles_top', '/api/v1/titles/top/', False),
+    ('titles_top_genre', '/api/v1/titles/top/?genre={genre}', False),
+    ('title', '/api/v1/titles/{title}/', False),
+    ('histogram', '/api/v1/titles/{title}/histogram/', False),
+    ('reviews', '/api/v1/titles/{title}/reviews/', False),
+    ('reviews_cursor', '/api/v1/titles/{title}/reviews/?pagination=cursor',
+     False),
+    ('review', '/api/v1/titles/{title}/reviews/{review}/', False),
+    ('comments', '/api/v1/titles/{title}/reviews/{review}/comments/', False),
+    ('comment',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/', False),
+    ('search', '/api/v1/search/?q={word}', False),
+    ('users', '/api/v1/users/', True),
+    ('me', '/api/v1/users/me/', True),
+)
+DATASET = ('users', 'categories', 'genres', 'titles', 'reviews', 'comments')
+
+
+def run_load(driver, paths, token, requests, concurrency):
+    """Выполняет `requests` запросов в `concurrency` потоков, перебирая
+    пути `paths` по кругу."""
+    for path in paths:
+        driver.get(path, token)
+    results, counter = [], itertools.count()
+
+    def worker():
+        try:
+            for index in counter:
+                if index >= requests:
+                    break
+                results.append(driver.get(paths[index % len(paths)], token))
+        finally:
+            driver.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(results, time.perf_counter() - started)
+
+
+def selected_endpoints(names, values):
+    for name, template, auth in ENDPOINTS:
+        if names and name not in names:
+            continue
+        try:
+            yield name, template.format(**values), auth
+        except KeyError:
+            continue
+
+
+def run(driver, values, token, options):
+    values = {key: value for key, value in values.items() if value}
+    endpoints = {}
+    for name, path, auth in selected_endpoints(options.endpoint, values):
+        endpoints[name] = run_load(
+            driver, [path], token if auth else None,
+            options.requests, options.concurrency
+        )
+    return endpoints
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(options):
+    from api.authentication import access_token_for
+    from django.conf import settings
+    from django.db import connection
+
+    from .seed import seed_catalog
+
+    settings.API_CACHE_ENABLED = options.cache
+    values = seed_catalog(
+        **{size: getattr(options, size) for size in DATASET}
+    )
+    token = access_token_for(values.pop('admin'))
+    if options.mode == 'gunicorn':
+        environ = {'API_CACHE_ENABLED': '1' if options.cache else '0'}
+        with gunicorn_server(options.workers, connection.settings_dict,
+                             environ) as url:
+            endpoints = run(HttpDriver(url), values, token, options)
+    else:
+        endpoints = run(InProcessDriver(), values, token, options)
+    return {
+        'meta': {
+            'started': datetime.datetime.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'mode': options.mode,
+            'workers': options.workers if options.mode == 'gunicorn' else 1,
+            'concurrency': options.concurrency,
+            'requests': options.requests,
+            'cache': options.cache,
+            'dataset': {size: getattr(options, size) for size in DATASET},
+        },
+        'endpoints': endpoints,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'),
+                        default='inprocess')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Число процессов gunicorn')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Число одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Число запросов к каждому эндпоинту')
+    parser.add_argument('--endpoint', action='append',
+                        choices=[name for name, _, _ in ENDPOINTS],
+                        help='Проверить только эти эндпоинты')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='Отключить кеш ответов и ETag')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    for size, default in zip(DATASET, (100, 5, 10, 200, 10, 3)):
+        parser.add_argument(f'--{size}', type=int, default=default)
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    setup_django()
+    from django.db import connection
+
+    name = None
+    if options.mode == 'gunicorn' and connection.vendor == 'sqlite':
+        name = os.path.join(tempfile.gettempdir(), 'yamdb_benchmark.sqlite3')
+    with test_database(name):
+        report = benchmark(options)
+    print(table(report['endpoints']))
+    if options.output:
+        save(options.output, report)
+
+
+if __name__ == '__main__':
+    main()
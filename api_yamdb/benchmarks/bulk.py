@@ -0,0 +1,87 @@
+"""Создание произведений по одному и массовым запросом.
+
+Создаёт `--titles` произведений запросами POST /api/v1/titles/ и тем же
+числом через POST /api/v1/titles/bulk/ пачками по `--batch` на временной
+базе данных; выводит время и число запросов к базе данных:
+
+    cd api_yamdb && python -m benchmarks.bulk --titles 500
+"""
+import argparse
+import time
+
+from .environment import setup_django, test_database
+
+
+def items(count, prefix, values):
+    return [
+        {
+            'name': f'{prefix} {i}',
+            'year': 2000,
+            'description': f'Описание {i}',
+            'category': values['category'],
+            'genre': values['genres'],
+        }
+        for i in range(count)
+    ]
+
+
+def timed(connection, requests):
+    """Время в секундах и число запросов к базе данных."""
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for send in requests:
+            response = send()
+            assert response.status_code == 201, response.content
+        elapsed = time.perf_counter() - started
+    return elapsed, len(queries.captured_queries)
+
+
+def run(titles, batch):
+    from api.authentication import access_token_for
+    from django.db import connection
+    from rest_framework.test import APIClient
+    from reviews.models import Category, Genre
+
+    from .seed import seed_catalog
+
+    values = seed_catalog(titles=1, reviews=0, comments=0)
+    values['category'] = Category.objects.values_list('slug').first()[0]
+    values['genres'] = list(Genre.objects.values_list('slug', flat=True)[:3])
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(values["admin"])}'
+    )
+    single = [
+        lambda item=item: client.post('/api/v1/titles/', item, format='json')
+        for item in items(titles, 'По одному', values)
+    ]
+    bulk_items = items(titles, 'Пакетом', values)
+    bulk = [
+        lambda start=start: client.post(
+            '/api/v1/titles/bulk/', bulk_items[start:start + batch],
+            format='json'
+        )
+        for start in range(0, titles, batch)
+    ]
+    for name, requests in (('По одному', single), ('Пакетами', bulk)):
+        elapsed, queries = timed(connection, requests)
+        print(f'{name}: {elapsed:.2f} с, {titles / elapsed:.0f} '
+              f'произведений/с, запросов к базе данных: {queries}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=500,
+                        help='Число произведений в каждом варианте')
+    parser.add_argument('--batch', type=int, default=250,
+                        help='Произведений в одном массовом запросе')
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.titles, args.batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Сравнение двух прогонов benchmarks.api.
+
+Печатает изменение RPS, p50, p99 и числа запросов к базе данных
+по каждому эндпоинту и завершается с кодом 1, если p99 вырос больше
+порога или запросов к базе стало больше:
+
+    cd api_yamdb && python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import sys
+
+from .stats import load
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(old, new, threshold):
+    """Строки отчёта и список регрессий."""
+    lines = [
+        f'{"Запрос":<16}{"RPS, %":>9}{"p50, %":>9}{"p99, %":>9}{"SQL":>10}'
+    ]
+    regressions = []
+    for name, after in new['endpoints'].items():
+        before = old['endpoints'].get(name)
+        if before is None:
+            continue
+        p99 = change(before['p99'], after['p99'])
+        queries = f'{"-":>10}'
+        if before['queries'] is not None and after['queries'] is not None:
+            queries = f'{before["queries"]:>5.1f}→{after["queries"]:<4.1f}'
+            if after['queries'] > before['queries']:
+                regressions.append(f'{name}: больше запросов к базе данных')
+        if p99 > threshold:
+            regressions.append(f'{name}: p99 вырос на {p99:.0f}%')
+        lines.append(
+            f'{name:<16}{change(before["rps"], after["rps"]):>+9.1f}'
+            f'{change(before["p50"], after["p50"]):>+9.1f}{p99:>+9.1f}'
+            f'{queries}'
+        )
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old', help='JSON с результатами до изменений')
+    parser.add_argument('new', help='JSON с результатами после изменений')
+    parser.add_argument('--threshold', type=float, default=20,
+                        help='Допустимый рост p99, %%')
+    options = parser.parse_args()
+    old, new = load(options.old), load(options.new)
+    if old['meta']['dataset'] != new['meta']['dataset']:
+        print('Внимание: прогоны выполнены на данных разного размера')
+    lines, regressions = compare(old, new, options.threshold)
+    print('\n'.join(lines))
+    for regression in regressions:
+        print(f'Регрессия: {regression}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
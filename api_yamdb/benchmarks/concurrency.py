@@ -0,0 +1,97 @@
+"""Пропускная способность WSGI и ASGI при росте числа клиентов.
+
+Запускает gunicorn с синхронными процессами (WSGI) и с процессами
+uvicorn (ASGI) при разных размерах пула потоков для чтения и выполняет
+запросы к спискам и страницам произведений, жанров и отзывов при разном
+числе одновременных клиентов. `--slow-query-ms` задерживает каждый запрос
+к базе данных, как это делает медленная или перегруженная база:
+
+    cd api_yamdb && python -m benchmarks.concurrency --slow-query-ms 20
+"""
+import argparse
+import os
+import tempfile
+
+from .api import run_load
+from .drivers import HttpDriver, gunicorn_server
+from .environment import setup_django, test_database
+from .stats import save, table
+
+PATHS = (
+    '/api/v1/genres/',
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+)
+
+
+def servers(options):
+    """Конфигурации серверов: имя, приложение, параметры, окружение."""
+    base = ['-c', 'python:benchmarks.slow_database']
+    yield 'wsgi', 'api_yamdb.wsgi:application', base, {}
+    for threads in options.threads:
+        yield (
+            f'asgi/{threads}', 'api_yamdb.asgi:application',
+            base + ['--worker-class', 'uvicorn.workers.UvicornWorker'],
+            {'ASYNC_VIEW_THREADS': str(threads)},
+        )
+
+
+def run(options):
+    from django.db import connection
+
+    from .seed import seed_catalog
+
+    values = seed_catalog(titles=options.titles, reviews=options.reviews)
+    paths = [path.format(**values) for path in PATHS]
+    results = {}
+    for name, application, arguments, environ in servers(options):
+        environ.update({
+            'API_CACHE_ENABLED': '0',
+            'SLOW_QUERY_MS': str(options.slow_query_ms),
+        })
+        with gunicorn_server(options.workers, connection.settings_dict,
+                             environ, application, arguments) as url:
+            for concurrency in options.concurrency:
+                results[f'{name} c={concurrency}'] = run_load(
+                    HttpDriver(url), paths, None, options.requests,
+                    concurrency
+                )
+    return results
+
+
+def numbers(value):
+    return [int(number) for number in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Число процессов gunicorn')
+    parser.add_argument('--threads', type=numbers, default=[4, 16],
+                        help='Размеры пула потоков ASGI через запятую')
+    parser.add_argument('--concurrency', type=numbers, default=[1, 8, 32],
+                        help='Числа одновременных клиентов через запятую')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Число запросов на каждое число клиентов')
+    parser.add_argument('--slow-query-ms', type=int, default=0,
+                        help='Задержка каждого запроса к базе данных, мс')
+    parser.add_argument('--titles', type=int, default=200)
+    parser.add_argument('--reviews', type=int, default=10)
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    options = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    name = None
+    if connection.vendor == 'sqlite':
+        name = os.path.join(tempfile.gettempdir(), 'yamdb_benchmark.sqlite3')
+    with test_database(name):
+        results = run(options)
+    print(table(results))
+    if options.output:
+        save(options.output, {'meta': vars(options), 'endpoints': results})
+
+
+if __name__ == '__main__':
+    main()
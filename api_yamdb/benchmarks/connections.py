@@ -0,0 +1,111 @@
+"""Пропускная способность с постоянными соединениями и без них.
+
+Запускает gunicorn без постоянных соединений (CONN_MAX_AGE=0), с ними,
+с проверкой соединений перед запросом и без неё, и, если указан
+`--pgbouncer`, через пул соединений pgbouncer. Кеш ответов отключён,
+чтобы каждый запрос обращался к базе данных. На PostgreSQL после
+прогона выводится число соединений сервера с базой данных:
+
+    cd api_yamdb && python -m benchmarks.connections --pgbouncer localhost:6432
+"""
+import argparse
+import os
+import tempfile
+
+from .api import run_load
+from .drivers import HttpDriver, gunicorn_server
+from .environment import setup_django, test_database
+from .stats import save, table
+
+PATHS = (
+    '/api/v1/genres/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+)
+CONFIGS = (
+    ('age=0', {'DB_CONN_MAX_AGE': '0'}),
+    ('age=60', {'DB_CONN_MAX_AGE': '60'}),
+    ('age=60 no check',
+     {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': '0'}),
+)
+
+
+def configs(pgbouncer):
+    yield from CONFIGS
+    if not pgbouncer:
+        return
+    host, _, port = pgbouncer.partition(':')
+    pooled = {
+        'DB_HOST': host,
+        'DB_PORT': port or '6432',
+        'DB_DISABLE_SERVER_SIDE_CURSORS': '1',
+    }
+    yield 'bouncer age=0', {**pooled, 'DB_CONN_MAX_AGE': '0'}
+    yield 'bouncer age=60', {**pooled, 'DB_CONN_MAX_AGE': '60'}
+
+
+def server_connections():
+    """Соединения с текущей базой данных PostgreSQL, кроме своего."""
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM pg_stat_activity '
+            'WHERE datname = current_database() AND pid <> pg_backend_pid()'
+        )
+        return cursor.fetchone()[0]
+
+
+def run(options):
+    from django.db import connection
+
+    from .seed import seed_catalog
+
+    values = seed_catalog(titles=options.titles)
+    paths = [path.format(**values) for path in PATHS]
+    results = {}
+    for name, environ in configs(options.pgbouncer):
+        with gunicorn_server(options.workers, connection.settings_dict,
+                             {**environ, 'API_CACHE_ENABLED': '0'}) as url:
+            results[name] = run_load(
+                HttpDriver(url), paths, None, options.requests,
+                options.concurrency
+            )
+            results[name]['connections'] = server_connections()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Число процессов gunicorn')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Число одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='Число запросов для каждой настройки')
+    parser.add_argument('--pgbouncer', metavar='HOST:PORT',
+                        help='Адрес pgbouncer перед той же базой данных')
+    parser.add_argument('--titles', type=int, default=200)
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    options = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    name = None
+    if connection.vendor == 'sqlite':
+        name = os.path.join(tempfile.gettempdir(), 'yamdb_benchmark.sqlite3')
+    with test_database(name):
+        results = run(options)
+    print(table(results))
+    for config, stats in results.items():
+        if stats['connections'] is not None:
+            print(f'{config}: соединений с базой данных '
+                  f'{stats["connections"]}')
+    if options.output:
+        save(options.output, {'meta': vars(options), 'endpoints': results})
+
+
+if __name__ == '__main__':
+    main()
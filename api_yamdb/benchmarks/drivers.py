@@ -0,0 +1,134 @@
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class InProcessDriver:
+    """Запросы через тестовый клиент Django в текущем процессе.
+
+    У каждого потока свой клиент и своё соединение с базой данных,
+    поэтому считаются запросы к базе каждого HTTP-запроса.
+    """
+    name = 'inprocess'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, path, token=None):
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        if not hasattr(self._local, 'client'):
+            self._local.client = Client()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self._local.client.get(path, **headers)
+            elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, len(queries)
+
+    def close(self):
+        from django.db import connection
+
+        connection.close()
+
+
+class HttpDriver:
+    """Запросы по HTTP к запущенному серверу; число запросов к базе
+    данных снаружи не видно."""
+    name = 'http'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, path, token=None):
+        request = urllib.request.Request(
+            self.base_url + urllib.parse.quote(path, safe='/?=&')
+        )
+        if token:
+            request.add_header('Authorization', f'Bearer {token}')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        return status, (time.perf_counter() - started) * 1000, None
+
+    def close(self):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn завершился при запуске')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn не открыл порт {port} за {timeout} с')
+
+
+def start_gunicorn(database, environ=None,
+                   application='api_yamdb.wsgi:application', options=()):
+    """Запускает gunicorn с базой данных `database` (настройки Django
+    после создания временной базы) и возвращает процесс и порт."""
+    port = free_port()
+    env = {
+        **os.environ,
+        'DB_ENGINE': database['ENGINE'],
+        'DB_NAME': database['NAME'],
+        'DJANGO_ALLOWED_HOSTS': '["127.0.0.1"]',
+        **(environ or {}),
+    }
+    process = subprocess.Popen(
+        [
+            shutil.which('gunicorn') or 'gunicorn',
+            application,
+            '--bind', f'127.0.0.1:{port}',
+            '--log-level', 'warning',
+            *options,
+        ],
+        cwd=BASE_DIR,
+        env=env,
+    )
+    return process, port
+
+
+def stop(process):
+    process.terminate()
+    process.wait(timeout=30)
+
+
+@contextmanager
+def gunicorn_server(workers, database, environ=None,
+                    application='api_yamdb.wsgi:application', options=()):
+    """gunicorn с `workers` процессами; возвращает его адрес."""
+    process, port = start_gunicorn(
+        database, environ, application, ['--workers', str(workers), *options]
+    )
+    try:
+        wait_for_port(port, process)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        stop(process)
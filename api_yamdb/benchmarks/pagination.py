@@ -0,0 +1,77 @@
+"""Время выдачи страницы N списков отзывов и комментариев.
+
+Сравнивает постраничный режим (?page=N, OFFSET и COUNT(*)) с курсорным
+(?cursor=..., условие по индексу) на временной базе данных:
+
+    cd api_yamdb && python -m benchmarks.pagination --rows 20000
+"""
+import argparse
+
+from .environment import measure, setup_django, test_database
+
+
+def page_numbers(rows, page_size):
+    last = max(rows // page_size, 1)
+    pages, page = [], 1
+    while page < last:
+        pages.append(page)
+        page *= 10
+    return pages + [last]
+
+
+def cursor_for_page(queryset, ordering, page, page_size):
+    """Курсор, который ведёт на страницу `page`."""
+    from api.pagination import encode_cursor
+
+    if page == 1:
+        return None
+    fields = [field.lstrip('-') for field in ordering]
+    position = queryset.order_by(*ordering).values_list(*fields)[
+        (page - 1) * page_size - 1
+    ]
+    return encode_cursor(list(position))
+
+
+def run(rows, repeat):
+    from api.views import CommentViewSet, ReviewViewSet
+    from django.test import Client
+    from rest_framework.pagination import PageNumberPagination
+
+    from .seed import seed_reviews
+
+    title, review = seed_reviews(rows)
+    client = Client()
+    page_size = PageNumberPagination.page_size
+    lists = (
+        ('reviews', f'/api/v1/titles/{title.id}/reviews/',
+         title.reviews.all(), ReviewViewSet.keyset_ordering),
+        ('comments',
+         f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+         review.comments.all(), CommentViewSet.keyset_ordering),
+    )
+    print(f'{"Список":<10}{"Страница":>10}{"page, мс":>12}{"cursor, мс":>12}')
+    for name, url, queryset, ordering in lists:
+        for page in page_numbers(rows, page_size):
+            cursor = cursor_for_page(queryset, ordering, page, page_size)
+            by_cursor = f'{url}?cursor={cursor}' if cursor else (
+                f'{url}?pagination=cursor'
+            )
+            by_page = measure(lambda: client.get(f'{url}?page={page}'), repeat)
+            by_key = measure(lambda: client.get(by_cursor), repeat)
+            print(f'{name:<10}{page:>10}{by_page:>12.2f}{by_key:>12.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000,
+                        help='Число отзывов и комментариев')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Число повторов каждого запроса')
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import datetime
+import random
+
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, Review, Title, User,
+                            UserRole)
+from reviews.parsers.csv_parsers import bulk_insert
+from reviews.ratings import rebuild_ratings
+from reviews.search import rebuild_index
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'музыка', 'актёр',
+    'story', 'plot', 'ending', 'music', 'classic', 'драма', 'комедия',
+)
+
+
+def seed_users(count, prefix='bench'):
+    User.objects.bulk_create(
+        (
+            User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@yamdb.fake')
+            for i in range(count)
+        )
+    )
+    return list(
+        User.objects.filter(username__startswith=f'{prefix}_')
+        .values_list('pk', flat=True)
+    )
+
+
+def seed_reviews(count):
+    """Произведение с `count` отзывами и отзыв с `count` комментариями.
+
+    Даты публикации идут с шагом в секунду, чтобы сортировка по дате
+    была похожа на рабочую.
+    """
+    category = Category.objects.create(name='Бенчмарк', slug='benchmark')
+    title = Title.objects.create(name='Бенчмарк', year=2000, category=category)
+    authors = seed_users(count)
+    start = timezone.now() - datetime.timedelta(seconds=count)
+    bulk_insert(
+        Review,
+        (
+            Review(
+                title=title, author_id=author, text=f'Отзыв {i}',
+                score=i % 10 + 1,
+                pub_date=start + datetime.timedelta(seconds=i)
+            )
+            for i, author in enumerate(authors)
+        )
+    )
+    review = title.reviews.earliest('pub_date')
+    bulk_insert(
+        Comment,
+        (
+            Comment(
+                review=review, author_id=author, text=f'Комментарий {i}',
+                pub_date=start + datetime.timedelta(seconds=i)
+            )
+            for i, author in enumerate(authors)
+        )
+    )
+    return title, review
+
+
+def sentence(rng, length=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize()
+
+
+def seed_catalog(users=100, categories=5, genres=10, titles=200, reviews=10,
+                 comments=3, seed=0):
+    """Синтетический каталог заданного размера.
+
+    `reviews` - отзывов на произведение (не больше числа пользователей),
+    `comments` - комментариев на отзыв. Данные детерминированы `seed`,
+    поэтому прогоны на одном размере сравнимы. Возвращает словарь со
+    значениями для адресов запросов.
+    """
+    rng = random.Random(seed)
+    author_ids = seed_users(users)
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(categories)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(genres)
+    )
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    genre_ids = list(Genre.objects.values_list('pk', flat=True))
+    Title.objects.bulk_create(
+        Title(
+            name=f'{sentence(rng, 2)} {i}', year=1950 + i % 70,
+            category_id=rng.choice(category_ids), description=sentence(rng)
+        )
+        for i in range(titles)
+    )
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rng.sample(genre_ids, min(len(genre_ids), 2))
+    )
+    start = timezone.now() - datetime.timedelta(days=365)
+    bulk_insert(
+        Review,
+        (
+            Review(
+                title_id=title_id, author_id=author_id, text=sentence(rng),
+                score=rng.randint(1, 10),
+                pub_date=start + datetime.timedelta(minutes=rng.randint(
+                    0, 365 * 24 * 60
+                ))
+            )
+            for title_id in title_ids
+            for author_id in rng.sample(author_ids, min(reviews, users))
+        )
+    )
+    review_ids = list(Review.objects.values_list('pk', flat=True))
+    bulk_insert(
+        Comment,
+        (
+            Comment(
+                review_id=review_id, author_id=rng.choice(author_ids),
+                text=sentence(rng),
+                pub_date=start + datetime.timedelta(minutes=rng.randint(
+                    0, 365 * 24 * 60
+                ))
+            )
+            for review_id in review_ids
+            for _ in range(comments)
+        )
+    )
+    rebuild_ratings()
+    rebuild_index()
+    admin = User.objects.create(
+        username='bench_admin', email='bench_admin@yamdb.fake',
+        role=UserRole.ADMIN
+    )
+    review = (
+        Review.objects.filter(comments__isnull=False).first()
+        or Review.objects.first()
+    )
+    return {
+        'admin': admin,
+        'genre': Genre.objects.values_list('slug', flat=True).first(),
+        'title': review.title_id if review else title_ids[0],
+        'review': review.pk if review else None,
+        'comment': review.comments.values_list('pk', flat=True).first()
+        if review else None,
+        'word': WORDS[0],
+    }
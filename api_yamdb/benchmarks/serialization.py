@@ -0,0 +1,61 @@
+"""Строк в секунду при выдаче списка произведений.
+
+Сравнивает TitleReadSerializer и выборку values() с приведением строк
+к формату ответа (TitleViewSet.shape_rows), каждую - с JSONRenderer
+и FastJSONRenderer. Время включает запросы к базе данных, сериализацию
+и отрисовку JSON:
+
+    cd api_yamdb && python -m benchmarks.serialization --rows 1000
+"""
+import argparse
+
+from .environment import measure, setup_django, test_database
+
+
+def by_serializer(queryset):
+    from api.serializers import TitleReadSerializer
+
+    return TitleReadSerializer(queryset.all(), many=True).data
+
+
+def by_values(queryset):
+    from api.views import TitleViewSet
+
+    return TitleViewSet().shape_rows(
+        list(queryset.prefetch_related(None).values(*TitleViewSet.list_values))
+    )
+
+
+def run(rows, repeat):
+    from api.renderers import FastJSONRenderer
+    from api.views import TitleViewSet
+    from rest_framework.renderers import JSONRenderer
+
+    from .seed import seed_catalog
+
+    seed_catalog(titles=rows, reviews=0, comments=0)
+    queryset = TitleViewSet.queryset.all()
+    print(f'{"Строки":<12}{"Отрисовка":<18}{"мс":>10}{"строк/с":>12}')
+    for name, fetch in (('serializer', by_serializer), ('values', by_values)):
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            elapsed = measure(
+                lambda: renderer.render(fetch(queryset)), repeat
+            )
+            print(f'{name:<12}{type(renderer).__name__:<18}{elapsed:>10.2f}'
+                  f'{rows / elapsed * 1000:>12.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='Число произведений')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Число повторов каждого варианта')
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Число запросов к базе данных и время одной регистрации.
+
+Регистрирует новых пользователей и повторно - уже существующих
+на временной базе данных:
+
+    cd api_yamdb && python -m benchmarks.signup --users 500
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+
+from .environment import setup_django, test_database
+
+
+def signup(client, connection, username):
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        client.post(
+            '/api/v1/auth/signup/',
+            {'username': username, 'email': f'{username}@yamdb.fake'}
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, Counter(
+        query['sql'].split()[0] for query in queries.captured_queries
+    )
+
+
+def report(name, results):
+    timings = [elapsed for elapsed, _ in results]
+    statements = sum((counts for _, counts in results), Counter())
+    total = sum(statements.values()) / len(results)
+    per_signup = ', '.join(
+        f'{statement} {count / len(results):.1f}'
+        for statement, count in sorted(statements.items())
+    )
+    print(
+        f'{name}: {statistics.median(timings):.2f} мс (медиана), '
+        f'запросов на регистрацию: {total:.1f} ({per_signup})'
+    )
+
+
+def run(users):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    usernames = [f'signup_{i}' for i in range(users)]
+    report('Новые', [signup(client, connection, name) for name in usernames])
+    report('Повторные', [
+        signup(client, connection, name) for name in usernames
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500,
+                        help='Число регистраций')
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.users)
+
+
+if __name__ == '__main__':
+    main()
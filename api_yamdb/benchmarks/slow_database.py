@@ -0,0 +1,25 @@
+"""Настройки gunicorn для замеров с медленной базой данных.
+
+Каждый запрос к базе данных в процессах gunicorn задерживается
+на SLOW_QUERY_MS миллисекунд:
+
+    gunicorn -c python:benchmarks.slow_database api_yamdb.wsgi:application
+"""
+import os
+import time
+
+
+def delay(execute, sql, params, many, context):
+    time.sleep(int(os.getenv('SLOW_QUERY_MS', default=0)) / 1000)
+    return execute(sql, params, many, context)
+
+
+def slow_connection(sender, connection, **kwargs):
+    if delay not in connection.execute_wrappers:
+        connection.execute_wrappers.append(delay)
+
+
+def post_worker_init(worker):
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(slow_connection)
@@ -0,0 +1,145 @@
+"""Время запуска gunicorn и память процессов при разных настройках.
+
+Запускает gunicorn с gunicorn.conf.py без preload и с ним, в режимах sync
+и gthread, и измеряет время до первого успешного ответа, RSS и PSS
+главного процесса и рабочих процессов после прогрева. PSS делит общие
+страницы памяти между процессами, поэтому показывает выигрыш от preload,
+который не виден в RSS (только Linux):
+
+    cd api_yamdb && python -m benchmarks.startup --workers 4
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from .drivers import HttpDriver, start_gunicorn, stop
+from .environment import setup_django, test_database
+from .stats import save
+
+CONFIGS = (
+    ('sync', 'sync', '0'),
+    ('sync+preload', 'sync', '1'),
+    ('gthread+preload', 'gthread', '1'),
+)
+WARMUP = ('/api/v1/genres/', '/api/v1/titles/', '/api/v1/titles/{title}/')
+
+
+def memory(pid):
+    """RSS и PSS процесса в мегабайтах."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            found.append(int(entry))
+    return found
+
+
+def wait_for_response(url, process, timeout=60):
+    """Секунды до первого успешного ответа сервера."""
+    driver = HttpDriver(url)
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn завершился при запуске')
+        try:
+            if driver.get('/api/v1/genres/')[0] == 200:
+                return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'gunicorn не ответил за {timeout} с')
+
+
+def measure_config(database, workers, worker_class, preload, paths):
+    environ = {
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'GUNICORN_PRELOAD': preload,
+    }
+    process, port = start_gunicorn(database, environ)
+    try:
+        url = f'http://127.0.0.1:{port}'
+        startup = wait_for_response(url, process)
+        driver = HttpDriver(url)
+        for _ in range(workers * 5):
+            for path in paths:
+                driver.get(path)
+        pids = children(process.pid)
+        workers_memory = [memory(pid) for pid in pids]
+        master = memory(process.pid)
+    finally:
+        stop(process)
+    return {
+        'startup': startup,
+        'workers': len(pids),
+        'master_rss': master['rss'],
+        'worker_rss': statistics.mean(each['rss'] for each in workers_memory),
+        'worker_pss': statistics.mean(each['pss'] for each in workers_memory),
+        'total_pss': master['pss'] + sum(
+            each['pss'] for each in workers_memory
+        ),
+    }
+
+
+def table(results):
+    lines = [
+        f'{"Настройки":<18}{"Запуск, с":>10}{"Главный RSS":>13}'
+        f'{"RSS процесса":>14}{"PSS процесса":>14}{"PSS всего":>11}'
+    ]
+    for name, each in results.items():
+        lines.append(
+            f'{name:<18}{each["startup"]:>10.2f}{each["master_rss"]:>13.1f}'
+            f'{each["worker_rss"]:>14.1f}{each["worker_pss"]:>14.1f}'
+            f'{each["total_pss"]:>11.1f}'
+        )
+    return '\n'.join(lines) + '\nПамять в МБ.'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Число процессов gunicorn')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    options = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    from .seed import seed_catalog
+
+    name = None
+    if connection.vendor == 'sqlite':
+        name = os.path.join(tempfile.gettempdir(), 'yamdb_benchmark.sqlite3')
+    with test_database(name):
+        values = seed_catalog(titles=20)
+        paths = [path.format(**values) for path in WARMUP]
+        results = {
+            config: measure_config(
+                connection.settings_dict, options.workers, worker_class,
+                preload, paths
+            )
+            for config, worker_class, preload in CONFIGS
+        }
+    print(table(results))
+    if options.output:
+        save(options.output, {'meta': vars(options), 'configs': results})
+
+
+if __name__ == '__main__':
+    main()
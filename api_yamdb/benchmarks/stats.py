@@ -0,0 +1,54 @@
+import json
+import math
+import statistics
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(results, elapsed):
+    """Сводка по результатам запросов (статус, время в мс, число
+    запросов к базе данных или None) за `elapsed` секунд."""
+    timings = [timing for _, timing, _ in results]
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status >= 400),
+        'rps': len(results) / elapsed if elapsed else 0.0,
+        'mean': statistics.mean(timings),
+        'p50': percentile(timings, 50),
+        'p90': percentile(timings, 90),
+        'p99': percentile(timings, 99),
+        'max': max(timings),
+        'queries': statistics.mean(queries) if queries else None,
+    }
+
+
+def table(endpoints):
+    lines = [
+        f'{"Запрос":<16}{"RPS":>9}{"p50, мс":>10}{"p90, мс":>10}'
+        f'{"p99, мс":>10}{"Ошибок":>8}{"SQL":>7}'
+    ]
+    for name, stats in endpoints.items():
+        queries = stats['queries']
+        lines.append(
+            f'{name:<16}{stats["rps"]:>9.1f}{stats["p50"]:>10.2f}'
+            f'{stats["p90"]:>10.2f}{stats["p99"]:>10.2f}'
+            f'{stats["errors"]:>8}'
+            + (f'{queries:>7.1f}' if queries is not None else f'{"-":>7}')
+        )
+    return '\n'.join(lines)
+
+
+def save(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
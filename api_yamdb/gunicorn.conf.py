@@ -0,0 +1,107 @@
+"""Настройки gunicorn.
+
+Число процессов и потоков выбирается по числу доступных контейнеру
+процессоров; переменные окружения переопределяют любое значение:
+
+    GUNICORN_WORKER_CLASS  sync, gthread (потоки для ожидания ввода-вывода)
+                           или uvicorn (ASGI, api_yamdb.asgi:application)
+    GUNICORN_WORKERS       число процессов
+    GUNICORN_THREADS       число потоков процесса в режиме gthread
+    GUNICORN_PRELOAD       1 - загрузить Django до создания процессов
+    GUNICORN_MAX_REQUESTS  перезапуск процесса после стольких запросов
+"""
+import os
+import time
+
+STARTED = time.monotonic()
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default=default))
+
+
+def cgroup_cpus():
+    """Ограничение процессорного времени контейнера или None."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = f.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ('max', '-1'):
+        return None
+    return max(int(quota) // int(period), 1)
+
+
+def available_cpus():
+    """Процессоры, доступные процессу, с учётом ограничений cgroup:
+    os.cpu_count() в контейнере возвращает число процессоров хоста."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return min(cpus, cgroup_cpus() or cpus)
+
+
+def default_workers(mode, cpus):
+    """Синхронному процессу нужен запас на ожидание базы данных, а
+    gthread и uvicorn ждут ввода-вывода в потоках и цикле событий."""
+    if mode == 'sync':
+        return cpus * 2 + 1
+    return cpus + 1
+
+
+mode = os.getenv('GUNICORN_WORKER_CLASS', default='sync')
+cpus = available_cpus()
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+worker_class = WORKER_CLASSES.get(mode, mode)
+workers = env_int('GUNICORN_WORKERS', default_workers(mode, cpus))
+threads = env_int('GUNICORN_THREADS', 4) if mode == 'gthread' else 1
+preload_app = os.getenv('GUNICORN_PRELOAD', default='1') == '1'
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def when_ready(server):
+    server.log.info(
+        'gunicorn готов за %.2f с: %s x %d, потоков %d, preload %s',
+        time.monotonic() - STARTED, worker_class, workers, threads,
+        preload_app
+    )
+
+
+def pre_fork(server, worker):
+    """Процессы не должны унаследовать соединения с базой данных,
+    открытые главным процессом при загрузке приложения."""
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.forked = time.monotonic()
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        'Процесс %s готов за %.3f с', worker.pid,
+        time.monotonic() - worker.forked
+    )
@@ -0,0 +1,107 @@
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Genre, Title
+from .ratings import record_scores, sync_genres
+from .search import index_objects
+
+
+def insert(objs):
+    """Вставляет новые объекты одной модели и возвращает их с ключами.
+
+    Базы данных, которые не возвращают ключи из многострочного INSERT
+    (SQLite в Django 3.2), получают объекты по одному. Поисковый индекс
+    для них не обновляется: это делает вызывающая функция пачкой.
+    """
+    if not objs:
+        return objs
+    model = type(objs[0])
+    features = connections[router.db_for_write(model)].features
+    if features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+    for obj in objs:
+        obj.save_base(raw=True, force_insert=True)
+    return objs
+
+
+def add_genres(genres):
+    """Добавляет жанры произведениям одним INSERT и перестраивает их
+    строки в таблице лидеров жанров: {id произведения: [жанры]}."""
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genre.pk)
+        for title_id, title_genres in genres.items()
+        for genre in title_genres
+    )
+    sync_genres(title_id__in=list(genres))
+
+
+def set_genres(genres):
+    """Заменяет жанры произведений."""
+    if genres:
+        Title.genre.through.objects.filter(
+            title_id__in=list(genres)
+        ).delete()
+        add_genres(genres)
+
+
+@transaction.atomic
+def create_titles(items):
+    """Создаёт произведения из словарей полей модели; жанры - в `genre`.
+
+    Произведения вставляются одним INSERT, их жанры - ещё одним.
+    """
+    genres = [item.pop('genre', []) for item in items]
+    titles = insert([Title(**item) for item in items])
+    add_genres({title.pk: genre for title, genre in zip(titles, genres)})
+    index_objects(titles)
+    return titles
+
+
+@transaction.atomic
+def update_titles(changes):
+    """Меняет произведения: `changes` - пары (произведение, поля).
+
+    Произведения с одинаковым набором изменённых полей обновляются одним
+    запросом, остальные поля не перезаписываются.
+    """
+    groups, genres = defaultdict(list), {}
+    for title, attrs in changes:
+        attrs = dict(attrs)
+        if 'genre' in attrs:
+            genres[title.pk] = attrs.pop('genre')
+        for name, value in attrs.items():
+            setattr(title, name, value)
+        groups[tuple(sorted(attrs))].append(title)
+    for fields, titles in groups.items():
+        if fields:
+            Title.objects.bulk_update(titles, fields)
+    set_genres(genres)
+    titles = list({title.pk: title for title, _ in changes}.values())
+    index_objects(titles)
+    return titles
+
+
+@transaction.atomic
+def create_genres(items):
+    return Genre.objects.bulk_create(Genre(**item) for item in items)
+
+
+@transaction.atomic
+def create_reviews(reviews):
+    """Создаёт отзывы, учитывает их оценки в рейтингах, гистограммах и
+    таблице лидеров (по произведению за раз) и добавляет отзывы
+    в поисковый индекс."""
+    now = timezone.now()
+    for review in reviews:
+        review.pub_date = now
+    reviews = insert(reviews)
+    scores = defaultdict(list)
+    for review in reviews:
+        scores[review.title_id].append(review.score)
+    for title_id, added in scores.items():
+        record_scores(title_id, added=added)
+    index_objects(reviews)
+    return reviews
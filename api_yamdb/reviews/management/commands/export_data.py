@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from ...parsers.csv_parsers import CHUNK_SIZE, TABLES
+from ...parsers.exporters import FORMATS, export_queryset
+
+
+class Command(BaseCommand):
+    help = ('Выгружает данные в CSV-файлы в формате import_data '
+            'или в NDJSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='export',
+            help='Каталог для файлов; создаётся, если его нет'
+        )
+        parser.add_argument(
+            '--format',
+            choices=tuple(FORMATS),
+            default='csv',
+            help='csv - файлы, которые загружает import_data, '
+                 'ndjson - объект JSON на строку'
+        )
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=[table.name for table in TABLES],
+            help='Выгрузить только эти таблицы'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Число строк, которые читаются из базы данных за раз'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['path'], exist_ok=True)
+        _, write = FORMATS[options['format']]
+        for table in TABLES:
+            if options['tables'] and table.name not in options['tables']:
+                continue
+            file = os.path.join(
+                options['path'], f'{table.name}.{options["format"]}'
+            )
+            with open(file, 'wb') as f:
+                for chunk in write(
+                    table, export_queryset(table), options['chunk_size']
+                ):
+                    f.write(chunk)
+            self.stdout.write(f'{file}: {export_queryset(table).count()}')
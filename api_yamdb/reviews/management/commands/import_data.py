@@ -1,17 +1,106 @@
+import os
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
 
-from ...parsers.csv_parsers import (category_parser, comment_parser,
-                                    genre_parser, genre_title_parser,
-                                    review_parser, title_parser, user_parser)
+from ...parsers.copy_parsers import copy_table
+from ...parsers.csv_parsers import (CHUNK_SIZE, TABLES, IdMaps, RejectedRows,
+                                    import_table, reset_sequences)
+from ...parsers.pipeline import run_pipeline, timing_report
+from ...ratings import rebuild_ratings
+from ...search import rebuild_index
+from ...signals import data_reloaded
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов в базу данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static_files', 'data'),
+            help='Каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Число строк в одной пачке вставки'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=('batch', 'copy'),
+            default='batch',
+            help='batch - пакетные вставки через ORM, copy - COPY FROM STDIN '
+                 '(только PostgreSQL)'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=4,
+            help='Число потоков для параллельной загрузки независимых файлов'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить загрузку с сохранённых контрольных точек'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить строки, ничего не записывая'
+        )
+        parser.add_argument(
+            '--rejected',
+            metavar='FILE',
+            help='CSV-файл для отклонённых строк'
+        )
+
+    def get_engine(self, options):
+        if options['engine'] != 'copy' or options['dry_run']:
+            return 'batch'
+        if connection.vendor != 'postgresql':
+            self.stderr.write(
+                'COPY поддерживается только PostgreSQL, '
+                'используется пакетная загрузка'
+            )
+            return 'batch'
+        return 'copy'
+
     def handle(self, *args, **options):
-        path = 'static_files/data'
-        user_parser(f'{path}/users.csv')
-        category_parser(f'{path}/category.csv')
-        genre_parser(f'{path}/genre.csv')
-        title_parser(f'{path}/titles.csv')
-        review_parser(f'{path}/review.csv')
-        comment_parser(f'{path}/comments.csv')
-        genre_title_parser(f'{path}/genre_title.csv')
+        jobs = options['jobs'] if connection.vendor != 'sqlite' else 1
+        with ExitStack() as stack:
+            rejects = None
+            if options['rejected']:
+                rejects = stack.enter_context(
+                    RejectedRows(options['rejected'])
+                )
+            if self.get_engine(options) == 'copy':
+                load = partial(
+                    copy_table,
+                    path=options['path'],
+                    resume=options['resume'],
+                    rejects=rejects
+                )
+            else:
+                load = partial(
+                    import_table,
+                    path=options['path'],
+                    chunk_size=options['chunk_size'],
+                    id_maps=IdMaps(),
+                    resume=options['resume'],
+                    dry_run=options['dry_run'],
+                    rejects=rejects
+                )
+            started = time.monotonic()
+            results = run_pipeline(TABLES, load, jobs)
+        if not options['dry_run']:
+            reset_sequences([table.model for table in TABLES])
+            rebuild_ratings()
+            rebuild_index()
+            data_reloaded.send(sender=self.__class__)
+        self.stdout.write(timing_report(results, started))
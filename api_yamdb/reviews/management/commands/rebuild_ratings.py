@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...ratings import rebuild_ratings
+from ...signals import data_reloaded
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает по отзывам рейтинги всех произведений, гистограммы '
+        'оценок и таблицу лидеров жанров'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            titles, counts = rebuild_ratings()
+        data_reloaded.send(sender=self.__class__)
+        self.stdout.write(
+            f'Пересчитаны рейтинги произведений: {titles}, '
+            f'строк гистограмм: {counts}'
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ...search import rebuild_index
+from ...signals import data_reloaded
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс произведений, отзывов '
+        'и комментариев'
+    )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        data_reloaded.send(sender=self.__class__)
+        self.stdout.write(f'Проиндексировано документов: {indexed}')
@@ -0,0 +1,46 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from ...outbox import BATCH_SIZE, close_quietly, send_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение '
+        'с почтовым сервером'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Число писем, которые берутся в работу за раз'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза, с, когда в очереди нет писем'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить письма, которым пора уходить, и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        mail_connection = get_connection()
+        try:
+            while True:
+                claimed, sent = send_pending(
+                    options['batch_size'], mail_connection
+                )
+                if claimed:
+                    self.stdout.write(f'Отправлено писем: {sent} из {claimed}')
+                    continue
+                if options['once']:
+                    break
+                close_quietly(mail_connection)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_quietly(mail_connection)
@@ -0,0 +1,142 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:16
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def search_documents(apps):
+    """Записи индекса для существующих объектов: по итератору на каждый
+    тип объектов."""
+    SearchEntry = apps.get_model('reviews', 'SearchEntry')
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    return (
+        (
+            SearchEntry(
+                kind='title', object_id=pk, title_id=pk, head=name,
+                body=description
+            )
+            for pk, name, description in Title.objects.order_by(
+                'pk'
+            ).values_list('pk', 'name', 'description').iterator()
+        ),
+        (
+            SearchEntry(
+                kind='review', object_id=pk, title_id=title_id,
+                review_id=pk, body=text
+            )
+            for pk, title_id, text in Review.objects.order_by(
+                'pk'
+            ).values_list('pk', 'title_id', 'text').iterator()
+        ),
+        (
+            SearchEntry(
+                kind='comment', object_id=pk, title_id=title_id,
+                review_id=review_id, body=text
+            )
+            for pk, title_id, review_id, text in Comment.objects.order_by(
+                'pk'
+            ).values_list(
+                'pk', 'review__title_id', 'review_id', 'text'
+            ).iterator()
+        ),
+    )
+
+
+def fill_index(apps, schema_editor):
+    """Индексирует существующие произведения, отзывы и комментарии
+    пачками, как rebuild_index."""
+    from reviews.search import chunks, document_vector, term_weights
+
+    SearchEntry = apps.get_model('reviews', 'SearchEntry')
+    SearchTerm = apps.get_model('reviews', 'SearchTerm')
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for documents in search_documents(apps):
+        for chunk in chunks(documents):
+            SearchEntry.objects.bulk_create(chunk)
+            entries = SearchEntry.objects.filter(
+                kind=chunk[0].kind,
+                object_id__in=[entry.object_id for entry in chunk]
+            )
+            if postgres:
+                entries.update(document=document_vector())
+                continue
+            SearchTerm.objects.bulk_create(
+                SearchTerm(entry=entry, term=term, weight=weight)
+                for entry in entries
+                for term, weight in term_weights(
+                    entry.head, entry.body
+                ).items()
+            )
+
+
+def create_document_index(apps, schema_editor):
+    """GIN-индекс поискового вектора, только в PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS search_entry_document_idx '
+        'ON reviews_searchentry USING gin (document)'
+    )
+
+
+def drop_document_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS search_entry_document_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('title', 'Произведение'), ('review', 'Отзыв'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Идентификатор объекта')),
+                ('head', models.TextField(blank=True, default='', verbose_name='Заголовок')),
+                ('body', models.TextField(blank=True, default='', verbose_name='Текст')),
+                ('document', django.contrib.postgres.search.SearchVectorField(null=True, verbose_name='Поисковый вектор')),
+                ('review', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Review', verbose_name='Отзыв')),
+            ],
+            options={
+                'verbose_name': 'документ поиска',
+                'verbose_name_plural': 'документы поиска',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Термин')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Вес')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='reviews.SearchEntry')),
+            ],
+            options={
+                'verbose_name': 'термин поиска',
+                'verbose_name_plural': 'термины поиска',
+            },
+        ),
+        migrations.AddField(
+            model_name='searchentry',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'entry'], name='search_term_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='one_search_entry_per_object'),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+        migrations.RunPython(create_document_index, drop_document_index),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_tables(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    TitleScoreCount = apps.get_model('reviews', 'TitleScoreCount')
+    GenreLeaderboard = apps.get_model('reviews', 'GenreLeaderboard')
+    TitleScoreCount.objects.bulk_create(
+        TitleScoreCount(title_id=title_id, score=score, count=count)
+        for title_id, score, count in Review.objects.order_by().values(
+            'title_id', 'score'
+        ).annotate(count=Count('id')).values_list(
+            'title_id', 'score', 'count'
+        )
+    )
+    GenreLeaderboard.objects.bulk_create(
+        GenreLeaderboard(genre_id=genre_id, title_id=title_id, rating=rating)
+        for genre_id, title_id, rating in Title.genre.through.objects.values_list(
+            'genre_id', 'title_id', 'title__rating'
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenreLeaderboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(blank=True, null=True, verbose_name='Рейтинг')),
+            ],
+            options={
+                'verbose_name': 'рейтинг в жанре',
+                'verbose_name_plural': 'рейтинги в жанрах',
+            },
+        ),
+        migrations.CreateModel(
+            name='TitleScoreCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Число оценок')),
+            ],
+            options={
+                'verbose_name': 'число оценок',
+                'verbose_name_plural': 'гистограммы оценок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rating', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-rating', 'id'], name='title_category_rating_idx'),
+        ),
+        migrations.AddField(
+            model_name='titlescorecount',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counts', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddField(
+            model_name='genreleaderboard',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='reviews.genre', verbose_name='Жанр'),
+        ),
+        migrations.AddField(
+            model_name='genreleaderboard',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlescorecount',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.AddIndex(
+            model_name='genreleaderboard',
+            index=models.Index(fields=['genre', '-rating', 'title'], name='genre_leaderboard_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genreleaderboard',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_leaderboard'),
+        ),
+        migrations.RunPython(fill_tables, migrations.RunPython.noop),
+    ]
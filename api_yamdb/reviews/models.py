@@ -1,9 +1,12 @@
 import datetime as dt
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from django.core.mail import EmailMessage
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
+from django.utils import timezone
 
 
 class UserRole:
@@ -18,6 +21,8 @@ class UserRole:
 
 
 class User(AbstractUser):
+    TOKEN_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
     email = models.EmailField(
         unique=True,
         blank=False,
@@ -35,12 +40,45 @@ class User(AbstractUser):
         default=UserRole.USER,
     )
     confirmation_code = models.CharField(max_length=255)
+    token_version = models.PositiveIntegerField(
+        'Версия токена',
+        default=0,
+        help_text='Меняется при изменении роли, имени или активности: '
+                  'токены с прежней версией не доверяют своим данным'
+    )
 
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'пользователи'
         ordering = ['username']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user.remember_token_fields()
+        return user
+
+    def remember_token_fields(self):
+        self._token_fields = {
+            field: self.__dict__[field] for field in self.TOKEN_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        """Меняет версию токенов, если изменились данные, которые
+        записываются в токен: выпущенные ранее токены перестают им
+        доверять."""
+        loaded = getattr(self, '_token_fields', {})
+        if any(getattr(self, field) != value
+               for field, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self.remember_token_fields()
+
     @property
     def is_moderator(self):
         return self.role == UserRole.MODERATOR
@@ -101,16 +139,93 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр',)
     description = models.TextField('Описание', default='')
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField('Число оценок', default=0)
+    rating = models.FloatField('Рейтинг', blank=True, null=True)
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'произведения'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(
+                fields=['year', 'name', 'id'], name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=['-rating', 'id'], name='title_rating_idx'
+            ),
+            models.Index(
+                fields=['category', '-rating', 'id'],
+                name='title_category_rating_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TitleScoreCount(models.Model):
+    """Число оценок `score` у произведения: строка гистограммы."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        verbose_name='Произведение',)
+    score = models.PositiveSmallIntegerField('Оценка')
+    count = models.PositiveIntegerField('Число оценок', default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['title', 'score'], name='unique_title_score'
+            ),
+        ]
+        verbose_name = 'число оценок'
+        verbose_name_plural = 'гистограммы оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+
+class GenreLeaderboard(models.Model):
+    """Рейтинг произведения в каждом из его жанров.
+
+    Копия Title.rating по связям произведения с жанрами: по индексу
+    (genre, -rating) лучшие произведения жанра читаются без сортировки
+    всех его произведений.
+    """
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        related_name='leaderboard',
+        verbose_name='Жанр',)
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard',
+        verbose_name='Произведение',)
+    rating = models.FloatField('Рейтинг', blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['genre', 'title'], name='unique_genre_leaderboard'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['genre', '-rating', 'title'],
+                name='genre_leaderboard_idx'
+            ),
+        ]
+        verbose_name = 'рейтинг в жанре'
+        verbose_name_plural = 'рейтинги в жанрах'
+
+    def __str__(self):
+        return f'{self.genre_id}: {self.title_id}'
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
@@ -142,6 +257,12 @@ class Review(models.Model):
                 name='one_review_per_user'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = 'рецензия'
         verbose_name_plural = 'рецензии'
         ordering = ['-pub_date']
@@ -170,9 +291,152 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = 'комментаций'
         verbose_name_plural = 'комментарии'
         ordering = ['-pub_date']
 
     def __str__(self):
         return self.text[:20]
+
+
+class ImportCheckpoint(models.Model):
+    file = models.CharField('Файл', max_length=255, unique=True)
+    offset = models.BigIntegerField('Смещение, байт', default=0)
+    rows = models.PositiveIntegerField('Загружено строк', default=0)
+    rejected = models.PositiveIntegerField('Отклонено строк', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'контрольная точка импорта'
+        verbose_name_plural = 'контрольные точки импорта'
+
+    def __str__(self):
+        return self.file
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку.
+
+    Запрос только добавляет письмо в очередь, отправляет его команда
+    send_emails. `next_attempt` - время, после которого письмо можно
+    взять в работу: после неудачи оно сдвигается с нарастающей паузой.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.CharField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True, default='')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'], name='outbox_queue_idx'
+            ),
+        ]
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+    def message(self, connection=None):
+        return EmailMessage(
+            self.subject, self.body, self.from_email, [self.recipient],
+            connection=connection
+        )
+
+
+class SearchEntry(models.Model):
+    """Документ поискового индекса: произведение, отзыв или комментарий.
+
+    В PostgreSQL поиск идёт по `document` (tsvector), на других базах -
+    по таблице терминов SearchTerm. Ссылки на произведение и отзыв нужны
+    для адреса результата и удаляют записи индекса вместе с объектами.
+    """
+    TITLE = 'title'
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    KINDS = (
+        (TITLE, 'Произведение'),
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField('Идентификатор объекта')
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    review = models.ForeignKey(
+        Review,
+        verbose_name='Отзыв',
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    head = models.TextField('Заголовок', blank=True, default='')
+    body = models.TextField('Текст', blank=True, default='')
+    document = SearchVectorField('Поисковый вектор', null=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='one_search_entry_per_object'
+            ),
+        ]
+        verbose_name = 'документ поиска'
+        verbose_name_plural = 'документы поиска'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class SearchTerm(models.Model):
+    """Термин документа для поиска без PostgreSQL: `weight` - число
+    вхождений с удвоенным весом заголовка."""
+    entry = models.ForeignKey(
+        SearchEntry,
+        on_delete=models.CASCADE,
+        related_name='terms',
+    )
+    term = models.CharField('Термин', max_length=100)
+    weight = models.PositiveIntegerField('Вес', default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'entry'], name='search_term_idx'),
+        ]
+        verbose_name = 'термин поиска'
+        verbose_name_plural = 'термины поиска'
+
+    def __str__(self):
+        return self.term
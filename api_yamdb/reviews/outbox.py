@@ -0,0 +1,140 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF = datetime.timedelta(minutes=1)
+MAX_BACKOFF = datetime.timedelta(hours=1)
+# Аренда одного письма: продлевается перед отправкой каждого письма пачки.
+LEASE = datetime.timedelta(minutes=1)
+
+
+def enqueue(subject, body, recipient, from_email=None):
+    """Ставит письмо в очередь; отправится после фиксации транзакции."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+
+
+def backoff(attempts):
+    return min(BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def claim_batch(size=BATCH_SIZE):
+    """Берёт в работу до `size` писем, которым пора отправляться.
+
+    Взятым письмам `next_attempt` сдвигается на время аренды, поэтому
+    другие обработчики их не видят; если обработчик упадёт, письма
+    вернутся в очередь после окончания аренды. Где база поддерживает
+    SKIP LOCKED, параллельные обработчики не ждут блокировок друг друга.
+    """
+    now = timezone.now()
+    lease = now + LEASE
+    queue = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING, next_attempt__lte=now
+    ).order_by('next_attempt', 'pk')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queue = queue.select_for_update(skip_locked=True)
+        elif connection.features.has_select_for_update:
+            queue = queue.select_for_update()
+        batch = list(queue[:size])
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(next_attempt=lease)
+    for email in batch:
+        email.next_attempt = lease
+    return batch
+
+
+def renew_lease(emails, lease):
+    """Продлевает аренду `lease` писем пачки, которые ждут отправки.
+
+    Возвращает новую аренду и ключи писем, которые остались за
+    обработчиком. Письмо, аренда которого истекла и которое взял другой
+    обработчик, получило другой `next_attempt` и не продлевается.
+    """
+    renewed = timezone.now() + LEASE
+    pks = [email.pk for email in emails]
+    OutboxEmail.objects.filter(
+        pk__in=pks, status=OutboxEmail.PENDING, next_attempt=lease
+    ).update(next_attempt=renewed)
+    held = set(OutboxEmail.objects.filter(
+        pk__in=pks, next_attempt=renewed
+    ).values_list('pk', flat=True))
+    return renewed, held
+
+
+def mark_sent(email):
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status=OutboxEmail.SENT, sent=timezone.now(), last_error=''
+    )
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = repr(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+        logger.error('Письмо %s не отправлено: %r', email.pk, error)
+    else:
+        email.next_attempt = timezone.now() + backoff(email.attempts)
+    email.save(update_fields=('attempts', 'last_error', 'status',
+                              'next_attempt'))
+
+
+def deliver(batch, mail_connection):
+    """Отправляет письма через одно открытое соединение с почтовым
+    сервером, возвращает число отправленных.
+
+    Перед каждым письмом продлевается аренда оставшихся писем пачки,
+    а сразу после отправки письмо помечается отправленным, поэтому
+    аренда должна покрывать отправку одного письма, а не всей пачки.
+    После ошибки соединение закрывается и открывается заново для
+    следующего письма.
+    """
+    sent = 0
+    lease = batch[0].next_attempt if batch else None
+    for index, email in enumerate(batch):
+        lease, held = renew_lease(batch[index:], lease)
+        if email.pk not in held:
+            logger.warning('Аренда письма %s истекла, пропущено', email.pk)
+            continue
+        try:
+            mail_connection.open()
+            mail_connection.send_messages([email.message(mail_connection)])
+        except Exception as error:
+            close_quietly(mail_connection)
+            mark_failed(email, error)
+        else:
+            mark_sent(email)
+            sent += 1
+    return sent
+
+
+def close_quietly(mail_connection):
+    try:
+        mail_connection.close()
+    except Exception:
+        logger.exception('Не удалось закрыть соединение с почтовым сервером')
+
+
+def send_pending(batch_size=BATCH_SIZE, mail_connection=None):
+    """Отправляет одну пачку писем, возвращает (взято, отправлено)."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    mail_connection = mail_connection or get_connection()
+    return len(batch), deliver(batch, mail_connection)
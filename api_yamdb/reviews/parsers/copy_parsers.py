@@ -0,0 +1,245 @@
+import csv
+import io
+import os
+import re
+
+from django.db import connection, transaction
+
+from .csv_parsers import ImportStats, get_checkpoint
+
+TEXT_TYPES = ('CharField', 'SlugField', 'TextField')
+# Значения, которые заведомо приводятся к типу без вызова функции.
+CAST_PATTERNS = {
+    'smallint': r'^[-+]?\d{1,4}$',
+    'integer': r'^[-+]?\d{1,9}$',
+    'bigint': r'^[-+]?\d{1,18}$',
+}
+
+
+def typed_fields(table):
+    """Поля модели для столбцов файла, значения которых приводятся
+    к типу поля: {столбец: поле}."""
+    fields = {
+        field.attname: field
+        for field in table.model._meta.local_concrete_fields
+    }
+    return {
+        column: fields[column] for column in table.columns
+        if fields[column].get_internal_type() not in TEXT_TYPES
+    }
+
+
+def castable_function(db_type):
+    return 'pg_temp.castable_' + re.sub(r'\W+', '_', db_type)
+
+
+def create_cast_functions(cursor, table):
+    """Временные функции проверки значения: приводится ли текст к типу.
+
+    Исключение приведения в PL/pgSQL откатывает только вложенную
+    транзакцию функции, а не загрузку файла.
+    """
+    db_types = {
+        field.cast_db_type(connection)
+        for field in typed_fields(table).values()
+    }
+    for db_type in sorted(db_types):
+        cursor.execute(
+            f'CREATE OR REPLACE FUNCTION {castable_function(db_type)}'
+            f'(value text) RETURNS boolean AS $$ BEGIN '
+            f'PERFORM CAST(value AS {db_type}); RETURN TRUE; '
+            f'EXCEPTION WHEN data_exception THEN RETURN FALSE; '
+            f'END $$ LANGUAGE plpgsql'
+        )
+
+
+def values_condition(table):
+    """Условие SQL: все значения строки приводятся к типам полей модели,
+    пустые - только в полях, допускающих NULL."""
+    qn = connection.ops.quote_name
+    conditions = []
+    for column, field in typed_fields(table).items():
+        source = f's.{qn(column)}'
+        db_type = field.cast_db_type(connection)
+        check = f'{castable_function(db_type)}({source})'
+        if db_type in CAST_PATTERNS:
+            check = (
+                f"CASE WHEN {source} ~ '{CAST_PATTERNS[db_type]}' "
+                f'THEN TRUE ELSE {check} END'
+            )
+        empty = 'TRUE' if field.null else 'FALSE'
+        conditions.append(
+            f"CASE WHEN {source} = '' THEN {empty} ELSE {check} END"
+        )
+    return ' AND '.join(conditions) or 'TRUE'
+
+
+def accepted_condition(table):
+    """Условие SQL для строк, которые попадут в таблицу модели. Внешние
+    ключи приводятся к числу только в строках с корректными значениями."""
+    return (
+        f'CASE WHEN {values_condition(table)} '
+        f'THEN {foreign_keys_condition(table)} ELSE FALSE END'
+    )
+
+
+def merge_sql(table, staging):
+    """Строит INSERT ... SELECT из промежуточной таблицы в таблицу модели.
+
+    Поля, которых нет в файле, заполняются значениями по умолчанию модели,
+    строки с некорректными значениями и несуществующими внешними ключами
+    отбрасываются.
+    """
+    qn = connection.ops.quote_name
+    columns, values, params = [], [], []
+    for field in table.model._meta.local_concrete_fields:
+        columns.append(qn(field.column))
+        if field.attname not in table.columns:
+            values.append('%s')
+            params.append(
+                field.get_db_prep_save(field.get_default(), connection)
+            )
+            continue
+        source = f's.{qn(field.attname)}'
+        if field.get_internal_type() not in TEXT_TYPES:
+            source = (
+                f"CAST(NULLIF({source}, '') AS "
+                f"{field.cast_db_type(connection)})"
+            )
+        values.append(source)
+    sql = (
+        f'INSERT INTO {qn(table.model._meta.db_table)} '
+        f'({", ".join(columns)}) '
+        f'SELECT {", ".join(values)} FROM {qn(staging)} s '
+        f'WHERE {accepted_condition(table)} ON CONFLICT DO NOTHING'
+    )
+    return sql, params
+
+
+def foreign_keys_condition(table):
+    """Условие SQL: внешние ключи строки ссылаются на существующие
+    записи; пустой ключ допустим, если поле допускает NULL."""
+    qn = connection.ops.quote_name
+    conditions = []
+    for column, model in table.foreign_keys.items():
+        source = f's.{qn(column)}'
+        condition = (
+            f"CAST(NULLIF({source}, '') AS integer) IN "
+            f'(SELECT {qn(model._meta.pk.column)} '
+            f'FROM {qn(model._meta.db_table)})'
+        )
+        if table.model._meta.get_field(column).null:
+            condition = f"({source} = '' OR {condition})"
+        conditions.append(condition)
+    return ' AND '.join(conditions) or 'TRUE'
+
+
+def write_rejected(cursor, table, staging, rejects):
+    qn = connection.ops.quote_name
+    columns = ', '.join(f's.{qn(column)}' for column in table.columns)
+    cursor.execute(
+        f'SELECT s.row_number, {values_condition(table)}, {columns} '
+        f'FROM {qn(staging)} s '
+        f'WHERE ({accepted_condition(table)}) IS NOT TRUE '
+        f'ORDER BY s.row_number'
+    )
+    for number, valid, *row in cursor.fetchall():
+        rejects.write(
+            table.file, number,
+            'внешний ключ не найден в базе данных' if valid
+            else 'значение не приводится к типу поля',
+            row
+        )
+
+
+class StagingRows(io.TextIOBase):
+    """CSV-файл для COPY: номер строки данных и её значения.
+
+    Строки с числом столбцов, отличным от `table.columns`, COPY прервал
+    бы целиком, поэтому они отклоняются здесь, при чтении.
+    """
+
+    def __init__(self, table, f, rejects=None):
+        self.table = table
+        self.rows = enumerate(csv.reader(f), 0)
+        next(self.rows, None)
+        self.rejects = rejects
+        self.rejected = 0
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator='\n')
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        for number, row in self.rows:
+            if len(row) == len(self.table.columns):
+                self.writer.writerow((number, *row))
+            else:
+                self.reject(number, row)
+            if 0 <= size <= self.buffer.tell():
+                break
+        try:
+            return self.buffer.getvalue()
+        finally:
+            self.buffer.seek(0)
+            self.buffer.truncate()
+
+    def reject(self, number, row):
+        self.rejected += 1
+        if self.rejects is not None:
+            self.rejects.write(
+                self.table.file, number,
+                f'Ожидалось столбцов: {len(self.table.columns)}, '
+                f'получено: {len(row)}',
+                row
+            )
+
+
+def copy_table(table, path, resume=False, rejects=None):
+    """Загружает CSV-файл через COPY FROM STDIN во временную таблицу
+    и переносит строки в таблицу модели одним INSERT ... SELECT.
+
+    Файл загружается целиком в одной транзакции вместе с контрольной
+    точкой; с `resume` уже загруженные файлы пропускаются. Некорректные
+    строки отклоняются и не прерывают загрузку. Работает только
+    с PostgreSQL.
+    """
+    qn = connection.ops.quote_name
+    file = os.path.abspath(os.path.join(path, table.file))
+    checkpoint = get_checkpoint(file, resume)
+    stats = ImportStats(table.file)
+    size = os.path.getsize(file)
+    if checkpoint.offset == size:
+        stats.finish()
+        return stats
+    staging = f'staging_{table.model._meta.db_table}'
+    columns = ', '.join(qn(column) for column in table.columns)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {qn(staging)} (row_number integer, '
+            f'{", ".join(f"{qn(c)} text" for c in table.columns)}) '
+            'ON COMMIT DROP'
+        )
+        create_cast_functions(cursor, table)
+        with open(file, encoding='utf-8', newline='') as f:
+            rows = StagingRows(table, f, rejects)
+            cursor.cursor.copy_expert(
+                f'COPY {qn(staging)} (row_number, {columns}) FROM STDIN '
+                f'WITH (FORMAT csv, FORCE_NOT_NULL ({columns}))',
+                rows
+            )
+        cursor.execute(
+            f'SELECT count(*), count(*) FILTER '
+            f'(WHERE {accepted_condition(table)}) FROM {qn(staging)} s'
+        )
+        staged, stats.rows = cursor.fetchone()
+        stats.rejected = staged - stats.rows + rows.rejected
+        if rejects is not None and staged > stats.rows:
+            write_rejected(cursor, table, staging, rejects)
+        cursor.execute(*merge_sql(table, staging))
+        checkpoint.offset = size
+        checkpoint.rows, checkpoint.rejected = stats.rows, stats.rejected
+        checkpoint.save()
+    stats.finish()
+    return stats
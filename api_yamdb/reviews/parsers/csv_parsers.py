@@ -1,100 +1,379 @@
 import csv
+import os
+import threading
+import time
 
-from ..models import Category, Comment, Genre, Review, Title, User
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
+from ..models import (Category, Comment, Genre, ImportCheckpoint, Review,
+                      Title, User)
 
-def user_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            _, created = User.objects.get_or_create(
-                id=int(row[0]),
-                username=row[1],
-                email=row[2],
-                role=row[3],
-                bio=row[4],
-                first_name=row[5],
-                last_name=row[6],
-            )
+CHUNK_SIZE = 1000
 
 
-def category_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            _, created = Category.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                slug=row[2],
-            )
+def parse_date(value):
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Некорректная дата: {value}')
+    if not settings.USE_TZ and timezone.is_aware(date):
+        return timezone.make_naive(date)
+    return date
 
 
-def genre_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            _, created = Genre.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                slug=row[2],
+def optional(convert):
+    """Преобразование значения, для которого пустая строка - NULL."""
+    def convert_optional(value):
+        return None if value == '' else convert(value)
+
+    return convert_optional
+
+
+class CsvTable:
+    """Соответствие CSV-файла модели.
+
+    `columns` - имена полей модели (attname) в порядке столбцов файла,
+    `header` - заголовок файла, если он отличается от `columns`,
+    `foreign_keys` - модели, на которые ссылаются столбцы-внешние ключи.
+    """
+
+    def __init__(self, file, model, columns, converters=None,
+                 foreign_keys=None, header=None):
+        self.file = file
+        self.model = model
+        self.columns = columns
+        self.converters = converters or {}
+        self.foreign_keys = foreign_keys or {}
+        self.header = header or columns
+
+    @property
+    def name(self):
+        return os.path.splitext(self.file)[0]
+
+    @cached_property
+    def checked_fields(self):
+        """Поля файла, значения которых проверяются проверками поля модели.
+        Внешние ключи проверяются по known_ids без запросов."""
+        return [
+            field for field in self.model._meta.fields
+            if field.attname in self.columns and not field.is_relation
+        ]
+
+    def check_values(self, obj):
+        """Проверяет непустые значения объекта, как clean_fields: длину,
+        валидаторы и варианты. Пустые значения база данных принимает."""
+        errors = []
+        for field in self.checked_fields:
+            value = getattr(obj, field.attname)
+            if value in field.empty_values:
+                continue
+            try:
+                field.clean(value, obj)
+            except ValidationError as error:
+                errors.append(f'{field.name}: {" ".join(error.messages)}')
+        if errors:
+            raise ValueError('; '.join(errors))
+
+    def build(self, row, known_ids):
+        """Создаёт объект модели из строки файла.
+
+        Бросает ValueError, если строка некорректна, не проходит проверки
+        полей модели (длина, валидаторы, варианты) или ссылается
+        на несуществующие записи.
+        """
+        if len(row) != len(self.columns):
+            raise ValueError(
+                f'Ожидалось столбцов: {len(self.columns)}, '
+                f'получено: {len(row)}'
             )
+        values = {
+            column: self.converters.get(column, str)(value)
+            for column, value in zip(self.columns, row)
+        }
+        for column, ids in known_ids.items():
+            if values[column] is not None and values[column] not in ids:
+                raise ValueError(
+                    f'{column}={values[column]} не найден в базе данных'
+                )
+        obj = self.model(**values)
+        self.check_values(obj)
+        return obj
+
+
+TABLES = (
+    CsvTable(
+        'users.csv', User,
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        converters={'id': int},
+    ),
+    CsvTable(
+        'category.csv', Category, ('id', 'name', 'slug'),
+        converters={'id': int},
+    ),
+    CsvTable(
+        'genre.csv', Genre, ('id', 'name', 'slug'),
+        converters={'id': int},
+    ),
+    CsvTable(
+        'titles.csv', Title, ('id', 'name', 'year', 'category_id'),
+        converters={'id': int, 'year': int, 'category_id': optional(int)},
+        foreign_keys={'category_id': Category},
+        header=('id', 'name', 'year', 'category'),
+    ),
+    CsvTable(
+        'review.csv', Review,
+        ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date'),
+        converters={'id': int, 'title_id': int, 'author_id': int,
+                    'score': int, 'pub_date': parse_date},
+        foreign_keys={'title_id': Title, 'author_id': User},
+        header=('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    ),
+    CsvTable(
+        'comments.csv', Comment,
+        ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+        converters={'id': int, 'review_id': int, 'author_id': int,
+                    'pub_date': parse_date},
+        foreign_keys={'review_id': Review, 'author_id': User},
+        header=('id', 'review_id', 'text', 'author', 'pub_date'),
+    ),
+    CsvTable(
+        'genre_title.csv', Title.genre.through,
+        ('id', 'title_id', 'genre_id'),
+        converters={'id': int, 'title_id': int, 'genre_id': int},
+        foreign_keys={'title_id': Title, 'genre_id': Genre},
+    ),
+)
+
+
+class IdMaps:
+    """Множества существующих первичных ключей для проверки внешних
+    ключей без запроса на каждую строку.
+
+    Множество для модели строится один раз при первом обращении, то есть
+    после загрузки файла самой модели. Объект можно разделять между
+    потоками загрузки.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, model):
+        with self._lock:
+            if model not in self._ids:
+                self._ids[model] = set(
+                    model.objects.values_list('pk', flat=True).iterator()
+                )
+            return self._ids[model]
+
+    def remember(self, model, ids):
+        """Добавляет ключи строк, которые были бы записаны: при проверке
+        без записи они нужны для проверки зависимых файлов."""
+        known = self.get(model)
+        with self._lock:
+            known.update(ids)
+
+
+class ImportStats:
+    def __init__(self, file):
+        self.file = file
+        self.rows = 0
+        self.rejected = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
 
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
 
-def title_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.file}: {self.rows} строк за {self.elapsed:.2f} с '
+            f'({self.rate:.0f} строк/с), отклонено: {self.rejected}'
+        )
+
+
+class RejectedRows:
+    """CSV-файл отклонённых строк: исходный файл, номер строки данных,
+    причина и значения строки. Запись безопасна из нескольких потоков."""
+
+    def __init__(self, file):
+        self._file = open(file, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(('file', 'row', 'reason', 'values'))
+        self._lock = threading.Lock()
+
+    def write(self, file, number, reason, row):
+        with self._lock:
+            self._writer.writerow((file, number, reason, *row))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE, offset=0):
+    """Читает CSV-файл без заголовка пачками по `chunk_size` строк.
+
+    Вместе с пачкой возвращает смещение в байтах сразу за её последней
+    строкой; с этого смещения чтение можно продолжить.
+    """
+    with open(file, 'rb') as f:
+        reader = csv.reader(
+            line.decode('utf-8') for line in iter(f.readline, b'')
+        )
+        if offset:
+            f.seek(offset)
+        else:
+            next(reader, None)
+        chunk = []
         for row in reader:
-            category = Category.objects.get(pk=int(row[3]))
-            _, created = Title.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                year=int(row[2]),
-                category=category,
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk, f.tell()
+                chunk = []
+        if chunk:
+            yield chunk, f.tell()
+
+
+def get_checkpoint(file, resume):
+    """Контрольная точка файла; без `resume` загрузка начинается заново."""
+    checkpoint = (
+        ImportCheckpoint.objects.filter(file=file).first()
+        or ImportCheckpoint(file=file)
+    )
+    if not resume:
+        checkpoint.offset = checkpoint.rows = checkpoint.rejected = 0
+    return checkpoint
+
+
+def bulk_insert(model, objs, batch_size=CHUNK_SIZE, ignore_conflicts=False):
+    """Вставляет объекты пачками, как bulk_create, но без pre_save полей,
+    как loaddata: даты auto_now_add берутся из объектов.
+
+    Поля модели общие для всех потоков процесса, поэтому auto_now_add
+    у них не отключается: сохранения в других потоках получают дату
+    по умолчанию.
+    """
+    opts = model._meta
+    objs = list(objs)
+    groups = (
+        ([obj for obj in objs if obj.pk is not None], opts.concrete_fields),
+        ([obj for obj in objs if obj.pk is None],
+         [field for field in opts.concrete_fields if field is not opts.pk]),
+    )
+    for group, fields in groups:
+        size = min(
+            batch_size, max(connection.ops.bulk_batch_size(fields, group), 1)
+        )
+        for start in range(0, len(group), size):
+            model._base_manager._insert(
+                group[start:start + size], fields=fields, raw=True,
+                ignore_conflicts=ignore_conflicts
             )
+    return objs
 
 
-def review_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            title = Title.objects.get(pk=int(row[1]))
-            author = User.objects.get(pk=int(row[3]))
-            _, created = Review.objects.get_or_create(
-                id=int(row[0]),
-                title=title,
-                text=row[2],
-                author=author,
-                score=int(row[4]),
-                pub_date=row[5],
+def build_objects(table, chunk, known_ids, first_row, rejects=None):
+    """Объекты корректных строк пачки: (номер строки, строка, объект)."""
+    built = []
+    for number, row in enumerate(chunk, first_row):
+        try:
+            built.append((number, row, table.build(row, known_ids)))
+        except ValueError as error:
+            if rejects is not None:
+                rejects.write(table.file, number, error, row)
+    return built
+
+
+def insert_objects(table, built, chunk_size=CHUNK_SIZE, rejects=None):
+    """Вставляет объекты пачки и возвращает число отклонённых строк.
+
+    Если база данных отвергает пачку целиком (нарушено ограничение, которое
+    не проверяется при разборе строк), строки вставляются по одной, и
+    отвергнутые отклоняются; иначе повтор с `resume` падал бы на той же
+    пачке.
+    """
+    try:
+        with transaction.atomic():
+            bulk_insert(
+                table.model, [obj for *_, obj in built],
+                batch_size=chunk_size, ignore_conflicts=True
             )
+        return 0
+    except (DataError, IntegrityError):
+        pass
+    rejected = 0
+    for number, row, obj in built:
+        try:
+            with transaction.atomic():
+                bulk_insert(table.model, [obj], ignore_conflicts=True)
+        except (DataError, IntegrityError) as error:
+            rejected += 1
+            if rejects is not None:
+                rejects.write(table.file, number, error, row)
+    return rejected
 
 
-def comment_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            review = Review.objects.get(pk=int(row[1]))
-            author = User.objects.get(pk=int(row[3]))
-            _, created = Comment.objects.get_or_create(
-                id=int(row[0]),
-                review=review,
-                text=row[2],
-                author=author,
-                pub_date=row[4],
+def import_table(table, path, chunk_size=CHUNK_SIZE, id_maps=None,
+                 resume=False, dry_run=False, rejects=None):
+    """Загружает CSV-файл пачками через bulk_insert.
+
+    Уже существующие записи пропускаются, поэтому повторный запуск
+    безопасен. Память не зависит от размера файла: в ней находится
+    только текущая пачка и множества ключей связанных таблиц.
+
+    Каждая пачка записывается в одной транзакции с контрольной точкой,
+    поэтому с `resume` загрузка продолжается с первой незаписанной пачки.
+    С `dry_run` строки только проверяются.
+    """
+    file = os.path.abspath(os.path.join(path, table.file))
+    id_maps = id_maps or IdMaps()
+    known_ids = {
+        column: id_maps.get(model)
+        for column, model in table.foreign_keys.items()
+    }
+    checkpoint = get_checkpoint(file, resume)
+    stats = ImportStats(table.file)
+    for chunk, offset in read_chunks(file, chunk_size, checkpoint.offset):
+        built = build_objects(
+            table, chunk, known_ids,
+            checkpoint.rows + checkpoint.rejected + 1, rejects
+        )
+        if dry_run:
+            id_maps.remember(table.model, (obj.pk for *_, obj in built))
+        with transaction.atomic():
+            rows = len(built) if dry_run else len(built) - insert_objects(
+                table, built, chunk_size, rejects
             )
+            checkpoint.offset = offset
+            checkpoint.rows += rows
+            checkpoint.rejected += len(chunk) - rows
+            if not dry_run:
+                checkpoint.save()
+        stats.rows += rows
+        stats.rejected += len(chunk) - rows
+    stats.finish()
+    return stats
 
 
-def genre_title_parser(file):
-    with open(file) as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            title = Title.objects.get(pk=int(row[1]))
-            genre = Genre.objects.get(pk=int(row[2]))
-            title.genre.add(genre)
+def reset_sequences(models):
+    """Сдвигает последовательности первичных ключей за максимальный id:
+    после вставки с явными ключами они остаются в начальном положении."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
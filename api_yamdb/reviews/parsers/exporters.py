@@ -0,0 +1,68 @@
+import csv
+import datetime
+import io
+import json
+
+from .csv_parsers import CHUNK_SIZE, TABLES
+
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+def export_queryset(table):
+    """Строки таблицы в порядке первичного ключа: кортежи значений
+    столбцов `table.columns`."""
+    return table.model.objects.order_by('pk').values_list(*table.columns)
+
+
+def rows(queryset, chunk_size=CHUNK_SIZE):
+    """Строки queryset через курсор на сервере (где он поддерживается):
+    в памяти находится не больше `chunk_size` строк."""
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def format_value(value):
+    if not isinstance(value, datetime.datetime):
+        return value
+    text = value.isoformat()
+    if text.endswith('+00:00'):
+        return text[:-6] + 'Z'
+    return text
+
+
+def csv_chunks(table, queryset, chunk_size=CHUNK_SIZE):
+    """CSV-файл в формате, который читает import_data, пачками байтов
+    по `chunk_size` строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(table.header)
+    for number, row in enumerate(rows(queryset, chunk_size), 1):
+        writer.writerow(
+            '' if value is None else format_value(value) for value in row
+        )
+        if number % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(table, queryset, chunk_size=CHUNK_SIZE):
+    """Строки таблицы объектами JSON с ключами из заголовка CSV-файла,
+    по объекту на строку."""
+    lines = []
+    for row in rows(queryset, chunk_size):
+        lines.append(json.dumps(
+            dict(zip(table.header, map(format_value, row))),
+            ensure_ascii=False
+        ))
+        if len(lines) == chunk_size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', csv_chunks),
+    'ndjson': ('application/x-ndjson', ndjson_chunks),
+}
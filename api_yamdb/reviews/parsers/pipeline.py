@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import connection
+
+
+def table_dependencies(tables):
+    """Граф зависимостей файлов: таблица зависит от таблиц моделей,
+    на которые ссылаются её внешние ключи."""
+    by_model = {table.model: table for table in tables}
+    return {
+        table: {
+            by_model[model] for model in table.foreign_keys.values()
+            if model in by_model
+        }
+        for table in tables
+    }
+
+
+def ready_tables(dependencies, done, pending):
+    return [table for table in pending if dependencies[table] <= done]
+
+
+def load_in_thread(load, table):
+    """Загружает таблицу в рабочем потоке; у каждого потока своё
+    соединение с базой, которое закрывается после загрузки."""
+    try:
+        return load(table)
+    finally:
+        connection.close()
+
+
+def run_pipeline(tables, load, jobs=1):
+    """Вызывает load(table) для всех таблиц так, чтобы таблица
+    загружалась только после таблиц, от которых зависит.
+
+    Независимые таблицы загружаются параллельно в `jobs` потоках.
+    Возвращает результаты load в порядке завершения.
+    """
+    dependencies = table_dependencies(tables)
+    pending, done, results = list(tables), set(), []
+    if jobs == 1:
+        while pending:
+            ready = ready_tables(dependencies, done, pending)
+            if not ready:
+                raise ValueError('Циклическая зависимость между CSV-файлами')
+            for table in ready:
+                results.append(load(table))
+                pending.remove(table)
+                done.add(table)
+        return results
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for table in ready_tables(dependencies, done, pending):
+                pending.remove(table)
+                future = executor.submit(load_in_thread, load, table)
+                running[future] = table
+            if not running:
+                raise ValueError('Циклическая зависимость между CSV-файлами')
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results.append(future.result())
+                done.add(running.pop(future))
+    return results
+
+
+def timing_report(results, started):
+    """Таблица с временем начала и длительностью каждого этапа."""
+    lines = [
+        f'{"Файл":<16}{"Начало, с":>11}{"Время, с":>10}'
+        f'{"Строк":>9}{"Строк/с":>10}{"Отклонено":>11}'
+    ]
+    for stats in sorted(results, key=lambda stats: stats.started):
+        lines.append(
+            f'{stats.file:<16}{stats.started - started:>11.2f}'
+            f'{stats.elapsed:>10.2f}{stats.rows:>9}{stats.rate:>10.0f}'
+            f'{stats.rejected:>11}'
+        )
+    total = time.monotonic() - started
+    busy = sum(stats.elapsed for stats in results)
+    lines.append(
+        f'Всего: {total:.2f} с, суммарное время этапов: {busy:.2f} с'
+    )
+    return '\n'.join(lines)
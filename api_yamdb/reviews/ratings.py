@@ -0,0 +1,147 @@
+from collections import Counter
+
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+
+from .models import GenreLeaderboard, Review, Title, TitleScoreCount
+
+SCORES = range(1, 11)
+
+
+def update_rating(title_id, score_delta, count_delta):
+    """Сдвигает хранимые агрегаты рейтинга произведения.
+
+    Выполняется одним UPDATE, поэтому безопасна при конкурентных отзывах
+    и должна вызываться в той же транзакции, что и изменение отзыва.
+    """
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=Case(
+            When(rating_count=-count_delta, then=Value(None)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def count_scores(title_id, added=(), removed=()):
+    """Сдвигает гистограмму оценок произведения.
+
+    Строка оценки создаётся при первом её появлении. Конкурентные вызовы
+    для одного произведения упорядочивает блокировка строки произведения
+    в update_rating, поэтому функция вызывается после неё.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    for score, delta in deltas.items():
+        if not delta:
+            continue
+        updated = TitleScoreCount.objects.filter(
+            title_id=title_id, score=score
+        ).update(count=F('count') + delta)
+        if not updated and delta > 0:
+            TitleScoreCount.objects.create(
+                title_id=title_id, score=score, count=delta
+            )
+
+
+def record_scores(title_id, added=(), removed=()):
+    """Учитывает добавленные и удалённые оценки произведения в рейтинге,
+    гистограмме и таблице лидеров жанров.
+
+    Вызывается в транзакции изменения отзывов.
+    """
+    update_rating(
+        title_id, sum(added) - sum(removed), len(added) - len(removed)
+    )
+    count_scores(title_id, added, removed)
+    GenreLeaderboard.objects.filter(title_id=title_id).update(
+        rating=Subquery(Title.objects.filter(pk=title_id).values('rating'))
+    )
+
+
+def sync_genres(**lookup):
+    """Перестраивает строки таблицы лидеров для связей произведений
+    с жанрами, выбранных `lookup` (title_id__in=..., genre_id=...)."""
+    GenreLeaderboard.objects.filter(**lookup).delete()
+    GenreLeaderboard.objects.bulk_create(
+        GenreLeaderboard(genre_id=genre_id, title_id=title_id, rating=rating)
+        for genre_id, title_id, rating in Title.genre.through.objects.filter(
+            **lookup
+        ).values_list('genre_id', 'title_id', 'title__rating').iterator()
+    )
+
+
+def score_histogram(title_id):
+    """Число оценок от 1 до 10 у произведения."""
+    counts = dict(
+        TitleScoreCount.objects.filter(
+            title_id=title_id
+        ).values_list('score', 'count')
+    )
+    return {str(score): counts.get(score, 0) for score in SCORES}
+
+
+def top_titles(queryset, limit, genre=None, category=None):
+    """Первые `limit` произведений queryset с наибольшим рейтингом:
+    всего, в жанре или в категории (по slug).
+
+    Читаются по индексам рейтинга без сортировки всех произведений:
+    для жанра - по таблице лидеров жанров.
+    """
+    queryset = queryset.filter(rating__isnull=False)
+    if genre is None:
+        if category is not None:
+            queryset = queryset.filter(category__slug=category)
+        return list(queryset.order_by('-rating', 'id')[:limit])
+    ids = list(
+        GenreLeaderboard.objects.filter(
+            genre__slug=genre, rating__isnull=False
+        ).order_by('-rating', 'title_id').values_list(
+            'title_id', flat=True
+        )[:limit]
+    )
+    titles = queryset.in_bulk(ids)
+    return [titles[pk] for pk in ids if pk in titles]
+
+
+def rebuild_ratings(title_ids=None):
+    """Пересчитывает с нуля агрегаты рейтинга произведений `title_ids`
+    (по умолчанию всех), гистограммы оценок и таблицу лидеров жанров.
+    Возвращает число произведений и строк гистограмм."""
+    titles, lookup = Title.objects.all(), {}
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+        lookup = {'title_id__in': title_ids}
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    updated = titles.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0
+        ),
+        rating=Subquery(
+            reviews.annotate(avg=Avg('score')).values('avg'),
+            output_field=FloatField()
+        ),
+    )
+    TitleScoreCount.objects.filter(**lookup).delete()
+    counts = TitleScoreCount.objects.bulk_create(
+        TitleScoreCount(title_id=title_id, score=score, count=count)
+        for title_id, score, count in Review.objects.filter(
+            **lookup
+        ).order_by().values('title_id', 'score').annotate(
+            count=Count('id')
+        ).values_list('title_id', 'score', 'count').iterator()
+    )
+    sync_genres(**lookup)
+    return updated, len(counts)
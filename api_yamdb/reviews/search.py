@@ -0,0 +1,180 @@
+import re
+from collections import Counter
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, SearchVectorField)
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.expressions import CombinedExpression
+
+from .models import Comment, Review, SearchEntry, SearchTerm, Title
+
+CONFIGS = ('russian', 'english')
+CHUNK_SIZE = 1000
+TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+WORD = re.compile(r'\w+')
+
+
+def use_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def document_vector():
+    """tsvector документа: заголовок с весом A, текст с весом B,
+    каждый в русской и английской конфигурациях.
+
+    SearchVector с разными конфигурациями нельзя сложить оператором +,
+    поэтому векторы объединяются через || напрямую.
+    """
+    vectors = [
+        SearchVector(field, config=config, weight=weight)
+        for field, weight in (('head', 'A'), ('body', 'B'))
+        for config in CONFIGS
+    ]
+    vector = vectors[0]
+    for other in vectors[1:]:
+        vector = CombinedExpression(
+            vector, '||', other, output_field=SearchVectorField()
+        )
+    return vector
+
+
+def tokenize(text):
+    return [
+        word[:TERM_LENGTH].replace('ё', 'е')
+        for word in WORD.findall(text.casefold())
+    ]
+
+
+def term_weights(head, body):
+    """Вес терминов документа: слово заголовка весит вдвое больше."""
+    weights = Counter(tokenize(body))
+    for word in tokenize(head):
+        weights[word] += 2
+    return weights
+
+
+def entry_terms(entry):
+    return [
+        SearchTerm(entry=entry, term=term, weight=weight)
+        for term, weight in term_weights(entry.head, entry.body).items()
+    ]
+
+
+def title_entry(title):
+    return SearchEntry(
+        kind=SearchEntry.TITLE, object_id=title.pk, title_id=title.pk,
+        head=title.name, body=title.description
+    )
+
+
+def review_entry(review):
+    return SearchEntry(
+        kind=SearchEntry.REVIEW, object_id=review.pk,
+        title_id=review.title_id, review_id=review.pk, body=review.text
+    )
+
+
+def comment_entry(comment):
+    return SearchEntry(
+        kind=SearchEntry.COMMENT, object_id=comment.pk,
+        title_id=comment.review.title_id, review_id=comment.review_id,
+        body=comment.text
+    )
+
+
+SOURCES = (
+    (SearchEntry.TITLE, Title.objects.all(), title_entry),
+    (SearchEntry.REVIEW, Review.objects.all(), review_entry),
+    (SearchEntry.COMMENT, Comment.objects.select_related('review'),
+     comment_entry),
+)
+ENTRIES = {queryset.model: (kind, build) for kind, queryset, build in SOURCES}
+
+
+def index_entries(entries):
+    """Строит поисковые данные для уже сохранённых записей индекса."""
+    if use_postgres():
+        SearchEntry.objects.filter(
+            pk__in=[entry.pk for entry in entries]
+        ).update(document=document_vector())
+        return
+    SearchTerm.objects.bulk_create(
+        [term for entry in entries for term in entry_terms(entry)]
+    )
+
+
+def index_object(obj):
+    """Добавляет или обновляет произведение, отзыв или комментарий."""
+    _, build = ENTRIES[type(obj)]
+    entry = build(obj)
+    with transaction.atomic():
+        remove_object(obj)
+        entry.save()
+        index_entries([entry])
+
+
+def index_objects(objs):
+    """Добавляет или обновляет пачку объектов одной модели."""
+    if not objs:
+        return
+    kind, build = ENTRIES[type(objs[0])]
+    ids = [obj.pk for obj in objs]
+    with transaction.atomic():
+        SearchEntry.objects.filter(kind=kind, object_id__in=ids).delete()
+        SearchEntry.objects.bulk_create(build(obj) for obj in objs)
+        index_entries(
+            list(SearchEntry.objects.filter(kind=kind, object_id__in=ids))
+        )
+
+
+def remove_object(obj):
+    kind, _ = ENTRIES[type(obj)]
+    SearchEntry.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+def chunks(iterable, size=CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild_index(chunk_size=CHUNK_SIZE):
+    """Перестраивает поисковый индекс, возвращает число записей.
+
+    Записи заменяются пачками по `chunk_size` объектов, каждая в своей
+    транзакции, поэтому перестроение не держит одну долгую транзакцию,
+    а поиск во время него находит все документы. Записи удалённых
+    в обход сигналов объектов удаляются в конце.
+    """
+    indexed = 0
+    for kind, queryset, _ in SOURCES:
+        for chunk in chunks(queryset.order_by('pk').iterator(), chunk_size):
+            index_objects(chunk)
+            indexed += len(chunk)
+        SearchEntry.objects.filter(kind=kind).exclude(
+            object_id__in=queryset.model.objects.values('pk')
+        ).delete()
+    return indexed
+
+
+def search(text):
+    """Записи индекса, содержащие все слова запроса, по убыванию
+    релевантности (аннотация `rank`)."""
+    if use_postgres():
+        query = SearchQuery(text, config=CONFIGS[0])
+        for config in CONFIGS[1:]:
+            query = query | SearchQuery(text, config=config)
+        return SearchEntry.objects.filter(document=query).annotate(
+            rank=SearchRank(F('document'), query)
+        ).order_by('-rank', 'pk')
+    terms = set(tokenize(text))
+    return SearchEntry.objects.filter(terms__term__in=terms).annotate(
+        matched=Count('terms__term', distinct=True),
+        rank=Sum('terms__weight'),
+    ).filter(matched=len(terms)).order_by('-rank', 'pk')
@@ -0,0 +1,54 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .models import Comment, Review, Title, User
+from .ratings import rebuild_ratings, sync_genres
+from .search import index_object, remove_object
+
+# Данные изменены в обход сигналов моделей: загрузка из файлов, пересчёт
+# рейтингов или поискового индекса. Отправляется после фиксации изменений.
+data_reloaded = Signal()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def searchable_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        sync_genres(genre_id=instance.pk)
+    else:
+        sync_genres(title_id=instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def author_deleting(sender, instance, **kwargs):
+    """Запоминает произведения, отзывы к которым удалятся вместе
+    с пользователем."""
+    instance.reviewed_titles = list(
+        Review.objects.filter(author=instance).order_by().values_list(
+            'title_id', flat=True
+        ).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def author_deleted(sender, instance, **kwargs):
+    """Пересчитывает рейтинги произведений без удалённых каскадом
+    отзывов пользователя: ReviewViewSet их не видит."""
+    title_ids = getattr(instance, 'reviewed_titles', None)
+    if title_ids:
+        rebuild_ratings(title_ids)
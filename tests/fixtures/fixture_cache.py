@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def api_cache(settings):
+    """Кеш ответов включён и в тестах хранится в памяти процесса."""
+    from api.authentication import users, versions
+    from api.cache import get_cache
+
+    settings.API_CACHE_ENABLED = True
+    cache = get_cache()
+    all_caches = (cache, users, versions)
+    for each in all_caches:
+        each.clear()
+    yield cache
+    for each in all_caches:
+        each.clear()
@@ -0,0 +1,56 @@
+import pytest
+
+
+def create_catalog(size):
+    """Создаёт по `size` произведений, отзывов к первому произведению и
+    комментариев к первому отзыву, чтобы страницы списков были полными."""
+    from reviews.models import (Category, Comment, Genre, Review, Title,
+                                User)
+    from reviews.ratings import rebuild_ratings
+
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(2)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    authors = [
+        User.objects.create(
+            username=f'author_{i}', email=f'author_{i}@yamdb.fake'
+        )
+        for i in range(size)
+    ]
+    titles = []
+    for i in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {i}',
+            year=2000 + i,
+            category=categories[i % len(categories)],
+            description=f'Описание {i}'
+        )
+        title.genre.set(genres[:i % len(genres) + 1])
+        titles.append(title)
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text=f'Отзыв {i}', score=i + 1
+        )
+        for i, author in enumerate(authors)
+    ]
+    for i, author in enumerate(authors):
+        Comment.objects.create(
+            review=reviews[0], author=author, text=f'Комментарий {i}'
+        )
+    rebuild_ratings()
+    return titles[0], reviews[0]
+
+
+@pytest.fixture
+def catalog():
+    return create_catalog(size=3)
+
+
+@pytest.fixture
+def big_catalog():
+    return create_catalog(size=10)
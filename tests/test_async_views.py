@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from asgiref.sync import async_to_sync
+
+
+@contextmanager
+def async_urls(settings):
+    """Роутер с асинхронными представлениями, как под ASGI."""
+    from api import urls as api_urls
+    from api.async_views import get_executor
+    from api_yamdb import urls as root_urls
+    from django.urls import clear_url_caches
+
+    def reload():
+        importlib.reload(api_urls)
+        importlib.reload(root_urls)
+        clear_url_caches()
+
+    settings.ASYNC_VIEWS = True
+    reload()
+    try:
+        yield
+    finally:
+        settings.ASYNC_VIEWS = False
+        reload()
+        get_executor().shutdown()
+        get_executor.cache_clear()
+
+
+def async_request(method, path, *args, **kwargs):
+    from django.test import AsyncClient
+
+    async def send():
+        return await getattr(AsyncClient(), method)(path, *args, **kwargs)
+
+    return async_to_sync(send)()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+
+    def read_urls(self, catalog):
+        title, review = catalog
+        return [
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.id}/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+        ]
+
+    def test_same_responses(self, settings, client, catalog):
+        from django.urls import resolve
+
+        urls = self.read_urls(catalog)
+        expected = [client.get(url).json() for url in urls]
+        with async_urls(settings):
+            for url, data in zip(urls, expected):
+                assert asyncio.iscoroutinefunction(resolve(url).func), (
+                    f'Проверьте, что под ASGI {url} обслуживает '
+                    'асинхронное представление'
+                )
+                response = async_request('get', url)
+                assert response.status_code == 200
+                assert response.json() == data, (
+                    'Проверьте, что асинхронное представление возвращает '
+                    'тот же ответ, что и синхронное'
+                )
+
+    def test_write(self, settings, user, catalog):
+        from reviews.models import Review
+        from tests.fixtures.fixture_user import get_token
+
+        title, _ = catalog
+        with async_urls(settings):
+            response = async_request(
+                'post', f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 5},
+                content_type='application/json',
+                authorization=f'Bearer {get_token(user)}',
+            )
+        assert response.status_code == 201, (
+            'Проверьте, что под ASGI можно оставить отзыв'
+        )
+        assert Review.objects.filter(author=user, title=title).exists()
+
+    def test_metrics(self, settings, catalog):
+        settings.PERF_METRICS_ENABLED = True
+        with async_urls(settings):
+            response = async_request('get', '/api/v1/titles/')
+        assert 'desc="3 queries"' in response['Server-Timing'], (
+            'Проверьте, что замеры учитывают запросы к базе данных '
+            'из пула потоков'
+        )
+
+
+def test_bounded_pool(settings):
+    from api.async_views import get_executor, run_in_pool
+    from django.http import HttpResponse
+
+    settings.ASYNC_VIEW_THREADS = 2
+    get_executor.cache_clear()
+    marker = contextvars.ContextVar('marker')
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0, 'markers': set()}
+
+    def view(request):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            state['markers'].add(marker.get(None))
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+        return HttpResponse()
+
+    async def run():
+        marker.set('request')
+        await asyncio.gather(*(run_in_pool(view, None) for _ in range(6)))
+
+    try:
+        async_to_sync(run)()
+    finally:
+        get_executor().shutdown()
+        get_executor.cache_clear()
+    assert state['peak'] == 2, (
+        'Проверьте, что число одновременных запросов ограничено '
+        'ASYNC_VIEW_THREADS'
+    )
+    assert state['markers'] == {'request'}, (
+        'Проверьте, что представление в пуле видит contextvars запроса'
+    )
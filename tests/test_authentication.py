@@ -0,0 +1,176 @@
+import pytest
+
+
+def bearer(token):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStatelessAuthentication:
+
+    def test_no_user_query(self, user_client, catalog,
+                           django_assert_num_queries):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with django_assert_num_queries(3) as queries:
+            user_client.get(url)
+        assert not any(
+            query['sql'].startswith('SELECT "reviews_user"')
+            for query in queries.captured_queries
+        ), 'Проверьте, что аутентификация не загружает пользователя из базы'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201, (
+            'Проверьте, что пользователь из токена может оставить отзыв'
+        )
+        assert response.json()['author'] == 'TestUser'
+
+    def test_role_change_applies_to_old_token(self, admin_client, user,
+                                              user_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'admin'}
+        )
+        assert user_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли действует на выпущенные токены'
+        )
+
+    def test_demotion_applies_to_old_token(self, admin, admin_client):
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что понижение роли действует на выпущенные токены'
+        )
+
+    def test_token_without_claims(self, admin):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client = bearer(str(AccessToken.for_user(admin)))
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что токены без данных о роли продолжают работать'
+        )
+
+    def test_deleted_user(self, admin_client, user, user_client):
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается'
+        )
+
+    def test_version_changes_only_for_token_fields(self, user):
+        user.bio = 'Новое описание'
+        user.save()
+        assert user.token_version == 0
+        user.username = 'Renamed'
+        user.save(update_fields=['username'])
+        user.refresh_from_db()
+        assert user.token_version == 1, (
+            'Проверьте, что смена имени меняет версию токенов'
+        )
+
+
+class Process:
+    """Кеши одного процесса gunicorn: версии и пользователи в памяти
+    процесса и кеш API (свой у каждого процесса для LocMemCache)."""
+
+    def __init__(self, api_cache):
+        from api.authentication import LOCAL_SIZE, LOCAL_TTL, TTLCache
+
+        self.versions = TTLCache(LOCAL_SIZE, LOCAL_TTL)
+        self.users = TTLCache(LOCAL_SIZE, LOCAL_TTL)
+        self.api_cache = api_cache
+
+    def run(self, action):
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr('api.authentication.versions', self.versions)
+            patch.setattr('api.authentication.users', self.users)
+            patch.setattr(
+                'api.authentication.get_cache', lambda: self.api_cache
+            )
+            return action()
+
+    def expire(self):
+        """Прошло LOCAL_TTL секунд."""
+        self.versions.clear()
+        self.users.clear()
+
+
+def local_cache(name):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return LocMemCache(name, {})
+
+
+@pytest.mark.django_db(transaction=True)
+class TestVersionsAcrossProcesses:
+
+    def demote_in_other_process(self, admin, shared=None):
+        from api.authentication import access_token_for
+
+        first = Process(shared or local_cache('first'))
+        second = Process(shared or local_cache('second'))
+        client = bearer(first.run(lambda: access_token_for(admin)))
+        assert second.run(
+            lambda: client.get('/api/v1/users/')
+        ).status_code == 200
+
+        def demote():
+            admin.role = 'user'
+            admin.save()
+
+        first.run(demote)
+        second.expire()
+        return second.run(lambda: client.get('/api/v1/users/'))
+
+    def test_local_cache_is_not_shared(self, admin):
+        response = self.demote_in_other_process(admin)
+        assert response.status_code == 403, (
+            'Проверьте, что с кешем в памяти процесса смена роли доходит '
+            'до других процессов не позже LOCAL_TTL'
+        )
+
+    def test_shared_cache(self, admin, monkeypatch):
+        shared = local_cache('shared')
+        monkeypatch.setattr(
+            'api.authentication.is_process_local', lambda: False
+        )
+        response = self.demote_in_other_process(admin, shared)
+        assert response.status_code == 403, (
+            'Проверьте, что смена роли сбрасывает версию в общем кеше'
+        )
+        assert shared.get(f'user-version:{admin.pk}') == 1
+
+    def test_reads_do_not_fill_shared_cache(self, admin, monkeypatch):
+        from api.authentication import (SHARED_TTL, access_token_for,
+                                        token_version)
+        from django.conf import settings
+        from reviews.models import User
+
+        shared = local_cache('shared')
+        monkeypatch.setattr(
+            'api.authentication.is_process_local', lambda: False
+        )
+        stale = User.objects.get(pk=admin.pk)
+        admin.role = 'user'
+        process = Process(shared)
+        process.run(admin.save)
+        key = f'user-version:{admin.pk}'
+        assert shared.get(key) == 1, (
+            'Проверьте, что сохранение пользователя записывает версию '
+            'в общий кеш'
+        )
+        process.run(lambda: access_token_for(stale))
+        assert shared.get(key) == 1, (
+            'Проверьте, что выпуск токена по устаревшей строке не '
+            'записывает её версию в общий кеш'
+        )
+        shared.delete(key)
+        assert process.run(lambda: token_version(admin.pk)) == 1
+        assert shared.get(key) is None, (
+            'Проверьте, что чтение версии из базы не записывает её в общий '
+            'кеш'
+        )
+        assert SHARED_TTL < settings.API_CACHE_TIMEOUT
@@ -0,0 +1,206 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def title_items(count, category='category-0', genre=('genre-0', 'genre-1')):
+    return [
+        {
+            'name': f'Пакет {i}',
+            'year': 2001,
+            'description': f'Загружено пакетом {i}',
+            'category': category,
+            'genre': list(genre),
+        }
+        for i in range(count)
+    ]
+
+
+def selects(client, url, items):
+    """Число запросов чтения при массовом создании `items`."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, items, format='json')
+    assert response.status_code == 201, response.json()
+    return len([
+        query for query in queries.captured_queries
+        if query['sql'].startswith('SELECT')
+    ])
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitlesBulk:
+    url = '/api/v1/titles/bulk/'
+
+    def test_create(self, client, admin_client, catalog):
+        client.get('/api/v1/titles/')
+        response = admin_client.post(self.url, title_items(3), format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST-запрос к `/api/v1/titles/bulk/` возвращает '
+            'статус 201'
+        )
+        created = response.json()
+        assert [title['name'] for title in created] == [
+            'Пакет 0', 'Пакет 1', 'Пакет 2'
+        ]
+        assert created[0]['genre'] == ['genre-0', 'genre-1']
+        assert created[0]['category'] == 'category-0'
+        detail = client.get(f'/api/v1/titles/{created[0]["id"]}/').json()
+        assert [genre['slug'] for genre in detail['genre']] == [
+            'genre-0', 'genre-1'
+        ]
+        assert client.get('/api/v1/titles/').json()['count'] == 6, (
+            'Проверьте, что массовое создание сбрасывает кеш списка '
+            'произведений'
+        )
+        search = client.get('/api/v1/search/', {'q': 'пакетом'}).json()
+        assert search['count'] == 3, (
+            'Проверьте, что созданные произведения попадают в поиск'
+        )
+
+    def test_queries_do_not_grow(self, admin_client, catalog):
+        few = selects(admin_client, self.url, title_items(2))
+        many = selects(admin_client, self.url, title_items(20))
+        assert few == many, (
+            'Проверьте, что число запросов чтения не зависит от числа '
+            'произведений в массовом запросе'
+        )
+
+    def test_errors_per_item(self, admin_client, catalog):
+        from reviews.models import Title
+
+        items = title_items(4)
+        items[1]['category'] = 'unknown'
+        items[2]['genre'] = ['genre-0', 'unknown']
+        del items[3]['name']
+        response = admin_client.post(self.url, items, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 4 and errors[0] == {}, (
+            'Проверьте, что ошибки возвращаются списком по элементам'
+        )
+        assert list(errors[1]) == ['category']
+        assert list(errors[2]) == ['genre']
+        assert list(errors[3]) == ['name']
+        assert Title.objects.count() == 3, (
+            'Проверьте, что при ошибках ничего не записывается'
+        )
+
+    def test_too_many_items(self, admin_client, settings, catalog):
+        settings.API_BULK_MAX_ITEMS = 2
+        response = admin_client.post(self.url, title_items(3), format='json')
+        assert response.status_code == 400
+
+    def test_permissions(self, user_client, catalog):
+        from rest_framework.test import APIClient
+
+        for other, status in ((APIClient(), 401), (user_client, 403)):
+            response = other.post(self.url, title_items(1), format='json')
+            assert response.status_code == status
+
+    def test_update(self, client, admin_client, catalog):
+        title, _ = catalog
+        client.get(f'/api/v1/titles/{title.id}/')
+        response = admin_client.patch(self.url, [
+            {'id': title.id, 'name': 'Новое имя', 'genre': ['genre-2']},
+            {'id': title.id + 1, 'year': 1990},
+        ], format='json')
+        assert response.status_code == 200
+        detail = client.get(f'/api/v1/titles/{title.id}/').json()
+        assert detail['name'] == 'Новое имя', (
+            'Проверьте, что массовое изменение сбрасывает кеш произведения'
+        )
+        assert [genre['slug'] for genre in detail['genre']] == ['genre-2']
+        assert detail['year'] == title.year and detail['rating'], (
+            'Проверьте, что поля, которых нет в элементе, не меняются'
+        )
+        other = client.get(f'/api/v1/titles/{title.id + 1}/').json()
+        assert other['year'] == 1990 and other['name'] == 'Произведение 1'
+
+    def test_update_errors(self, admin_client, catalog):
+        response = admin_client.patch(
+            self.url, [{'name': 'Без id'}, {'id': 0, 'name': 'Нет такого'}],
+            format='json'
+        )
+        assert response.status_code == 400
+        assert [list(error) for error in response.json()] == [['id'], ['id']]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGenresBulk:
+    url = '/api/v1/genres/bulk/'
+
+    def test_create(self, client, admin_client, catalog):
+        client.get('/api/v1/genres/')
+        response = admin_client.post(self.url, [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        assert response.status_code == 201
+        assert client.get('/api/v1/genres/').json()['count'] == 5
+
+    def test_taken_slugs(self, admin_client, catalog):
+        response = admin_client.post(self.url, [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Ещё драма', 'slug': 'drama'},
+            {'name': 'Жанр', 'slug': 'genre-0'},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and list(errors[1]) == ['slug'] and list(
+            errors[2]
+        ) == ['slug'], (
+            'Проверьте, что занятые slug и повторы внутри запроса '
+            'возвращаются ошибками элементов'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReviewsBulk:
+    url = '/api/v1/reviews/bulk/'
+
+    def test_create(self, client, admin_client, catalog, user, admin):
+        from reviews.models import Title
+        from reviews.ratings import rebuild_ratings
+
+        title, _ = catalog
+        other = Title.objects.exclude(pk=title.pk).first()
+        client.get(f'/api/v1/titles/{title.id}/')
+        response = admin_client.post(self.url, [
+            {'title': title.id, 'author': user.username, 'text': 'Пакетный',
+             'score': 10},
+            {'title': title.id, 'author': admin.username, 'text': 'Пакетный',
+             'score': 1},
+            {'title': other.id, 'author': user.username, 'text': 'Пакетный',
+             'score': 7},
+        ], format='json')
+        assert response.status_code == 201, response.json()
+        ratings = {
+            pk: client.get(f'/api/v1/titles/{pk}/').json()['rating']
+            for pk in (title.id, other.id)
+        }
+        rebuild_ratings()
+        assert ratings == dict(
+            Title.objects.filter(
+                pk__in=ratings
+            ).values_list('pk', 'rating')
+        ), 'Проверьте, что массовое создание отзывов обновляет рейтинги'
+        search = client.get('/api/v1/search/', {'q': 'пакетный'}).json()
+        assert search['count'] == 3
+
+    def test_one_review_per_author(self, admin_client, catalog, user):
+        title, review = catalog
+        response = admin_client.post(self.url, [
+            {'title': title.id, 'author': review.author.username,
+             'text': 'Повтор', 'score': 5},
+            {'title': title.id, 'author': user.username, 'text': 'Первый',
+             'score': 5},
+            {'title': title.id, 'author': user.username, 'text': 'Второй',
+             'score': 5},
+            {'title': 0, 'author': 'nobody', 'text': 'Нет', 'score': 11},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[1] == {} and 'non_field_errors' in errors[0] and (
+            'non_field_errors' in errors[2]
+        ), 'Проверьте, что повторные отзывы автора возвращаются ошибками'
+        assert set(errors[3]) == {'title', 'author', 'score'}
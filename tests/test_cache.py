@@ -0,0 +1,186 @@
+import os
+import runpy
+
+import pytest
+from django.conf import settings as django_settings
+
+SETTINGS_PATH = os.path.join(
+    django_settings.BASE_DIR, 'api_yamdb', 'settings.py'
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/categories/',
+        '/api/v1/genres/',
+        '/api/v1/titles/',
+        '/api/v1/titles/?page=1&year=2000',
+        '/api/v1/titles/{title_id}/',
+    ])
+    def test_second_request_is_cached(self, client, catalog,
+                                      django_assert_num_queries, url):
+        title, _ = catalog
+        url = url.format(title_id=title.id)
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` берётся из кеша'
+        )
+        assert second.content == first.content, (
+            f'Проверьте, что закешированный ответ `{url}` совпадает '
+            'с исходным'
+        )
+
+    def test_review_invalidates_title(self, client, user_client, catalog):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/'
+        list_url = '/api/v1/titles/'
+        client.get(url)
+        client.get(list_url)
+        response = user_client.post(
+            f'{url}reviews/', {'text': 'Новый отзыв', 'score': 10}
+        )
+        assert response.status_code == 201
+        title.refresh_from_db()
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+        assert response.json()['rating'] == title.rating
+        assert client.get(list_url)['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кеш списка произведений'
+        )
+
+    def test_category_invalidates_titles(self, client, catalog):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        client.get('/api/v1/genres/')
+        title.category.name = 'Новое название'
+        title.category.save()
+        assert client.get(url).json()['category']['name'] == (
+            'Новое название'
+        ), 'Проверьте, что изменение категории сбрасывает кеш произведений'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение категории не сбрасывает кеш жанров'
+        )
+
+    def test_genre_change_invalidates_title(self, client, catalog):
+        from reviews.models import Genre
+
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        title.genre.add(Genre.objects.create(name='Новый', slug='new'))
+        assert 'new' in [
+            genre['slug'] for genre in client.get(url).json()['genre']
+        ], 'Проверьте, что изменение жанров произведения сбрасывает кеш'
+
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/categories/', '/api/v1/titles/{title_id}/',
+    ])
+    def test_html_is_not_cached(self, client, admin_client, catalog, url):
+        title, _ = catalog
+        url = url.format(title_id=title.id)
+        admin_client.get(url, HTTP_ACCEPT='text/html')
+        response = admin_client.get(url, HTTP_ACCEPT='text/html')
+        assert 'TestAdmin' in response.content.decode()
+        assert not response.has_header('X-Cache'), (
+            'Проверьте, что страницы browsable API не кешируются'
+        )
+        assert not response.has_header('ETag')
+        response = client.get(url, HTTP_ACCEPT='text/html')
+        assert 'TestAdmin' not in response.content.decode(), (
+            'Проверьте, что страница browsable API администратора не '
+            'отдаётся другим пользователям'
+        )
+        assert client.get(url)['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkChanges:
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_import_data(self, client, engine):
+        from django.core.management import call_command
+
+        urls = ('/api/v1/categories/', '/api/v1/titles/')
+        etags = {}
+        for url in urls:
+            client.get(url)
+            etags[url] = client.get(url)['ETag']
+        call_command('import_data', engine=engine)
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == 200, (
+                f'Проверьте, что после `import_data` ETag `{url}` меняется'
+            )
+            assert response['X-Cache'] == 'MISS', (
+                f'Проверьте, что `import_data` сбрасывает кеш `{url}`'
+            )
+            assert response.json()['count'] > 0
+
+    def test_rebuild_ratings(self, client, catalog):
+        from django.core.management import call_command
+        from reviews.models import Title
+
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/'
+        rating = client.get(url).json()['rating']
+        Title.objects.filter(pk=title.pk).update(rating=None)
+        call_command('rebuild_search_index')
+        assert client.get(url)['X-Cache'] == 'MISS', (
+            'Проверьте, что `rebuild_search_index` сбрасывает кеш'
+        )
+        Title.objects.filter(pk=title.pk).update(rating=1)
+        client.get(url)
+        call_command('rebuild_ratings')
+        response = client.get(url)
+        assert (response['X-Cache'], response.json()['rating']) == (
+            'MISS', rating
+        ), 'Проверьте, что `rebuild_ratings` сбрасывает кеш произведений'
+
+
+class TestCacheSettings:
+
+    def load(self, monkeypatch, **environ):
+        for name in ('API_CACHE_BACKEND', 'API_CACHE_ENABLED'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(SETTINGS_PATH)
+
+    def test_disabled_without_shared_backend(self, monkeypatch):
+        assert self.load(monkeypatch)['API_CACHE_ENABLED'] is False, (
+            'Проверьте, что без API_CACHE_BACKEND кеш ответов выключен: '
+            'память процесса не общая для процессов gunicorn'
+        )
+        loaded = self.load(
+            monkeypatch, API_CACHE_BACKEND='django_redis.cache.RedisCache'
+        )
+        assert loaded['API_CACHE_ENABLED'] is True
+        assert loaded['CACHES']['api']['BACKEND'] == (
+            'django_redis.cache.RedisCache'
+        )
+
+    def test_local_backend_warning(self, settings):
+        from api.checks import api_cache_check
+
+        assert [
+            message.id for message in api_cache_check(None)
+        ] == ['api.W001'], (
+            'Проверьте, что включённый кеш в памяти процесса вызывает '
+            'предупреждение'
+        )
+        settings.API_CACHE_ENABLED = False
+        assert api_cache_check(None) == []
+        settings.API_CACHE_ENABLED = True
+        settings.CACHES = {
+            **settings.CACHES,
+            'api': {'BACKEND': 'django_redis.cache.RedisCache'},
+        }
+        assert api_cache_check(None) == []
@@ -0,0 +1,102 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/{title_id}/',
+        '/api/v1/titles/{title_id}/reviews/',
+        '/api/v1/titles/{title_id}/reviews/{review_id}/',
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+    ])
+    def test_not_modified(self, client, catalog, django_assert_num_queries,
+                          url):
+        title, review = catalog
+        url = url.format(title_id=title.id, review_id=review.id)
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным ETag '
+            'возвращает статус 304'
+        )
+        assert response['ETag'] == etag
+
+    def test_new_review_changes_etag(self, client, user_client, catalog):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        user_client.post(url, {'text': 'Новый отзыв', 'score': 1})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+
+    def test_comment_edit_changes_etag(self, client, catalog):
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        comment = review.comments.first()
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение комментария меняет ETag списка '
+            'комментариев'
+        )
+
+    def test_author_rename_changes_etag(self, client, catalog):
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        etag = client.get(url)['ETag']
+        review.author.username = 'renamed'
+        review.author.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.json()['author'] == 'renamed', (
+            'Проверьте, что смена имени автора меняет ETag отзывов'
+        )
+
+    def test_any_etag(self, client, catalog):
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        response = client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 304, (
+            'Проверьте, что `If-None-Match: *` у существующего ресурса '
+            'возвращает статус 304'
+        )
+        assert response['ETag'] == client.get(url)['ETag']
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/0/', HTTP_IF_NONE_MATCH='*'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что `If-None-Match: *` у несуществующего ресурса '
+            'возвращает статус 404'
+        )
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/{title_id}/',
+        '/api/v1/titles/{title_id}/reviews/',
+    ])
+    def test_without_response_cache(self, client, user_client, settings,
+                                    catalog, url):
+        settings.API_CACHE_ENABLED = False
+        title, _ = catalog
+        url = url.format(title_id=title.id)
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что условные GET-запросы работают и без кеша '
+            'ответов'
+        )
+        assert response['ETag'] == etag
+        user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Новый отзыв', 'score': 1}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что без кеша ответов ETag меняется вместе '
+            'с содержимым'
+        )
@@ -0,0 +1,70 @@
+import pytest
+
+
+@pytest.fixture
+def db_connection(monkeypatch):
+    """Открытое соединение, закрытия которого записываются в `closed`."""
+    from django.db import connection
+
+    connection.ensure_connection()
+    monkeypatch.setattr(connection, 'closed', [], raising=False)
+    monkeypatch.setattr(
+        connection, 'close', lambda: connection.closed.append(True)
+    )
+    return connection
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnectionHealthChecks:
+
+    def test_persistent_connections(self, settings):
+        assert settings.DATABASES['default']['CONN_MAX_AGE'] > 0, (
+            'Проверьте, что соединения с базой данных постоянные'
+        )
+
+    def test_usable_connection_kept(self, db_connection, monkeypatch):
+        from api.connections import check_connections
+
+        monkeypatch.setattr(db_connection, 'is_usable', lambda: True)
+        check_connections()
+        with db_connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert not db_connection.closed, (
+            'Проверьте, что рабочее соединение не закрывается'
+        )
+
+    def test_broken_connection_closed(self, db_connection, monkeypatch,
+                                      client):
+        monkeypatch.setattr(db_connection, 'is_usable', lambda: False)
+        client.get('/api/v1/genres/')
+        assert db_connection.closed, (
+            'Проверьте, что неработающее соединение закрывается '
+            'перед первым запросом к базе данных'
+        )
+
+    def test_checked_once_when_used(self, db_connection, monkeypatch,
+                                    client, catalog):
+        checks = []
+        monkeypatch.setattr(
+            db_connection, 'is_usable', lambda: checks.append(True) or True
+        )
+        client.get('/api/v1/titles/')
+        assert len(checks) == 1, (
+            'Проверьте, что соединение проверяется один раз за запрос'
+        )
+        checks.clear()
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'HIT'
+        assert not checks, (
+            'Проверьте, что запрос без обращений к базе данных не '
+            'проверяет соединение'
+        )
+
+    def test_disabled(self, db_connection, monkeypatch, settings):
+        from api.connections import check_connections
+
+        settings.DB_CONN_HEALTH_CHECKS = False
+        monkeypatch.setattr(db_connection, 'is_usable', lambda: False)
+        check_connections()
+        with db_connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert not db_connection.closed
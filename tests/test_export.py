@@ -0,0 +1,131 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+
+def snapshot():
+    from reviews.parsers.csv_parsers import TABLES
+    from reviews.parsers.exporters import export_queryset
+
+    return {table.name: list(export_queryset(table)) for table in TABLES}
+
+
+def io_lines(stream):
+    """Строки файла, который читает COPY."""
+    return iter(stream.read().splitlines(keepends=True))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportData:
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_round_trip(self, tmp_path, engine):
+        from reviews.models import Category, Genre, Title, User
+
+        call_command('import_data')
+        Title.objects.create(name='Без категории', year=2000)
+        expected = snapshot()
+        call_command('export_data', path=str(tmp_path), chunk_size=7)
+        for model in (Title, User, Category, Genre):
+            model.objects.all().delete()
+        call_command('import_data', path=str(tmp_path), engine=engine)
+        assert snapshot() == expected, (
+            'Проверьте, что import_data загружает файлы export_data '
+            'без изменений'
+        )
+
+    def test_copy_accepts_exported_rows(self, tmp_path):
+        """Условие внешних ключей движка COPY на строках export_data;
+        сам COPY проверяется только на PostgreSQL."""
+        import csv
+
+        from django.db import connection
+        from reviews.models import Title
+        from reviews.parsers.copy_parsers import (StagingRows,
+                                                  foreign_keys_condition)
+        from reviews.parsers.exporters import TABLES_BY_NAME
+
+        call_command('import_data')
+        Title.objects.create(name='Без категории', year=2000)
+        call_command('export_data', path=str(tmp_path), tables=['titles'])
+        table = TABLES_BY_NAME['titles']
+        with open(tmp_path / table.file, encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(io_lines(StagingRows(table, f))))
+        columns = ', '.join(f'"{column}"' for column in table.columns)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE s (row_number integer, {columns})'
+            )
+            cursor.executemany(
+                f'INSERT INTO s VALUES ({", ".join(["%s"] * len(rows[0]))})',
+                rows
+            )
+            cursor.execute(
+                f'SELECT count(*) FROM s WHERE {foreign_keys_condition(table)}'
+            )
+            accepted, = cursor.fetchone()
+            cursor.execute('DROP TABLE s')
+        assert accepted == len(rows) == Title.objects.count(), (
+            'Проверьте, что COPY не отклоняет произведения без категории'
+        )
+
+    def test_ndjson(self, tmp_path):
+        from reviews.parsers.exporters import TABLES_BY_NAME
+
+        call_command('import_data')
+        call_command(
+            'export_data', path=str(tmp_path), format='ndjson',
+            tables=['review']
+        )
+        assert [file.name for file in tmp_path.iterdir()] == ['review.ndjson']
+        with open(tmp_path / 'review.ndjson', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == len(snapshot()['review'])
+        assert list(lines[0]) == list(TABLES_BY_NAME['review'].header)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportView:
+
+    def test_matches_command(self, admin_client, catalog, tmp_path):
+        call_command('export_data', path=str(tmp_path), tables=['titles'])
+        response = admin_client.get('/api/v1/export/titles.csv')
+        assert response.status_code == 200 and response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        )
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert b''.join(response.streaming_content) == (
+            tmp_path / 'titles.csv'
+        ).read_bytes(), (
+            'Проверьте, что выгрузка совпадает с файлом export_data'
+        )
+
+    def test_ndjson(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/genre_title.ndjson')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).splitlines()
+        assert len(lines) == 6
+        assert set(json.loads(lines[0])) == {'id', 'title_id', 'genre_id'}
+
+    def test_permissions(self, client, user_client, admin_client):
+        assert client.get('/api/v1/export/users.csv').status_code == 401
+        assert user_client.get('/api/v1/export/users.csv').status_code == 403
+        assert admin_client.get('/api/v1/export/users.xml').status_code == 404
+        assert admin_client.get(
+            '/api/v1/export/unknown.csv'
+        ).status_code == 404
+
+    def test_asgi(self, admin, catalog):
+        from tests.fixtures.fixture_user import get_token
+        from tests.test_async_views import async_request
+
+        response = async_request(
+            'get', '/api/v1/export/titles.csv',
+            authorization=f'Bearer {get_token(admin)}'
+        )
+        assert response.status_code == 200
+        content = b''.join(response.streaming_content).decode()
+        assert content.splitlines()[0] == 'id,name,year,category', (
+            'Проверьте, что выгрузка работает под ASGI'
+        )
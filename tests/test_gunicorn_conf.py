@@ -0,0 +1,57 @@
+import os
+import runpy
+
+from django.conf import settings
+
+CONF_PATH = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+
+
+def load(monkeypatch, **environ):
+    for name in [name for name in os.environ if name.startswith('GUNICORN')]:
+        monkeypatch.delenv(name)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONF_PATH)
+
+
+class TestGunicornConf:
+
+    def test_defaults(self, monkeypatch):
+        conf = load(monkeypatch)
+        cpus = conf['available_cpus']()
+        assert conf['workers'] == cpus * 2 + 1, (
+            'Проверьте, что число синхронных процессов зависит от числа '
+            'процессоров'
+        )
+        assert conf['worker_class'] == 'sync'
+        assert conf['threads'] == 1
+        assert conf['preload_app'] is True, (
+            'Проверьте, что приложение загружается до создания процессов'
+        )
+        assert conf['max_requests'] > 0 and conf['max_requests_jitter'] > 0, (
+            'Проверьте, что процессы перезапускаются после max_requests'
+        )
+
+    def test_gthread(self, monkeypatch):
+        conf = load(
+            monkeypatch, GUNICORN_WORKER_CLASS='gthread', GUNICORN_THREADS='8'
+        )
+        assert conf['worker_class'] == 'gthread'
+        assert conf['threads'] == 8
+        assert conf['workers'] == conf['available_cpus']() + 1
+
+    def test_overrides(self, monkeypatch):
+        conf = load(
+            monkeypatch, GUNICORN_WORKER_CLASS='uvicorn',
+            GUNICORN_WORKERS='3', GUNICORN_PRELOAD='0'
+        )
+        assert conf['worker_class'] == 'uvicorn.workers.UvicornWorker'
+        assert conf['workers'] == 3
+        assert conf['preload_app'] is False
+
+    def test_dockerfile(self):
+        with open(os.path.join(settings.BASE_DIR, 'Dockerfile')) as f:
+            dockerfile = f.read()
+        assert 'gunicorn.conf.py' in dockerfile, (
+            'Проверьте, что Dockerfile запускает gunicorn с gunicorn.conf.py'
+        )
@@ -0,0 +1,350 @@
+import csv
+import os
+import threading
+import time
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static_files', 'data')
+
+
+def count_rows(file):
+    with open(os.path.join(DATA_DIR, file), encoding='utf-8') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportData:
+
+    def check_counts(self):
+        from reviews.models import Category, Comment, Genre, Review, Title, User
+
+        expected = {
+            User: 'users.csv',
+            Category: 'category.csv',
+            Genre: 'genre.csv',
+            Title: 'titles.csv',
+            Review: 'review.csv',
+            Comment: 'comments.csv',
+            Title.genre.through: 'genre_title.csv',
+        }
+        for model, file in expected.items():
+            assert model.objects.count() == count_rows(file), (
+                f'Проверьте, что import_data загружает все строки {file}'
+            )
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_import_data(self, engine):
+        from reviews.models import Review, Title, User
+
+        call_command('import_data', chunk_size=10, engine=engine)
+        self.check_counts()
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что import_data сохраняет дату публикации из файла'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что import_data пересчитывает рейтинги'
+        )
+        user = User.objects.create(username='new', email='new@yamdb.fake')
+        assert user.pk > max(
+            User.objects.exclude(pk=user.pk).values_list('pk', flat=True)
+        ), 'Проверьте, что import_data сдвигает последовательности id'
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_import_data_is_idempotent(self, engine):
+        call_command('import_data', engine=engine)
+        call_command('import_data', engine=engine)
+        self.check_counts()
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_import_data_rejects_bad_rows(self, tmp_path, engine):
+        from reviews.models import Title
+
+        for file in os.listdir(DATA_DIR):
+            with open(os.path.join(DATA_DIR, file), encoding='utf-8') as f:
+                data = f.read().rstrip('\n') + '\n'
+            if file == 'titles.csv':
+                data += '1000,Без категории,2000,999\n'
+            (tmp_path / file).write_text(data, encoding='utf-8')
+        call_command('import_data', path=str(tmp_path), engine=engine)
+        assert Title.objects.count() == count_rows('titles.csv'), (
+            'Проверьте, что import_data пропускает строки с несуществующими '
+            'внешними ключами'
+        )
+
+    @pytest.mark.parametrize('engine', ['batch', 'copy'])
+    def test_import_data_rejects_malformed_rows(self, tmp_path, engine):
+        from reviews.models import Review, Title
+
+        for file in os.listdir(DATA_DIR):
+            with open(os.path.join(DATA_DIR, file), encoding='utf-8') as f:
+                data = f.read().rstrip('\n') + '\n'
+            if file == 'titles.csv':
+                data += (
+                    '1001,Без года,,1\n1002,Лишний столбец,2000,1,1\n'
+                    '1003,Год словом,две тысячи,1\n'
+                )
+            if file == 'review.csv':
+                data += '1000,1,Оценка словом,1,десять,2019-09-24T21:08:21Z\n'
+            (tmp_path / file).write_text(data, encoding='utf-8')
+        rejected = tmp_path / 'rejected.csv'
+        call_command(
+            'import_data', path=str(tmp_path), engine=engine,
+            rejected=str(rejected)
+        )
+        assert Title.objects.count() == count_rows('titles.csv'), (
+            'Проверьте, что import_data пропускает некорректные строки'
+        )
+        assert Review.objects.count() == count_rows('review.csv')
+        with open(rejected, encoding='utf-8') as f:
+            rows = list(csv.reader(f))[1:]
+        assert sorted(row[:2] for row in rows) == [
+            ['review.csv', str(count_rows('review.csv') + 1)],
+            ['titles.csv', str(count_rows('titles.csv') + 1)],
+            ['titles.csv', str(count_rows('titles.csv') + 2)],
+            ['titles.csv', str(count_rows('titles.csv') + 3)],
+        ], 'Проверьте, что некорректные строки записываются в --rejected'
+
+    def test_import_data_checks_field_values(self, tmp_path):
+        from reviews.models import Review, Title, User
+
+        for file in os.listdir(DATA_DIR):
+            with open(os.path.join(DATA_DIR, file), encoding='utf-8') as f:
+                data = f.read().rstrip('\n') + '\n'
+            if file == 'titles.csv':
+                data += f'1001,{"Очень длинное название" * 10},2000,1\n'
+            if file == 'review.csv':
+                data += '1000,1,Оценка 11,100,11,2019-09-24T21:08:21Z\n'
+            if file == 'users.csv':
+                data += '1000,boss,boss@yamdb.fake,boss,,,\n'
+            (tmp_path / file).write_text(data, encoding='utf-8')
+        rejected = tmp_path / 'rejected.csv'
+        call_command(
+            'import_data', path=str(tmp_path), rejected=str(rejected)
+        )
+        for model, file in ((Title, 'titles.csv'), (Review, 'review.csv'),
+                            (User, 'users.csv')):
+            assert model.objects.count() == count_rows(file), (
+                'Проверьте, что import_data отклоняет строки, которые не '
+                'проходят проверки полей модели'
+            )
+        with open(rejected, encoding='utf-8') as f:
+            reasons = {row[0]: row[2] for row in list(csv.reader(f))[1:]}
+        assert set(reasons) == {'titles.csv', 'review.csv', 'users.csv'}
+        assert reasons['titles.csv'].startswith('name: '), (
+            'Проверьте, что причина отклонения называет поле'
+        )
+
+    def test_rejected_by_database(self, monkeypatch):
+        from django.db import IntegrityError
+        from reviews.models import Category
+        from reviews.parsers import csv_parsers
+        from reviews.parsers.csv_parsers import TABLES, insert_objects
+
+        original = csv_parsers.bulk_insert
+
+        def checked_bulk_insert(model, objs, *args, **kwargs):
+            # SQLite с INSERT OR IGNORE пропускает и нарушения NOT NULL,
+            # поэтому ограничение базы данных здесь имитируется.
+            if any(obj.name is None for obj in objs):
+                raise IntegrityError('NOT NULL constraint failed')
+            return original(model, objs, *args, **kwargs)
+
+        monkeypatch.setattr(csv_parsers, 'bulk_insert', checked_bulk_insert)
+        rejects = []
+
+        class Rejects:
+            def write(self, file, number, reason, row):
+                rejects.append(number)
+
+        table = next(table for table in TABLES if table.model is Category)
+        built = [
+            (1, [], Category(id=1, name='Первая', slug='first')),
+            (2, [], Category(id=2, name=None, slug='second')),
+            (3, [], Category(id=3, name='Третья', slug='third')),
+        ]
+        assert insert_objects(table, built, rejects=Rejects()) == 1, (
+            'Проверьте, что строки пачки, отвергнутой базой данных, '
+            'вставляются по одной'
+        )
+        assert rejects == [2]
+        assert sorted(
+            Category.objects.values_list('slug', flat=True)
+        ) == ['first', 'third']
+
+    def test_import_data_resume(self, monkeypatch):
+        from reviews.models import ImportCheckpoint, Review
+        from reviews.parsers import csv_parsers
+
+        original = csv_parsers.bulk_insert
+        calls = []
+
+        def failing_bulk_insert(model, *args, **kwargs):
+            if model is Review:
+                calls.append(1)
+                if len(calls) == 3:
+                    raise RuntimeError('Обрыв соединения')
+            return original(model, *args, **kwargs)
+
+        monkeypatch.setattr(csv_parsers, 'bulk_insert', failing_bulk_insert)
+        with pytest.raises(RuntimeError):
+            call_command('import_data', chunk_size=10)
+        assert Review.objects.count() == 20, (
+            'Проверьте, что import_data фиксирует загруженные пачки'
+        )
+        checkpoint = ImportCheckpoint.objects.get(
+            file=os.path.join(DATA_DIR, 'review.csv')
+        )
+        assert checkpoint.rows == 20 and checkpoint.offset > 0, (
+            'Проверьте, что import_data сохраняет контрольную точку '
+            'вместе с пачкой'
+        )
+        call_command('import_data', chunk_size=10, resume=True)
+        assert len(calls) == 3 + 6, (
+            'Проверьте, что с --resume загрузка продолжается '
+            'с контрольной точки'
+        )
+        self.check_counts()
+
+    def test_model_fields_are_not_changed(self, monkeypatch):
+        from reviews.models import Comment, Review
+        from reviews.parsers import csv_parsers
+
+        original = csv_parsers.bulk_insert
+        auto_now_add = []
+
+        def checked_bulk_insert(model, *args, **kwargs):
+            auto_now_add.extend(
+                model._meta.get_field('pub_date').auto_now_add
+                for model in (Review, Comment)
+            )
+            return original(model, *args, **kwargs)
+
+        monkeypatch.setattr(csv_parsers, 'bulk_insert', checked_bulk_insert)
+        call_command('import_data')
+        assert auto_now_add and all(auto_now_add), (
+            'Проверьте, что import_data не отключает auto_now_add у полей '
+            'модели: их используют сохранения в других потоках'
+        )
+        assert Review.objects.filter(pub_date__year=2019).count() == (
+            count_rows('review.csv')
+        ), 'Проверьте, что даты отзывов берутся из файла'
+
+    def test_import_data_dry_run(self, tmp_path):
+        from reviews.models import Title
+
+        for file in os.listdir(DATA_DIR):
+            with open(os.path.join(DATA_DIR, file), encoding='utf-8') as f:
+                data = f.read().rstrip('\n') + '\n'
+            if file == 'titles.csv':
+                data += '1000,Без года,,1\n'
+            (tmp_path / file).write_text(data, encoding='utf-8')
+        rejected = tmp_path / 'rejected.csv'
+        call_command(
+            'import_data', path=str(tmp_path), dry_run=True,
+            rejected=str(rejected)
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что с --dry-run import_data ничего не записывает'
+        )
+        with open(rejected, encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        assert len(rows) == 2 and rows[1][:2] == ['titles.csv', '33'], (
+            'Проверьте, что отклонённые строки записываются в файл '
+            'с именем файла и номером строки'
+        )
+
+
+class TestCopyEngine:
+    """SQL движка COPY; сами загрузки через COPY проверяются только
+    на PostgreSQL."""
+
+    def table(self, file):
+        from reviews.parsers.csv_parsers import TABLES
+
+        return next(table for table in TABLES if table.file == file)
+
+    def test_cast_checks(self):
+        from reviews.parsers.copy_parsers import (accepted_condition,
+                                                  values_condition)
+
+        condition = values_condition(self.table('titles.csv'))
+        assert "WHEN s.\"year\" = '' THEN FALSE" in condition, (
+            'Проверьте, что пустой год отклоняется'
+        )
+        assert 'castable_integer(s."year")' in condition
+        assert '"name"' not in condition, (
+            'Проверьте, что текстовые столбцы не проверяются'
+        )
+        assert accepted_condition(
+            self.table('titles.csv')
+        ).startswith(f'CASE WHEN {condition} THEN '), (
+            'Проверьте, что внешние ключи приводятся к числу только после '
+            'проверки значений'
+        )
+
+    def test_staging_rows(self, tmp_path):
+        from reviews.parsers.copy_parsers import StagingRows
+
+        rejects = []
+
+        class Rejects:
+            def write(self, file, number, reason, row):
+                rejects.append((number, row))
+
+        source = tmp_path / 'titles.csv'
+        source.write_text(
+            'id,name,year,category\n1,"Один, два",2000,1\n2,Лишний,1,1,1\n'
+            '3,Три,2001,\n',
+            encoding='utf-8'
+        )
+        with open(source, encoding='utf-8', newline='') as f:
+            rows = StagingRows(self.table('titles.csv'), f, Rejects())
+            chunks = list(iter(lambda: rows.read(8), ''))
+        assert ''.join(chunks) == (
+            '1,1,"Один, два",2000,1\n3,3,Три,2001,\n'
+        ), (
+            'Проверьте, что в COPY передаются номер и значения строк '
+            'с правильным числом столбцов'
+        )
+        assert rows.rejected == 1 and rejects == [
+            (2, ['2', 'Лишний', '1', '1', '1'])
+        ]
+
+
+class TestPipeline:
+
+    def test_dependencies_are_loaded_first(self):
+        from reviews.parsers.csv_parsers import TABLES
+        from reviews.parsers.pipeline import run_pipeline, table_dependencies
+
+        events, lock = [], threading.Lock()
+
+        def load(table):
+            with lock:
+                events.append(('start', table))
+            time.sleep(0.01)
+            with lock:
+                events.append(('end', table))
+            return table
+
+        results = run_pipeline(TABLES, load, jobs=3)
+        assert set(results) == set(TABLES), (
+            'Проверьте, что конвейер загружает все файлы'
+        )
+        dependencies = table_dependencies(TABLES)
+        for table in TABLES:
+            started = events.index(('start', table))
+            for dependency in dependencies[table]:
+                assert events.index(('end', dependency)) < started, (
+                    f'Проверьте, что {table.file} загружается после '
+                    f'{dependency.file}'
+                )
+        first_ends = events.index(('end', results[0]))
+        assert first_ends > 1, (
+            'Проверьте, что независимые файлы загружаются параллельно'
+        )
@@ -0,0 +1,84 @@
+import re
+
+import pytest
+from django.db import connection
+
+
+def explain(queryset):
+    """План запроса. На маленьких тестовых таблицах PostgreSQL выбирает
+    последовательный просмотр, поэтому он отключается до конца теста."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+def uses_index(plan, name):
+    return re.search(rf'(INDEX|using|on) {name}\b', plan)
+
+
+def sorts(plan):
+    """Есть ли в плане отдельная сортировка, а не обход индекса."""
+    return 'TEMP B-TREE' in plan or re.search(r'\bSort\b', plan)
+
+
+@pytest.mark.django_db
+class TestIndexes:
+
+    @pytest.mark.parametrize('queryset, index', [
+        (
+            lambda m: m.Review.objects.filter(title_id=1).order_by(
+                '-pub_date', '-id'
+            )[:10],
+            'review_title_pub_date_idx'
+        ),
+        (
+            lambda m: m.Comment.objects.filter(review_id=1).order_by(
+                '-pub_date', '-id'
+            )[:10],
+            'comment_review_pub_date_idx'
+        ),
+        (
+            lambda m: m.Title.objects.order_by('name', 'id')[:10],
+            'title_name_id_idx'
+        ),
+        (
+            lambda m: m.Title.objects.filter(year=2000).order_by(
+                'name', 'id'
+            )[:10],
+            'title_year_name_idx'
+        ),
+    ])
+    def test_query_uses_index(self, queryset, index):
+        from reviews import models
+
+        plan = explain(queryset(models))
+        assert uses_index(plan, index), (
+            f'Проверьте, что запрос использует индекс `{index}`:\n{plan}'
+        )
+        assert not sorts(plan), (
+            f'Проверьте, что индекс `{index}` избавляет запрос от '
+            f'сортировки:\n{plan}'
+        )
+
+    def test_users_ordered_by_index(self):
+        from reviews.models import User
+
+        plan = explain(User.objects.order_by('username'))
+        assert not sorts(plan), (
+            'Проверьте, что список пользователей упорядочивается по '
+            f'индексу поля `username`:\n{plan}'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='Индекс триграмм есть только в PostgreSQL'
+    )
+    def test_name_contains_uses_trigram_index(self):
+        from reviews.models import Title
+
+        plan = explain(Title.objects.filter(name__contains='кот'))
+        assert uses_index(plan, 'title_name_trgm_idx'), (
+            'Проверьте, что фильтр по части названия использует индекс '
+            f'`title_name_trgm_idx`:\n{plan}'
+        )
@@ -0,0 +1,225 @@
+import pytest
+
+
+def rate(titles, scores):
+    """Отзывы авторов author_0, author_1, ... с оценками `scores`
+    к каждому произведению из `titles`."""
+    from reviews.models import Review, User
+    from reviews.ratings import rebuild_ratings
+
+    authors = User.objects.filter(
+        username__startswith='author_'
+    ).order_by('id')
+    for title, title_scores in zip(titles, scores):
+        for author, score in zip(authors, title_scores):
+            Review.objects.update_or_create(
+                title=title, author=author,
+                defaults={'text': 'Оценка', 'score': score}
+            )
+    rebuild_ratings()
+
+
+def summaries():
+    """Содержимое гистограмм и таблицы лидеров жанров."""
+    from reviews.models import GenreLeaderboard, TitleScoreCount
+
+    return (
+        set(TitleScoreCount.objects.filter(count__gt=0).values_list(
+            'title_id', 'score', 'count'
+        )),
+        set(GenreLeaderboard.objects.values_list(
+            'genre_id', 'title_id', 'rating'
+        )),
+    )
+
+
+@pytest.fixture
+def rated(big_catalog):
+    """Произведения big_catalog с рейтингами 10, 9, 8, ... 1."""
+    from reviews.models import Review, Title
+
+    Review.objects.all().delete()
+    titles = list(Title.objects.order_by('id'))
+    rate(titles, [[10 - i] for i in range(len(titles))])
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class TestHistogram:
+
+    def test_histogram(self, client, catalog):
+        title, _ = catalog
+        response = client.get(f'/api/v1/titles/{title.id}/histogram/')
+        assert response.status_code == 200, (
+            'Проверьте, что GET-запрос к '
+            '`/api/v1/titles/{title_id}/histogram/` возвращает статус 200'
+        )
+        assert response.json() == {
+            'count': 3,
+            'scores': {
+                str(score): int(score <= 3) for score in range(1, 11)
+            },
+        }, 'Проверьте, что гистограмма считает оценки от 1 до 10'
+
+    def test_not_found(self, client, catalog):
+        response = client.get('/api/v1/titles/0/histogram/')
+        assert response.status_code == 404
+
+    def test_follows_reviews(self, client, user_client, catalog):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/histogram/'
+        client.get(url)
+        review = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 9}
+        ).json()
+        assert client.get(url).json()['scores']['9'] == 1, (
+            'Проверьте, что новый отзыв попадает в гистограмму'
+        )
+        review_url = f'/api/v1/titles/{title.id}/reviews/{review["id"]}/'
+        user_client.patch(review_url, {'score': 2})
+        scores = client.get(url).json()['scores']
+        assert (scores['9'], scores['2']) == (0, 2), (
+            'Проверьте, что изменение оценки переносит её в гистограмме'
+        )
+        user_client.delete(review_url)
+        assert client.get(url).json()['count'] == 3, (
+            'Проверьте, что удалённый отзыв убирается из гистограммы'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTop:
+    url = '/api/v1/titles/top/'
+
+    def test_overall(self, client, rated):
+        response = client.get(self.url, {'limit': 3})
+        assert response.status_code == 200, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/top/` возвращает '
+            'статус 200'
+        )
+        top = response.json()
+        assert [title['id'] for title in top] == [
+            title.id for title in rated[:3]
+        ], 'Проверьте, что произведения упорядочены по убыванию рейтинга'
+        assert set(top[0]) == {
+            'id', 'rating', 'category', 'genre', 'name', 'year',
+            'description'
+        }
+
+    def test_unrated_are_skipped(self, client, catalog):
+        title, _ = catalog
+        assert [item['id'] for item in client.get(self.url).json()] == [
+            title.id
+        ], 'Проверьте, что произведения без оценок не попадают в список'
+
+    def test_category(self, client, rated):
+        top = client.get(self.url, {'category': 'category-1'}).json()
+        assert [title['id'] for title in top] == [
+            title.id for title in rated[1::2]
+        ]
+
+    def test_genre(self, client, rated):
+        top = client.get(self.url, {'genre': 'genre-2', 'limit': 2}).json()
+        assert [title['id'] for title in top] == [
+            title.id for title in rated[2:6:3]
+        ], 'Проверьте, что лучшие произведения жанра выбираются по рейтингу'
+
+    def test_fields(self, client, rated):
+        top = client.get(self.url, {'fields': 'id,name'}).json()
+        assert set(top[0]) == {'id', 'name'}
+
+    @pytest.mark.parametrize('params', [
+        {'limit': 0}, {'limit': 'ten'}, {'limit': 101},
+        {'genre': 'genre-0', 'category': 'category-0'},
+    ])
+    def test_bad_params(self, client, catalog, params):
+        assert client.get(self.url, params).status_code == 400
+
+    def test_follows_reviews(self, client, user_client, rated):
+        first = rated[0]
+        client.get(self.url, {'genre': 'genre-0', 'limit': 1})
+        user_client.post(
+            f'/api/v1/titles/{first.id}/reviews/', {'text': 'Отзыв', 'score': 1}
+        )
+        for params, leader in (
+            ({}, rated[1]),
+            ({'genre': 'genre-0'}, rated[1]),
+            ({'category': 'category-0'}, rated[2]),
+        ):
+            top = client.get(self.url, {'limit': 1, **params}).json()
+            assert top[0]['id'] == leader.id, (
+                'Проверьте, что новый отзыв меняет место произведения в '
+                f'лучших произведениях ({params})'
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSummaries:
+
+    def test_match_rebuild(self, user_client, admin_client, rated):
+        from reviews.ratings import rebuild_ratings
+
+        first, second = rated[:2]
+        for title in (first, second):
+            user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 3}
+            )
+        admin_client.patch(
+            f'/api/v1/titles/{first.id}/', {'genre': ['genre-2']}
+        )
+        admin_client.post('/api/v1/titles/bulk/', [{
+            'name': 'Пакет', 'year': 2001, 'category': 'category-0',
+            'genre': ['genre-0', 'genre-1'],
+        }], format='json')
+        admin_client.post('/api/v1/reviews/bulk/', [
+            {'title': second.id, 'author': 'author_1', 'text': 'Пакетный',
+             'score': 8},
+        ], format='json')
+        maintained = summaries()
+        rebuild_ratings()
+        assert maintained == summaries(), (
+            'Проверьте, что гистограммы и таблица лидеров жанров, '
+            'обновляемые при изменениях, совпадают с пересчитанными заново'
+        )
+
+    def test_command(self, rated):
+        from django.core.management import call_command
+        from reviews.models import GenreLeaderboard, TitleScoreCount
+
+        before = summaries()
+        TitleScoreCount.objects.all().delete()
+        GenreLeaderboard.objects.update(rating=None)
+        call_command('rebuild_ratings')
+        assert summaries() == before, (
+            'Проверьте, что `rebuild_ratings` восстанавливает гистограммы и '
+            'таблицу лидеров жанров'
+        )
+
+    def test_user_deleted(self, client, admin_client, rated):
+        from reviews.models import User
+        from reviews.ratings import rebuild_ratings
+
+        first, second = rated[:2]
+        author = User.objects.get(username='author_1')
+        for title in (first, second):
+            admin_client.post('/api/v1/reviews/bulk/', [
+                {'title': title.id, 'author': author.username,
+                 'text': 'Пакетный', 'score': 1},
+            ], format='json')
+        url = f'/api/v1/titles/{first.id}/histogram/'
+        client.get(url)
+        client.get('/api/v1/titles/top/', {'genre': 'genre-0', 'limit': 1})
+        admin_client.delete(f'/api/v1/users/{author.username}/')
+        maintained = summaries()
+        rebuild_ratings()
+        assert maintained == summaries(), (
+            'Проверьте, что удаление пользователя убирает его оценки из '
+            'гистограмм и таблицы лидеров жанров'
+        )
+        assert client.get(url).json()['scores']['1'] == 0
+        top = client.get(
+            '/api/v1/titles/top/', {'genre': 'genre-0', 'limit': 1}
+        ).json()
+        assert top[0]['id'] == first.id
@@ -0,0 +1,105 @@
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def metrics(settings):
+    from api.metrics import registry
+
+    settings.PERF_METRICS_ENABLED = True
+    settings.PERF_METRICS_TOKEN = 'secret'
+    registry.clear()
+    yield registry
+    registry.clear()
+
+
+def timings(response):
+    return {
+        part.split(';')[0].strip(): part
+        for part in response['Server-Timing'].split(',')
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPerformanceMetrics:
+
+    def test_disabled_by_default(self, client, catalog):
+        response = client.get('/api/v1/titles/')
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что без PERF_METRICS_ENABLED замеры не выполняются'
+        )
+        assert client.get('/metrics/').status_code == 404
+
+    def test_server_timing(self, metrics, client, catalog):
+        response = client.get('/api/v1/titles/')
+        parts = timings(response)
+        assert set(parts) == {'db', 'serializer', 'render', 'total'}, (
+            'Проверьте, что заголовок Server-Timing содержит время базы '
+            'данных, сериализации, отрисовки и общее время'
+        )
+        assert 'desc="3 queries"' in parts['db'], (
+            'Проверьте, что Server-Timing содержит число запросов к базе'
+        )
+        assert float(parts['serializer'].split('dur=')[1]) > 0
+
+    def test_prometheus(self, metrics, client, user_client, catalog):
+        title, _ = catalog
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        user_client.get(f'/api/v1/titles/{title.id}/')
+        user_client.get('/api/v1/users/me/')
+        response = client.get(
+            '/metrics/', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        for line in (
+            'yamdb_requests_total{view="TitleViewSet",action="list",'
+            'status="2xx"} 2',
+            'yamdb_requests_total{view="TitleViewSet",action="retrieve",'
+            'status="2xx"} 1',
+            'yamdb_requests_total{view="UserViewSet",action="me",'
+            'status="2xx"} 1',
+            'yamdb_db_queries_total{view="TitleViewSet",action="list"} 3',
+            'yamdb_request_duration_seconds_count{view="TitleViewSet",'
+            'action="list"} 2',
+        ):
+            assert line in text, (
+                f'Проверьте, что метрики содержат строку {line}'
+            )
+        assert '# TYPE yamdb_request_duration_seconds histogram' in text
+
+    @pytest.mark.parametrize('token,authorization', [
+        ('secret', None),
+        ('secret', 'Bearer wrong'),
+        ('', 'Bearer '),
+    ])
+    def test_metrics_need_token(self, metrics, settings, client,
+                                admin_client, token, authorization):
+        settings.PERF_METRICS_TOKEN = token
+        headers = {}
+        if authorization is not None:
+            headers['HTTP_AUTHORIZATION'] = authorization
+        assert client.get('/metrics/', **headers).status_code == 403, (
+            'Проверьте, что `/metrics/` отдаётся только с токеном '
+            'PERF_METRICS_TOKEN'
+        )
+        assert admin_client.get('/metrics/').status_code == 403
+
+    def test_budget(self, metrics, settings, client, catalog, caplog):
+        settings.PERF_QUERY_BUDGET = 2
+        with caplog.at_level(logging.WARNING, logger='api.metrics'):
+            client.get('/api/v1/genres/')
+            assert not caplog.records
+            client.get('/api/v1/titles/')
+        assert len(caplog.records) == 1, (
+            'Проверьте, что запросы сверх бюджета запросов к базе данных '
+            'пишутся в лог'
+        )
+        assert '/api/v1/titles/' in caplog.records[0].getMessage()
+        assert (
+            'yamdb_over_budget_total{view="TitleViewSet",action="list"} 1'
+            in metrics.render()
+        )
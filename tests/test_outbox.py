@@ -0,0 +1,132 @@
+import smtplib
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_email(self, client):
+        from reviews.models import OutboxEmail
+
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'newbie@yamdb.fake', (
+            'Проверьте, что регистрация ставит письмо в очередь'
+        )
+        call_command('send_emails', '--once')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT, (
+            'Проверьте, что `send_emails` отправляет письма из очереди'
+        )
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+
+    def test_batches_over_one_connection(self, monkeypatch):
+        from reviews.outbox import enqueue
+
+        opened = []
+        original = EmailBackend.__init__
+
+        def init(backend, *args, **kwargs):
+            opened.append(backend)
+            original(backend, *args, **kwargs)
+
+        monkeypatch.setattr(EmailBackend, '__init__', init)
+        for i in range(5):
+            enqueue('Тема', 'Текст', f'user_{i}@yamdb.fake')
+        call_command('send_emails', '--once', '--batch-size=2')
+        assert len(mail.outbox) == 5 and len(opened) == 1, (
+            'Проверьте, что `send_emails` отправляет все пачки через одно '
+            'соединение с почтовым сервером'
+        )
+
+    def test_retry_with_backoff(self, monkeypatch):
+        from reviews.models import OutboxEmail
+        from reviews.outbox import MAX_ATTEMPTS, enqueue
+
+        def broken(backend, messages):
+            raise smtplib.SMTPServerDisconnected('нет соединения')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', broken)
+        email = enqueue('Тема', 'Текст', 'user@yamdb.fake')
+        call_command('send_emails', '--once')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING and email.attempts == 1, (
+            'Проверьте, что письмо остаётся в очереди после ошибки'
+        )
+        delay = email.next_attempt - email.created
+        call_command('send_emails', '--once')
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что повторная попытка откладывается'
+        )
+        for attempt in range(2, MAX_ATTEMPTS + 1):
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                next_attempt=email.created
+            )
+            call_command('send_emails', '--once')
+            email.refresh_from_db()
+            assert email.attempts == attempt
+            if email.status == OutboxEmail.PENDING:
+                assert email.next_attempt - email.created > delay, (
+                    'Проверьте, что пауза между попытками растёт'
+                )
+                delay = email.next_attempt - email.created
+        assert email.status == OutboxEmail.FAILED, (
+            'Проверьте, что после всех попыток письмо помечается '
+            'неотправленным'
+        )
+
+    def test_long_batch_keeps_lease(self, monkeypatch):
+        from django.utils import timezone
+        from reviews.models import OutboxEmail
+        from reviews.outbox import LEASE, claim_batch, deliver, enqueue
+
+        for i in range(3):
+            enqueue('Тема', 'Текст', f'user_{i}@yamdb.fake')
+        clock = [timezone.now()]
+        monkeypatch.setattr(timezone, 'now', lambda: clock[0])
+        batch = claim_batch()
+        original = EmailBackend.send_messages
+        stolen = []
+
+        def slow(backend, messages):
+            # Каждое письмо отправляется быстрее аренды, а вся пачка -
+            # дольше неё; между письмами очередь читает другой обработчик.
+            clock[0] += LEASE * 0.8
+            stolen.extend(claim_batch())
+            return original(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', slow)
+        assert deliver(batch, EmailBackend()) == 3
+        assert stolen == [], (
+            'Проверьте, что аренда оставшихся писем пачки продлевается '
+            'перед отправкой каждого письма'
+        )
+        assert len(mail.outbox) == 3
+        assert OutboxEmail.objects.filter(
+            status=OutboxEmail.SENT
+        ).count() == 3
+
+    def test_expired_lease_is_skipped(self):
+        from reviews.models import OutboxEmail
+        from reviews.outbox import claim_batch, deliver, enqueue
+
+        enqueue('Тема', 'Текст', 'user@yamdb.fake')
+        batch = claim_batch()
+        OutboxEmail.objects.update(next_attempt=batch[0].created)
+        assert len(claim_batch()) == 1
+        assert deliver(batch, EmailBackend()) == 0 and mail.outbox == [], (
+            'Проверьте, что письмо, взятое другим обработчиком после '
+            'окончания аренды, не отправляется повторно'
+        )
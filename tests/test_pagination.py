@@ -0,0 +1,116 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+
+def walk(client, url):
+    """Проходит все страницы по ссылкам next, возвращает id и ответы."""
+    ids, pages = [], []
+    while url:
+        data = client.get(url).json()
+        pages.append(data)
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids, pages
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(PageNumberPagination, 'page_size', 3)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestKeysetPagination:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/{title_id}/reviews/',
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+    ])
+    def test_same_order_as_pages(self, client, big_catalog, small_pages,
+                                 url):
+        title, review = big_catalog
+        url = url.format(title_id=title.id, review_id=review.id)
+        by_page, _ = walk(client, url)
+        by_cursor, pages = walk(client, f'{url}?pagination=cursor')
+        assert by_cursor == by_page and len(set(by_cursor)) == 10, (
+            f'Проверьте, что курсорный режим `{url}` возвращает те же '
+            'записи в том же порядке, что и постраничный'
+        )
+        assert len(pages) == 4, (
+            'Проверьте, что в курсорном режиме соблюдается размер страницы'
+        )
+        assert 'count' not in pages[0] and pages[0]['previous'] is None, (
+            'Проверьте, что в курсорном режиме нет `count`, а у первой '
+            'страницы нет ссылки `previous`'
+        )
+        backwards = []
+        url = pages[-1]['previous']
+        while url:
+            data = client.get(url).json()
+            backwards = [item['id'] for item in data['results']] + backwards
+            url = data['previous']
+        assert backwards == by_cursor[:-len(pages[-1]['results'])], (
+            'Проверьте, что ссылки `previous` ведут к предыдущим страницам'
+        )
+
+    def test_accept_header(self, client, catalog):
+        title, _ = catalog
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/',
+            HTTP_ACCEPT='application/json; pagination=cursor'
+        )
+        assert 'count' not in response.json(), (
+            'Проверьте, что курсорный режим включается заголовком Accept '
+            'с параметром `pagination=cursor`'
+        )
+
+    @pytest.mark.parametrize('first_cursor', [False, True])
+    def test_accept_header_is_cached_apart(self, client, catalog,
+                                           first_cursor):
+        url = '/api/v1/titles/'
+        cursor = {'HTTP_ACCEPT': 'application/json; pagination=cursor'}
+        requests = [{}, cursor]
+        if first_cursor:
+            requests.reverse()
+        responses = [client.get(url, **headers) for headers in requests]
+        assert responses[1]['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы постраничного и курсорного режимов '
+            'кешируются под разными ключами'
+        )
+        page, by_cursor = (
+            response.json() for response in
+            (responses[::-1] if first_cursor else responses)
+        )
+        assert 'count' in page and 'count' not in by_cursor
+        assert responses[0]['ETag'] != responses[1]['ETag']
+        assert 'Accept' in responses[1]['Vary'], (
+            'Проверьте, что ответ зависит от заголовка Accept (Vary)'
+        )
+        again = client.get(url, **requests[0])
+        assert again['X-Cache'] == 'HIT'
+        assert again.content == responses[0].content
+
+    def test_default_unchanged(self, client, catalog):
+        title, _ = catalog
+        data = client.get(f'/api/v1/titles/{title.id}/reviews/').json()
+        assert data['count'] == 3, (
+            'Проверьте, что без параметров ответ остаётся постраничным'
+        )
+
+    def test_invalid_cursor(self, client, catalog):
+        title, _ = catalog
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?cursor=broken'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что некорректный курсор возвращает статус 404'
+        )
+
+    def test_no_count_query(self, client, big_catalog, small_pages,
+                            django_assert_num_queries):
+        title, _ = big_catalog
+        data = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        ).json()
+        with django_assert_num_queries(2):
+            client.get(data['next'])
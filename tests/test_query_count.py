@@ -0,0 +1,98 @@
+import pytest
+
+ANONYMOUS_ENDPOINTS = [
+    ('/api/v1/categories/', 2),
+    ('/api/v1/genres/', 2),
+    ('/api/v1/titles/', 3),
+    ('/api/v1/titles/{title_id}/', 2),
+    ('/api/v1/titles/top/', 2),
+    ('/api/v1/titles/top/?category=category-0', 2),
+    ('/api/v1/titles/top/?genre=genre-0', 3),
+    ('/api/v1/titles/{title_id}/histogram/', 2),
+    ('/api/v1/titles/{title_id}/reviews/', 3),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/', 2),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 3),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comment_id}/',
+     2),
+]
+
+ADMIN_ENDPOINTS = [
+    ('/api/v1/users/', 2),
+    ('/api/v1/users/{username}/', 1),
+    ('/api/v1/users/me/', 1),
+]
+
+
+def format_url(url, catalog):
+    title, review = catalog
+    return url.format(
+        title_id=title.id,
+        review_id=review.id,
+        comment_id=review.comments.first().id,
+        username=review.author.username,
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('data', ['catalog', 'big_catalog'])
+class TestQueryCount:
+
+    @pytest.mark.parametrize('url,expected', ANONYMOUS_ENDPOINTS)
+    def test_anonymous_endpoints(self, client, django_assert_num_queries,
+                                 request, data, url, expected):
+        url = format_url(url, request.getfixturevalue(data))
+        with django_assert_num_queries(expected):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+
+    @pytest.mark.parametrize('url,expected', ADMIN_ENDPOINTS)
+    def test_admin_endpoints(self, admin_client, django_assert_num_queries,
+                             request, data, url, expected):
+        url = format_url(url, request.getfixturevalue(data))
+        # Первый запрос процесса читает версию токенов из базы данных.
+        admin_client.get(url)
+        with django_assert_num_queries(expected):
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+
+
+def signup_statements(client, data):
+    """Запросы регистрации без служебных команд точек сохранения."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/api/v1/auth/signup/', data)
+    statements = [
+        query['sql'].split()[0] for query in queries.captured_queries
+        if not query['sql'].startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK'))
+    ]
+    return response, statements
+
+
+@pytest.mark.django_db
+class TestSignupQueryCount:
+
+    def test_new_user(self, client):
+        response, statements = signup_statements(
+            client, {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        assert statements == ['INSERT', 'UPDATE', 'INSERT'], (
+            'Проверьте, что регистрация записывает пользователя одним '
+            'INSERT и одним UPDATE и ставит письмо в очередь без '
+            'дополнительных запросов'
+        )
+
+    def test_existing_user(self, client, user):
+        response, statements = signup_statements(
+            client, {'username': user.username, 'email': user.email}
+        )
+        assert response.status_code == 400
+        assert statements == ['INSERT', 'SELECT', 'INSERT'], (
+            'Проверьте, что повторная регистрация не делает лишних запросов'
+        )
@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCascade:
+
+    def test_user_deleted(self, client, admin_client, catalog):
+        from reviews.models import Title
+
+        title, review = catalog
+        client.get(f'/api/v1/titles/{title.id}/')
+        response = admin_client.delete(
+            f'/api/v1/users/{review.author.username}/'
+        )
+        assert response.status_code == 204
+        title = Title.objects.get(pk=title.pk)
+        assert (title.rating_sum, title.rating_count) == (5, 2), (
+            'Проверьте, что удаление пользователя убирает его оценки из '
+            'рейтингов произведений'
+        )
+        assert client.get(
+            f'/api/v1/titles/{title.id}/'
+        ).json()['rating'] == 2.5
+
+    def test_last_review(self, admin_client, catalog):
+        from reviews.models import Review, Title, User
+
+        title, _ = catalog
+        for user in User.objects.filter(username__startswith='author_'):
+            admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert not Review.objects.exists()
+        title = Title.objects.get(pk=title.pk)
+        assert (title.rating, title.rating_count) == (None, 0), (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
@@ -0,0 +1,203 @@
+from contextlib import ExitStack
+
+import pytest
+
+
+@pytest.fixture
+def replica(settings):
+    """Реплика replica1 - второе соединение с той же тестовой базой."""
+    from django.db import connections
+
+    connections.databases['replica1'] = dict(
+        connections['default'].settings_dict
+    )
+    settings.DATABASE_REPLICAS = ['replica1']
+    yield connections['replica1']
+    connections['replica1'].close()
+    del connections['replica1']
+    del connections.databases['replica1']
+
+
+@pytest.fixture
+def lagging_replica(settings, tmp_path):
+    """Реплика replica1 - копия тестовой базы SQLite на момент вызова
+    фикстуры: последующие изменения до неё не доходят."""
+    import sqlite3
+
+    from django.db import connections
+
+    primary = connections['default']
+    if primary.vendor != 'sqlite':
+        pytest.skip('Копия базы делается средствами SQLite')
+    path = str(tmp_path / 'replica.sqlite3')
+    primary.ensure_connection()
+    target = sqlite3.connect(path)
+    primary.connection.backup(target)
+    target.close()
+    connections.databases['replica1'] = dict(
+        primary.settings_dict, NAME=path
+    )
+    settings.DATABASE_REPLICAS = ['replica1']
+    yield connections['replica1']
+    connections['replica1'].close()
+    del connections['replica1']
+    del connections.databases['replica1']
+
+
+class queries_by_alias(ExitStack):
+    """Запросы к каждой базе данных внутри блока."""
+
+    def __enter__(self):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        super().__enter__()
+        self.captured = {
+            alias: self.enter_context(
+                CaptureQueriesContext(connections[alias])
+            )
+            for alias in ('default', 'replica1')
+        }
+        return self
+
+    def count(self, alias):
+        return len(self.captured[alias])
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica(self, replica, client, catalog):
+        from api.cache import get_cache
+
+        title, review = catalog
+        get_cache().clear()
+        for url in (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ):
+            with queries_by_alias() as queries:
+                assert client.get(url).status_code == 200
+            assert queries.count('replica1') > 0, (
+                f'Проверьте, что GET {url} читает из реплики'
+            )
+            assert queries.count('default') == 0, (
+                f'Проверьте, что GET {url} не обращается к основной базе'
+            )
+
+    def test_writes_go_to_primary(self, replica, user_client, catalog):
+        title, _ = catalog
+        with queries_by_alias() as queries:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == 201
+        assert queries.count('replica1') == 0, (
+            'Проверьте, что запросы на изменение не читают из реплики'
+        )
+
+    def test_read_your_writes(self, replica, settings, client, user_client,
+                              admin_client, catalog):
+        settings.API_CACHE_ENABLED = False
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        user_client.post(url, {'text': 'Комментарий'})
+        with queries_by_alias() as queries:
+            response = user_client.get(url)
+        assert 'Комментарий' in [
+            comment['text'] for comment in response.json()['results']
+        ]
+        assert queries.count('replica1') == 0, (
+            'Проверьте, что после изменений пользователь читает из '
+            'основной базы'
+        )
+        for other in (client, admin_client):
+            with queries_by_alias() as queries:
+                other.get(url)
+            assert queries.count('replica1') > 0, (
+                'Проверьте, что остальные пользователи читают из реплики'
+            )
+
+    def test_pin_expires(self, replica, settings, user_client, catalog):
+        settings.DATABASE_REPLICA_PIN_SECONDS = 0
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        user_client.post(url, {'text': 'Комментарий'})
+        with queries_by_alias() as queries:
+            user_client.get(url)
+        assert queries.count('replica1') > 0
+
+    def test_users_stay_on_primary(self, replica, admin_client):
+        with queries_by_alias() as queries:
+            admin_client.get('/api/v1/users/')
+        assert queries.count('replica1') == 0
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLaggingReplica:
+
+    def test_changed_data_is_not_cached_from_replica(self, catalog,
+                                                     lagging_replica,
+                                                     client, user_client):
+        from api.cache import changed_key, get_cache
+
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.id}/'
+        before = client.get(url).json()['rating']
+        user_client.post(f'{url}reviews/', {'text': 'Отзыв', 'score': 10})
+        with queries_by_alias() as queries:
+            response = client.get(url)
+        assert response.json()['rating'] > before, (
+            'Проверьте, что сразу после изменения кешируемый ответ не '
+            'читается из отстающей реплики'
+        )
+        assert queries.count('replica1') == 0
+        cached = client.get(url)
+        assert cached['X-Cache'] == 'HIT'
+        assert cached.json()['rating'] == response.json()['rating'], (
+            'Проверьте, что в кеш попадает ответ основной базы'
+        )
+        get_cache().delete_many([
+            changed_key(tag) for tag in ('titles', f'title:{title.id}')
+        ])
+        with queries_by_alias() as queries:
+            client.get('/api/v1/titles/', {'year': title.year})
+        assert queries.count('replica1') > 0, (
+            'Проверьте, что когда реплики догнали изменения, чтение снова '
+            'идёт из реплик'
+        )
+
+
+def test_router():
+    from api.replicas import ReplicaRouter, read_database
+    from reviews.models import Title
+
+    router = ReplicaRouter()
+    assert router.db_for_read(Title) == 'default'
+    token = read_database.set('replica1')
+    try:
+        assert router.db_for_read(Title) == 'replica1'
+        assert router.db_for_write(Title) == 'default'
+    finally:
+        read_database.reset(token)
+
+
+def test_local_pins_warning(settings):
+    from api.checks import replica_pin_check
+
+    settings.DATABASE_REPLICAS = []
+    assert replica_pin_check(None) == []
+    settings.DATABASE_REPLICAS = ['replica1']
+    assert [message.id for message in replica_pin_check(None)] == [
+        'api.W002'
+    ], (
+        'Проверьте, что реплики без общего бэкенда кеша вызывают '
+        'предупреждение'
+    )
+    settings.CACHES = {
+        **settings.CACHES,
+        'api': {'BACKEND': 'django_redis.cache.RedisCache'},
+    }
+    assert replica_pin_check(None) == []
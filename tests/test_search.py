@@ -0,0 +1,111 @@
+import pytest
+from django.core.management import call_command
+
+
+def found(client, query, **params):
+    response = client.get('/api/v1/search/', {'q': query, **params})
+    assert response.status_code == 200, (
+        'Проверьте, что GET-запрос к `/api/v1/search/` возвращает статус 200'
+    )
+    return [
+        (item['type'], item['id']) for item in response.json()['results']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSearch:
+
+    def test_finds_all_kinds(self, client, catalog):
+        title, review = catalog
+        assert found(client, 'произведение 0') == [('title', title.id)], (
+            'Проверьте, что поиск находит произведение по названию'
+        )
+        assert ('review', review.id) in found(client, 'отзыв'), (
+            'Проверьте, что поиск находит отзывы по тексту'
+        )
+        assert len(found(client, 'КОММЕНТАРИЙ')) == 3, (
+            'Проверьте, что поиск находит комментарии без учёта регистра'
+        )
+        assert found(client, 'отзыв', type='comment') == [], (
+            'Проверьте, что параметр `type` ограничивает тип результатов'
+        )
+
+    def test_ranking(self, client, catalog):
+        title, _ = catalog
+        title.description = 'Описание, где есть слово Произведение'
+        title.save()
+        results = found(client, 'произведение')
+        assert results[0] == ('title', title.id) and len(results) == 3, (
+            'Проверьте, что результаты упорядочены по релевантности'
+        )
+
+    def test_index_follows_changes(self, client, admin_client, catalog):
+        title, review = catalog
+        admin_client.patch(
+            f'/api/v1/titles/{title.id}/', {'name': 'Новое название'},
+            format='json'
+        )
+        assert found(client, 'новое название') == [('title', title.id)], (
+            'Проверьте, что изменение произведения обновляет индекс'
+        )
+        comment = review.comments.first()
+        admin_client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/'
+        )
+        assert ('comment', comment.id) not in found(client, 'комментарий'), (
+            'Проверьте, что удалённый комментарий пропадает из индекса'
+        )
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert found(client, 'отзыв') == [], (
+            'Проверьте, что удаление произведения удаляет из индекса его '
+            'отзывы и комментарии'
+        )
+
+    def test_rebuild(self, client, catalog):
+        expected = found(client, 'описание')
+        from reviews.models import SearchEntry
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index')
+        assert found(client, 'описание') == expected != [], (
+            'Проверьте, что `rebuild_search_index` восстанавливает индекс'
+        )
+
+    def test_rebuild_in_chunks(self, client, catalog):
+        from reviews.models import SearchEntry
+        from reviews.search import rebuild_index
+
+        title, _ = catalog
+        expected = found(client, 'описание')
+        SearchEntry.objects.create(
+            kind=SearchEntry.COMMENT, object_id=0, title=title, body='описание'
+        )
+        SearchEntry.objects.filter(kind=SearchEntry.REVIEW).delete()
+        rebuild_index(chunk_size=2)
+        assert found(client, 'описание') == expected, (
+            'Проверьте, что перестроение пачками восстанавливает индекс и '
+            'удаляет записи несуществующих объектов'
+        )
+
+    def test_migration_fills_index(self, client, catalog):
+        import importlib
+        from types import SimpleNamespace
+
+        from django.apps import apps
+        from django.db import connection
+        from reviews.models import SearchEntry
+
+        migration = importlib.import_module('reviews.migrations.0006_search')
+        expected = found(client, 'описание')
+        SearchEntry.objects.all().delete()
+        migration.fill_index(apps, SimpleNamespace(connection=connection))
+        assert found(client, 'описание') == expected != [], (
+            'Проверьте, что миграция поиска индексирует существующие '
+            'произведения, отзывы и комментарии'
+        )
+
+    def test_empty_query(self, client):
+        response = client.get('/api/v1/search/')
+        assert response.status_code == 400, (
+            'Проверьте, что запрос без параметра `q` возвращает статус 400'
+        )
@@ -0,0 +1,121 @@
+import pytest
+
+
+def selects(queries, table):
+    """SQL запросов к таблице `table`."""
+    return [
+        query['sql'] for query in queries.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    @pytest.mark.parametrize('values_lists', [True, False])
+    def test_title_list_fields(self, client, settings, big_catalog,
+                               values_lists):
+        settings.API_VALUES_LISTS = values_lists
+        response = client.get('/api/v1/titles/?fields=id,name,year,rating')
+        assert response.status_code == 200
+        for title in response.json()['results']:
+            assert list(title) == ['id', 'rating', 'name', 'year'], (
+                'Проверьте, что параметр fields оставляет в ответе только '
+                'перечисленные поля в прежнем порядке'
+            )
+
+    @pytest.mark.parametrize('values_lists', [True, False])
+    def test_title_list_expand(self, client, settings, big_catalog,
+                               values_lists):
+        settings.API_VALUES_LISTS = values_lists
+        url = '/api/v1/titles/?fields=name,category,genre'
+        collapsed = client.get(f'{url}&expand=').json()['results'][0]
+        assert collapsed == {
+            'category': 'category-0',
+            'genre': ['genre-0'],
+            'name': 'Произведение 0',
+        }, (
+            'Проверьте, что без указания в expand категория и жанры '
+            'выводятся slug\'ами'
+        )
+        expanded = client.get(f'{url}&expand=genre').json()['results'][0]
+        assert expanded['category'] == 'category-0'
+        assert expanded['genre'] == [{'name': 'Жанр 0', 'slug': 'genre-0'}]
+        full = client.get(url).json()['results'][0]
+        assert full['category'] == {
+            'name': 'Категория 0', 'slug': 'category-0'
+        }, 'Проверьте, что без expand связанные объекты выводятся целиком'
+
+    @pytest.mark.parametrize('values_lists', [True, False])
+    def test_title_list_columns(self, client, settings, big_catalog,
+                                django_assert_num_queries, values_lists):
+        settings.API_CACHE_ENABLED = False
+        settings.API_VALUES_LISTS = values_lists
+        with django_assert_num_queries(2) as queries:
+            client.get('/api/v1/titles/?fields=id,name')
+        sql = selects(queries, 'reviews_title')[-1]
+        for column in ('description', 'category', 'rating'):
+            assert column not in sql, (
+                f'Проверьте, что без поля в fields столбец {column} '
+                'не выбирается из базы данных'
+            )
+
+    def test_title_detail(self, client, catalog, django_assert_num_queries):
+        title, _ = catalog
+        with django_assert_num_queries(1) as queries:
+            response = client.get(f'/api/v1/titles/{title.id}/?fields=year')
+        assert response.json() == {'year': title.year}
+        assert 'description' not in queries.captured_queries[0]['sql']
+
+    def test_reviews(self, client, big_catalog, django_assert_num_queries):
+        title, _ = big_catalog
+        url = f'/api/v1/titles/{title.id}/reviews/?fields=id,score'
+        with django_assert_num_queries(3) as queries:
+            response = client.get(url)
+        assert all(
+            list(review) == ['id', 'score']
+            for review in response.json()['results']
+        )
+        assert not selects(queries, 'reviews_user') and all(
+            'reviews_user' not in sql
+            for sql in selects(queries, 'reviews_review')
+        ), 'Проверьте, что без поля author не выбираются пользователи'
+
+    def test_reviews_cursor(self, client, big_catalog):
+        title, _ = big_catalog
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        ids = []
+        while url:
+            data = client.get(f'{url}&fields=id').json()
+            ids.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert len(set(ids)) == 10, (
+            'Проверьте, что курсорный режим работает с параметром fields'
+        )
+
+    def test_comments(self, client, catalog):
+        title, review = catalog
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?fields=text,author'
+        )
+        assert list(response.json()['results'][0]) == ['author', 'text']
+
+    def test_users(self, admin_client):
+        data = admin_client.get('/api/v1/users/?fields=username').json()
+        assert all(list(user) == ['username'] for user in data['results'])
+        me = admin_client.get('/api/v1/users/me/?fields=username,role')
+        assert list(me.json()) == ['username', 'role']
+
+    def test_writes_ignore_fields(self, admin_client, catalog):
+        response = admin_client.post(
+            '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}
+        )
+        assert response.status_code == 201
+        response = admin_client.patch(
+            '/api/v1/users/me/?fields=username', {'bio': 'Био'}
+        )
+        assert 'bio' in response.json(), (
+            'Проверьте, что параметр fields не влияет на ответы '
+            'на изменения'
+        )
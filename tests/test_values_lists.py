@@ -0,0 +1,103 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+URLS = [
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/titles/?genre=genre-1',
+    '/api/v1/titles/?category=category-0&year=2002',
+    '/api/v1/titles/?pagination=cursor',
+]
+
+
+@pytest.fixture
+def titles(big_catalog):
+    """Каталог и произведение без категории, жанров и оценок."""
+    from reviews.models import Title
+
+    Title.objects.create(
+        name='Без категории', year=1999, description='Строка\u2028абзац'
+    )
+    return big_catalog
+
+
+@pytest.mark.django_db
+class TestValuesLists:
+
+    @pytest.mark.parametrize('url', URLS)
+    def test_same_bytes_as_serializer(self, client, settings, titles, url):
+        from rest_framework.renderers import JSONRenderer
+
+        settings.API_CACHE_ENABLED = False
+        settings.API_VALUES_LISTS = False
+        response = client.get(url)
+        assert response.status_code == 200
+        expected = JSONRenderer().render(response.data)
+        settings.API_VALUES_LISTS = True
+        response = client.get(url)
+        assert response.content == expected, (
+            f'Проверьте, что GET `{url}` без сериализатора возвращает '
+            'тот же ответ, что и с сериализатором'
+        )
+
+    def test_cursor_pages(self, client, settings, titles):
+        settings.API_CACHE_ENABLED = False
+        url = '/api/v1/titles/?pagination=cursor'
+        pages = {}
+        for values_lists in (False, True):
+            settings.API_VALUES_LISTS = values_lists
+            data = client.get(url).json()
+            pages[values_lists] = [data]
+            while data['next']:
+                data = client.get(data['next']).json()
+                pages[values_lists].append(data)
+        assert pages[True] == pages[False], (
+            'Проверьте, что курсоры списков без сериализатора совпадают '
+            'с курсорами списков с сериализатором'
+        )
+
+
+class TestFastJSONRenderer:
+
+    DATA = {
+        'datetime': datetime.datetime(
+            2022, 2, 5, 14, 15, 22, 123456, tzinfo=datetime.timezone.utc
+        ),
+        'date': datetime.date(2022, 2, 5),
+        'time': datetime.time(14, 15, 22, 123456),
+        'decimal': decimal.Decimal('1.50'),
+        'uuid': uuid.UUID(int=1),
+        'float': 7.333333333333333,
+        'text': 'Отзыв\u2028\u2029"\\',
+        'list': [None, True, 1, (2, 3)],
+        1: 'ключ-число',
+    }
+
+    def test_same_bytes_as_json_renderer(self):
+        from api.renderers import FastJSONRenderer
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+
+        data = {**self.DATA, 'lazy': gettext_lazy('Произведение')}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data
+        ), 'Проверьте, что FastJSONRenderer совпадает с JSONRenderer'
+
+    def test_indent(self):
+        from api.renderers import FastJSONRenderer
+        from rest_framework.renderers import JSONRenderer
+
+        media_type = 'application/json; indent=4'
+        assert FastJSONRenderer().render(
+            self.DATA, media_type
+        ) == JSONRenderer().render(self.DATA, media_type)
+
+    def test_none(self):
+        from api.renderers import FastJSONRenderer
+
+        assert FastJSONRenderer().render(None) == b''